@@ -314,6 +314,22 @@ class APIClient:
             logger.error(f"Network error during invitation: {str(e)}")
             raise APIError(f"Ошибка сети при попытке приглашения: {str(e)}")
 
+    def invite_users(self, emails: list[str], is_recruiter: bool = False) -> dict[str, any]:
+        """Пригласить нескольких пользователей одним запросом"""
+        url = f"{settings.API_URL}/api/v1/auth/invite/bulk"
+        data = {"emails": emails, "is_recruiter": is_recruiter}
+
+        try:
+            response = self._make_authenticated_request(
+                "POST", url, json=data, timeout=self.timeout
+            )
+            if response.status_code != 200:
+                self._handle_error_response(response)
+            return response.json()
+        except RequestException as e:
+            logger.error(f"Network error during bulk invitation: {str(e)}")
+            raise APIError(f"Ошибка сети при массовом приглашении: {str(e)}")
+
     def resend_invite(self, email: str) -> dict[str, any]:
         """Повторно отправить приглашение пользователю"""
         url = f"{settings.API_URL}/api/v1/auth/resend-invite"
@@ -345,7 +361,17 @@ class APIClient:
             raise APIError(f"Ошибка сети при получении информации о пользователе: {str(e)}")
 
     def logout(self) -> None:
-        """Выход пользователя"""
+        """Выход пользователя: токены отзываются на сервере и удаляются из сессии"""
+        if self.access_token:
+            try:
+                requests.post(
+                    f"{settings.API_URL}/api/v1/auth/logout",
+                    json={"refresh_token": self.refresh_token} if self.refresh_token else None,
+                    headers=self.headers,
+                    timeout=self.timeout,
+                )
+            except RequestException as e:
+                logger.warning(f"Failed to revoke tokens on logout: {str(e)}")
         self._clear_tokens()
 
     def create_action(self, username: str, action: str) -> dict[str, any]:
@@ -492,6 +518,12 @@ class APIClient:
         """Получить статистику вакансии"""
         return self.get(f"/admin/vacancies/{vacancy_id}/statistics")
 
+    def get_vacancies_statistics(self, vacancy_ids: list[int]):
+        """Получить статистику нескольких вакансий одним запросом"""
+        if not vacancy_ids:
+            return []
+        return self.get("/admin/vacancies/statistics", params={"vacancy_ids": vacancy_ids})
+
     # Методы для работы со студентами
     def get_students(self, vacancy_id: int = None, status: str = None):
         """Получить список студентов"""
@@ -878,6 +910,28 @@ class APIClient:
             logger.error(f"Error uploading Excel schedule: {str(e)}")
             raise APIError(f"Ошибка загрузки файла: {str(e)}")
 
+    def start_schedule_import(self, files: dict) -> dict[str, any]:
+        """Запустить фоновую обработку Excel файла, возвращает задачу импорта"""
+        url = self._build_url("/schedule/import-jobs")
+        
+        try:
+            response = self._make_authenticated_request(
+                'POST', url, files=files, timeout=self.timeout
+            )
+            
+            if response.status_code not in (200, 202):
+                self._handle_error_response(response)
+            
+            return response.json()
+            
+        except Exception as e:
+            logger.error(f"Error starting schedule import: {str(e)}")
+            raise APIError(f"Ошибка загрузки файла: {str(e)}")
+
+    def get_schedule_import_job(self, job_id: int) -> dict[str, any]:
+        """Получить статус задачи импорта расписаний"""
+        return self.get(f"/schedule/import-jobs/{job_id}")
+
     # Методы для работы с партнерами
     def get_partners(self, show_hidden: bool = False) -> list[dict[str, any]]:
         """Получить список партнеров"""
@@ -1089,21 +1089,28 @@ def vacancies_list():
                 # Обычные администраторы не видят вакансии
                 return redirect(url_for("panel.home"))
 
-            # Получаем статистику для каждой вакансии
+            # Получаем статистику всех вакансий одним запросом
+            try:
+                statistics = {
+                    stats["vacancy_id"]: stats
+                    for stats in api_client.get_vacancies_statistics(
+                        [vacancy["id"] for vacancy in vacancies]
+                    )
+                }
+            except Exception as e:
+                logger.error(f"Error loading vacancy statistics: {str(e)}")
+                statistics = {}
+
             for vacancy in vacancies:
-                try:
-                    stats = api_client.get_vacancy_statistics(vacancy["id"])
-                    vacancy["statistics"] = stats
-                except:
-                    vacancy["statistics"] = {
-                        "total_applications": 0,
-                        "new_applications": 0,
-                        "in_review_applications": 0,
-                        "invited_applications": 0,
-                        "rejected_applications": 0,
-                        "conversion_rate": 0,
-                        "is_full": False,
-                    }
+                vacancy["statistics"] = statistics.get(vacancy["id"]) or {
+                    "total_applications": 0,
+                    "new_applications": 0,
+                    "in_review_applications": 0,
+                    "invited_applications": 0,
+                    "rejected_applications": 0,
+                    "conversion_rate": 0,
+                    "is_full": False,
+                }
 
             return render_template(
                 "panel/vacancies/vacancies_list.html",
@@ -2208,7 +2215,7 @@ def api_upload_schedule_excel():
         
         # Отправляем файл на backend
         files = {"file": (file.filename, file.read(), file.content_type)}
-        result = api_client.upload_schedule_excel(files)
+        job = api_client.start_schedule_import(files)
         
         # Создаем событие
         try:
@@ -2219,8 +2226,19 @@ def api_upload_schedule_excel():
         except:
             pass
         
-        return jsonify({"status": "success", "message": "Расписание успешно загружено"})
+        return jsonify({"status": "accepted", "job_id": job["id"], "message": "Файл принят в обработку"})
         
     except Exception as e:
         logger.error(f"Error uploading schedule: {str(e)}")
-        return jsonify({"error": f"Ошибка при загрузке расписания: {str(e)}"}), 500
\ No newline at end of file
+        return jsonify({"error": f"Ошибка при загрузке расписания: {str(e)}"}), 500
+
+
+@panel.route("/api/schedule/import-jobs/<int:job_id>", methods=["GET"])
+@login_required
+def api_schedule_import_job(job_id):
+    try:
+        job = api_client.get_schedule_import_job(job_id)
+        return jsonify(job)
+    except Exception as e:
+        logger.error(f"Error getting schedule import job {job_id}: {str(e)}")
+        return jsonify({"error": f"Ошибка получения статуса импорта: {str(e)}"}), 500
\ No newline at end of file
@@ -4,6 +4,7 @@ from jose import JWTError, jwt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.principal_cache import cache_principal, get_cached_principal
 from app.core.security import TokenData, verify_token
 from app.db.session import get_async_session
 from app.models.user import User
@@ -12,6 +13,16 @@ from app.crud.user import get_user_by_username
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
 
+async def _resolve_principal(db: AsyncSession, username: str) -> User | None:
+    """Пользователь по subject токена: сначала из кэша, затем из БД"""
+    user = await get_cached_principal(username)
+    if user is None:
+        user = await get_user_by_username(db, username=username)
+        if user is not None:
+            await cache_principal(user)
+    return user
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_session)
 ) -> User:
@@ -31,7 +42,7 @@ async def get_current_user(
     except ValueError as e:
         raise credentials_exception
 
-    user = await get_user_by_username(db, username=token_data.username)
+    user = await _resolve_principal(db, token_data.username)
     if user is None:
         raise credentials_exception
 
@@ -51,7 +62,7 @@ async def get_current_user_optional(
     except ValueError:
         return None
 
-    user = await get_user_by_username(db, username=token_data.username)
+    user = await _resolve_principal(db, token_data.username)
     return user
 
 
@@ -0,0 +1,76 @@
+"""
+Проверка прав на заявки студентов.
+
+Супер-администратор может работать с любыми заявками, рекрутер — только
+с заявками на свои вакансии, остальные администраторы доступа не имеют.
+Принадлежность заявок проверяется одним запросом с JOIN вакансий
+независимо от количества заявок.
+"""
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import student as student_crud
+from app.models.student import Student
+from app.models.user import User
+
+
+def _forbidden(detail: str) -> HTTPException:
+    return HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail=detail)
+
+
+def can_manage_vacancy(user: User, recruiter_id: int | None) -> bool:
+    """Может ли пользователь работать с вакансией этого рекрутера и заявками на нее"""
+    if user.is_superuser:
+        return True
+    return bool(user.is_recruiter) and recruiter_id is not None and recruiter_id == user.id
+
+
+async def get_student_for_user(
+    db: AsyncSession,
+    student_id: int,
+    user: User,
+    *,
+    forbidden_detail: str,
+    role_forbidden_detail: str,
+) -> Student:
+    """
+    Заявка, с которой пользователь может работать.
+    404 — заявки нет, 403 с forbidden_detail — заявка на чужую вакансию,
+    403 с role_forbidden_detail — у пользователя нет доступа к заявкам вообще
+    """
+    row = await student_crud.get_student_with_recruiter(db, student_id)
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Заявка не найдена."
+        )
+
+    student, recruiter_id = row
+    if not user.is_superuser and not user.is_recruiter:
+        raise _forbidden(role_forbidden_detail)
+    if not can_manage_vacancy(user, recruiter_id):
+        raise _forbidden(forbidden_detail)
+    return student
+
+
+async def ensure_can_manage_students(
+    db: AsyncSession,
+    student_ids: list[int],
+    user: User,
+    *,
+    role_forbidden_detail: str,
+) -> None:
+    """
+    Проверить права на набор заявок одним запросом.
+    Несуществующие заявки пропускаются; при первой чужой заявке — 403
+    """
+    if user.is_superuser:
+        return
+    if not user.is_recruiter:
+        raise _forbidden(role_forbidden_detail)
+
+    recruiter_ids = await student_crud.get_recruiter_ids_by_student_ids(db, student_ids)
+    for student_id in student_ids:
+        if student_id in recruiter_ids and not can_manage_vacancy(
+            user, recruiter_ids[student_id]
+        ):
+            raise _forbidden(f"У вас нет прав на обновление заявки {student_id}.")
@@ -13,6 +13,7 @@ from app.api.v1 import (
     student,
     partners,
     colleges,
+    metrics,
 )
 
 api_router = APIRouter()
@@ -40,3 +41,4 @@ api_router.include_router(partners.admin_router, prefix="/admin/partners", tags=
 api_router.include_router(schedule.router, prefix="/schedule", tags=["Расписание"])
 api_router.include_router(action.router, prefix="/actions", tags=["События"])
 api_router.include_router(student.router, prefix="/students", tags=["Студенты"])
+api_router.include_router(metrics.router, prefix="/metrics", tags=["Метрики"])
@@ -1,24 +1,33 @@
 from datetime import timedelta
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Body, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.security import (
-    verify_password,
-    get_password_hash,
+    verify_and_update_password,
     create_access_token,
     create_refresh_token,
     create_registration_token,
+    verify_token,
 )
+from app.core.token_revocation import revoke_token
 from app.crud import user as user_crud
 from app.db.session import get_async_session
 from app.schemas.token import Token, RefreshToken
-from app.schemas.user import UserCreate, UserInDB, UserRegistration, UserInvite
-from app.api.deps import get_current_superuser, get_current_active_user
-from app.utils.email import send_registration_email
+from app.schemas.user import (
+    UserBulkInvite,
+    UserBulkInviteResult,
+    UserCreate,
+    UserInDB,
+    UserInvite,
+    UserRegistration,
+)
+from app.api.deps import get_current_superuser, get_current_active_user, oauth2_scheme
+from app.models.user import User
+from app.utils.email import send_registration_email, send_registration_emails
 
 router = APIRouter()
 
@@ -103,13 +112,20 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(form_data.password, user.hashed_password):
+    is_valid, new_hash = await verify_and_update_password(
+        form_data.password, user.hashed_password
+    )
+    if not is_valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Неверное имя пользователя или пароль.",
             headers={"WWW-Authenticate": "Bearer"},
         )
 
+    # Хэш с устаревшей стоимостью пересчитывается при успешном входе
+    if new_hash:
+        user = await user_crud.update_user(db, user.id, {"hashed_password": new_hash})
+
     if not user.is_registered:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -189,6 +205,13 @@ async def refresh_token(
         )
 
 
+def _create_invite_token(user: User) -> str:
+    """Токен регистрации для приглашения (действует 24 часа)"""
+    return create_registration_token(
+        data={"sub": str(user.id)}, expires_delta=timedelta(hours=24)
+    )
+
+
 @router.post("/invite", response_model=UserInDB)
 async def invite_user(
     user_in: UserInvite,
@@ -214,17 +237,62 @@ async def invite_user(
     user = await user_crud.create_user(db, new_user)
 
     # Создаем токен для регистрации
-    token_expires = timedelta(hours=24)
-    token = create_registration_token(
-        data={"sub": str(user.id)}, expires_delta=token_expires
-    )
+    token = _create_invite_token(user)
 
     # Отправляем email с приглашением
-    await send_registration_email(email_to=user.email, token=token)
+    await send_registration_email(db, email_to=user.email, token=token)
 
     return user
 
 
+@router.post("/invite/bulk", response_model=UserBulkInviteResult)
+async def invite_users(
+    user_in: UserBulkInvite,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: Any = Depends(get_current_superuser),
+) -> Any:
+    """
+    Массовое приглашение пользователей (только для супер-администратора).
+    Для новых адресов создаются учетные записи, еще не зарегистрированным
+    пользователям приглашение отправляется повторно, зарегистрированные пропускаются
+    """
+    emails = list(dict.fromkeys(user_in.emails))
+    existing = {
+        user.email: user for user in await user_crud.get_users_by_emails(db, emails)
+    }
+    new_users = await user_crud.create_users(
+        db,
+        [
+            UserCreate(
+                email=email,
+                is_superuser=False,
+                is_registered=False,
+                is_recruiter=user_in.is_recruiter,
+            )
+            for email in emails
+            if email not in existing
+        ],
+    )
+    users = {**existing, **{user.email: user for user in new_users}}
+    missing = [email for email in emails if email not in users]
+    if missing:
+        # Эти адреса успел создать параллельный запрос
+        users.update(
+            {user.email: user for user in await user_crud.get_users_by_emails(db, missing)}
+        )
+    invited = [users[email] for email in emails if not users[email].is_registered]
+    skipped = [email for email in emails if users[email].is_registered]
+
+    # Один скомпилированный шаблон на всех получателей. Новые пользователи
+    # и письма фиксируются одним commit при постановке писем в очередь:
+    # учетная запись не останется без приглашения, если запрос прервется
+    await send_registration_emails(
+        db, [(user.email, _create_invite_token(user)) for user in invited]
+    )
+
+    return {"invited": invited, "skipped": skipped}
+
+
 @router.post("/resend-invite", response_model=UserInDB)
 async def resend_invite(
     user_in: UserInvite,
@@ -247,18 +315,37 @@ async def resend_invite(
         )
 
     # Создаем новый токен для регистрации
-    token_expires = timedelta(hours=24)
-    token = create_registration_token(
-        data={"sub": str(user.id)}, expires_delta=token_expires
-    )
+    token = _create_invite_token(user)
 
     # Отправляем email с приглашением
-    await send_registration_email(email_to=user.email, token=token)
+    await send_registration_email(db, email_to=user.email, token=token)
 
     return user
 
 
 @router.post("/logout")
-async def logout():
-    """Выход пользователя (заглушка, так как JWT токены не хранятся на сервере)"""
+async def logout(
+    logout_data: RefreshToken | None = Body(default=None),
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_async_session),
+) -> Any:
+    """Выход пользователя: отзывает access токен и переданный refresh токен"""
+    try:
+        payload = verify_token(token, "access")
+    except ValueError:
+        # Истекший или уже отозванный access токен не мешает отозвать refresh
+        payload = None
+    if payload is not None:
+        await revoke_token(db, payload)
+
+    if logout_data is not None:
+        try:
+            refresh_payload = verify_token(logout_data.refresh_token, "refresh")
+        except ValueError:
+            refresh_payload = None
+        if refresh_payload is not None and (
+            payload is None or refresh_payload.get("sub") == payload.get("sub")
+        ):
+            await revoke_token(db, refresh_payload)
+
     return {"message": "Успешный выход"}
@@ -1,16 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Union, Optional
-import os
 
 from app.api.deps import get_current_admin_or_superuser
 from app.crud import college as college_crud
 from app.db.session import get_async_session
 from app.models.user import User
 from app.schemas.college import CollegeCreate, CollegeUpdate, CollegeInDB
-from app.utils.files import save_image
-from app.core.config import settings
+from app.utils.files import save_image_variants
+from app.utils.images import ImageFormat, ImageSize, image_variant_url
+from app.utils.media import get_cached_image, invalidate_cached_image, media_file_response
+from app.utils.http_cache import cached_response, rows_etag
 
 # Публичный роутер для открытых эндпоинтов
 public_router = APIRouter()
@@ -23,49 +23,60 @@ admin_router = APIRouter()
 
 @public_router.get("/", response_model=list[CollegeInDB])
 async def read_public_colleges(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_async_session),
 ):
     """Получить список публичных колледжей (открытый эндпоинт)"""
-    return await college_crud.get_colleges_list(db, skip=skip, limit=limit)
+    colleges = await college_crud.get_colleges_list(db, skip=skip, limit=limit)
+    return cached_response(
+        request, colleges, schema=list[CollegeInDB], etag=rows_etag(colleges)
+    )
 
 
 @public_router.get("/{college_id}", response_model=CollegeInDB)
-async def get_public_college_by_id(college_id: int, db: AsyncSession = Depends(get_async_session)):
+async def get_public_college_by_id(
+    college_id: int, request: Request, db: AsyncSession = Depends(get_async_session)
+):
     """Получить публичный колледж по ID"""
     college = await college_crud.get_college(db, college_id)
     if not college:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Колледж не найден."
         )
-    return college
+    return cached_response(request, college, schema=CollegeInDB, etag=rows_etag([college]))
 
 
 @public_router.get("/{college_id}/image")
-async def get_college_image(college_id: int, db: AsyncSession = Depends(get_async_session)):
+async def get_college_image(
+    college_id: int,
+    request: Request,
+    size: ImageSize = Query("original", description="Размер: thumb, medium или original"),
+    format: ImageFormat = Query("native", description="Формат: native (исходный) или webp"),
+    db: AsyncSession = Depends(get_async_session),
+):
     """Получить изображение колледжа по ID"""
-    college = await college_crud.get_college(db, college_id)
-    if not college:
+    # Путь к изображению берется из кэша, к БД обращаемся только при промахе
+    image = await get_cached_image(
+        "college", college_id, lambda: college_crud.get_college(db, college_id)
+    )
+    if image is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Колледж не найден."
         )
 
-    if not college.image_url:
+    image_url, image_variants = image
+    if not image_url:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="У колледжа нет изображения."
         )
 
-    # Получаем путь к файлу из URL
-    # URL имеет формат /media/colleges/filename.ext
-    image_path = os.path.join(settings.MEDIA_ROOT, college.image_url.lstrip("/media/"))
-
-    if not os.path.exists(image_path):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Изображение не найдено."
-        )
-
-    return FileResponse(image_path)
+    return await media_file_response(
+        request,
+        image_variant_url(image_url, image_variants, size, format),
+        not_found_detail="Изображение не найдено.",
+    )
 
 
 # === АДМИНИСТРАТИВНЫЕ ЭНДПОИНТЫ ===
@@ -103,10 +114,12 @@ async def create_college_item(
     """Создать колледж с обязательной загрузкой изображения (только для администраторов)"""
     
     # Сохраняем изображение (обязательно)
-    image_url = await save_image(image, "colleges")
+    stored_image = await save_image_variants(image, "colleges")
 
     college_in = CollegeCreate(
-        name=name, image_url=image_url
+        name=name,
+        image_url=stored_image.url,
+        image_variants=stored_image.variants,
     )
 
     return await college_crud.create_college(db=db, college_in=college_in)
@@ -124,17 +137,20 @@ async def update_college_item(
 ):
     """Обновить колледж с возможностью обновления изображения (только для администраторов)"""
     # Сохраняем новое изображение, если оно предоставлено
-    image_url = None
+    stored_image = None
     if image:
-        image_url = await save_image(image, "colleges")
+        stored_image = await save_image_variants(image, "colleges")
     elif remove_image == "true":
-        image_url = None
+        stored_image = None
 
     college_update = CollegeUpdate(
-        name=name, image_url=image_url
+        name=name,
+        image_url=stored_image.url if stored_image else None,
+        image_variants=stored_image.variants if stored_image else None,
     )
 
     college = await college_crud.update_college(db=db, college_id=college_id, college_in=college_update)
+    invalidate_cached_image("college", college_id)
     if not college:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Колледж не найден."
@@ -154,4 +170,5 @@ async def delete_college_item(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Колледж не найден."
         )
+    invalidate_cached_image("college", college_id)
     return {"ok": True} 
\ No newline at end of file
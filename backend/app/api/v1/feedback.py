@@ -125,6 +125,7 @@ async def respond_to_feedback(
 
     # Отправляем ответ на email
     await send_feedback_response(
+        db,
         email_to=feedback.email,
         name=feedback.name,
         response_text=response.response_text,
@@ -0,0 +1,39 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.api.deps import get_current_superuser
+from app.core.security import token_cache
+from app.core.token_revocation import get_revocation_stats
+from app.db.pool import get_pool_metrics
+from app.db.session import engine, get_async_session
+from app.models.user import User
+from app.utils.email_outbox import get_email_outbox_metrics
+
+router = APIRouter()
+
+
+@router.get("/db-pool")
+async def get_db_pool_metrics(
+    current_user: User = Depends(get_current_superuser),
+) -> Dict[str, Any]:
+    """Состояние пула соединений с БД: занятые соединения, overflow, ожидание, ошибки"""
+    return get_pool_metrics(engine)
+
+
+@router.get("/token-cache")
+async def get_token_cache_metrics(
+    current_user: User = Depends(get_current_superuser),
+) -> Dict[str, Any]:
+    """Кэш проверенных JWT (размер, попадания, промахи) и список отзывов"""
+    return {**token_cache.stats(), **get_revocation_stats()}
+
+
+@router.get("/email-outbox")
+async def get_email_outbox_queue_metrics(
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_superuser),
+) -> Dict[str, Any]:
+    """Очередь писем: глубина по статусам, возраст самого старого письма, счетчики отправки"""
+    return await get_email_outbox_metrics(db)
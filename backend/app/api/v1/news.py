@@ -1,16 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Union, Optional
-import os
 
 from app.api.deps import get_current_admin_or_superuser, get_current_user_optional
 from app.crud import news as news_crud
 from app.db.session import get_async_session
 from app.models.user import User
 from app.schemas.news import NewsCreate, NewsUpdate, NewsInDB
-from app.utils.files import save_image
-from app.core.config import settings
+from app.utils.files import save_image_variants
+from app.utils.images import ImageFormat, ImageSize, image_variant_url
+from app.utils.media import get_cached_image, invalidate_cached_image, media_file_response
+from app.utils.http_cache import cached_response, rows_etag
 
 # Публичный роутер для открытых эндпоинтов
 public_router = APIRouter()
@@ -23,16 +23,22 @@ admin_router = APIRouter()
 
 @public_router.get("/", response_model=list[NewsInDB])
 async def read_public_news(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_async_session),
 ):
     """Получить список публичных новостей (открытый эндпоинт)"""
-    return await news_crud.get_news_list(db, skip=skip, limit=limit, show_hidden=False)
+    news_list = await news_crud.get_news_list(db, skip=skip, limit=limit, show_hidden=False)
+    return cached_response(
+        request, news_list, schema=list[NewsInDB], etag=rows_etag(news_list)
+    )
 
 
 @public_router.get("/{news_id}", response_model=NewsInDB)
-async def get_public_news_by_id(news_id: int, db: AsyncSession = Depends(get_async_session)):
+async def get_public_news_by_id(
+    news_id: int, request: Request, db: AsyncSession = Depends(get_async_session)
+):
     """Получить публичную новость по ID"""
     news = await news_crud.get_news(db, news_id)
     if not news:
@@ -43,33 +49,38 @@ async def get_public_news_by_id(news_id: int, db: AsyncSession = Depends(get_asy
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Новость не найдена."
         )
-    return news
+    return cached_response(request, news, schema=NewsInDB, etag=rows_etag([news]))
 
 
 @public_router.get("/{news_id}/image")
-async def get_news_image(news_id: int, db: AsyncSession = Depends(get_async_session)):
+async def get_news_image(
+    news_id: int,
+    request: Request,
+    size: ImageSize = Query("original", description="Размер: thumb, medium или original"),
+    format: ImageFormat = Query("native", description="Формат: native (исходный) или webp"),
+    db: AsyncSession = Depends(get_async_session),
+):
     """Получить изображение новости по ID"""
-    news = await news_crud.get_news(db, news_id)
-    if not news:
+    # Путь к изображению берется из кэша, к БД обращаемся только при промахе
+    image = await get_cached_image(
+        "news", news_id, lambda: news_crud.get_news(db, news_id)
+    )
+    if image is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Новость не найдена."
         )
 
-    if not news.image_url:
+    image_url, image_variants = image
+    if not image_url:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="У новости нет изображения."
         )
 
-    # Получаем путь к файлу из URL
-    # URL имеет формат /media/news/filename.ext
-    image_path = os.path.join(settings.MEDIA_ROOT, news.image_url.lstrip("/media/"))
-
-    if not os.path.exists(image_path):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Изображение не найдено."
-        )
-
-    return FileResponse(image_path)
+    return await media_file_response(
+        request,
+        image_variant_url(image_url, image_variants, size, format),
+        not_found_detail="Изображение не найдено.",
+    )
 
 
 # === АДМИНИСТРАТИВНЫЕ ЭНДПОИНТЫ ===
@@ -112,12 +123,16 @@ async def create_news_item(
         image = None
     
     # Сохраняем изображение, если оно предоставлено
-    image_url = None
+    stored_image = None
     if image:
-        image_url = await save_image(image, "news")
+        stored_image = await save_image_variants(image, "news")
 
     news_in = NewsCreate(
-        title=title, content=content, image_url=image_url, is_hidden=is_hidden
+        title=title,
+        content=content,
+        image_url=stored_image.url if stored_image else None,
+        image_variants=stored_image.variants if stored_image else None,
+        is_hidden=is_hidden,
     )
 
     return await news_crud.create_news(db=db, news_in=news_in)
@@ -137,17 +152,22 @@ async def update_news_item(
 ):
     """Обновить новость с возможностью обновления изображения (только для администраторов)"""
     # Сохраняем новое изображение, если оно предоставлено
-    image_url = None
+    stored_image = None
     if image:
-        image_url = await save_image(image, "news")
+        stored_image = await save_image_variants(image, "news")
     elif remove_image == "true":
-        image_url = None
+        stored_image = None
 
     news_update = NewsUpdate(
-        title=title, content=content, image_url=image_url, is_hidden=is_hidden
+        title=title,
+        content=content,
+        image_url=stored_image.url if stored_image else None,
+        image_variants=stored_image.variants if stored_image else None,
+        is_hidden=is_hidden,
     )
 
     news = await news_crud.update_news(db=db, news_id=news_id, news_in=news_update)
+    invalidate_cached_image("news", news_id)
     if not news:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Новость не найдена."
@@ -167,6 +187,7 @@ async def delete_news_item(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Новость не найдена."
         )
+    invalidate_cached_image("news", news_id)
     return {"ok": True}
 
 
@@ -1,16 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Union, Optional
-import os
 
 from app.api.deps import get_current_admin_or_superuser, get_current_user_optional
 from app.crud import partner as partner_crud
 from app.db.session import get_async_session
 from app.models.user import User
 from app.schemas.partner import PartnerCreate, PartnerUpdate, PartnerInDB
-from app.utils.files import save_image
-from app.core.config import settings
+from app.utils.files import save_image_variants
+from app.utils.images import ImageFormat, ImageSize, image_variant_url
+from app.utils.media import get_cached_image, invalidate_cached_image, media_file_response
+from app.utils.http_cache import cached_response, rows_etag
 
 # Публичный роутер для открытых эндпоинтов
 public_router = APIRouter()
@@ -23,16 +23,22 @@ admin_router = APIRouter()
 
 @public_router.get("/", response_model=list[PartnerInDB])
 async def read_public_partners(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_async_session),
 ):
     """Получить список публичных партнеров (открытый эндпоинт)"""
-    return await partner_crud.get_partners_list(db, skip=skip, limit=limit, show_hidden=False)
+    partners = await partner_crud.get_partners_list(db, skip=skip, limit=limit, show_hidden=False)
+    return cached_response(
+        request, partners, schema=list[PartnerInDB], etag=rows_etag(partners)
+    )
 
 
 @public_router.get("/{partner_id}", response_model=PartnerInDB)
-async def get_public_partner_by_id(partner_id: int, db: AsyncSession = Depends(get_async_session)):
+async def get_public_partner_by_id(
+    partner_id: int, request: Request, db: AsyncSession = Depends(get_async_session)
+):
     """Получить публичного партнера по ID"""
     partner = await partner_crud.get_partner(db, partner_id)
     if not partner:
@@ -43,33 +49,38 @@ async def get_public_partner_by_id(partner_id: int, db: AsyncSession = Depends(g
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Партнер не найден."
         )
-    return partner
+    return cached_response(request, partner, schema=PartnerInDB, etag=rows_etag([partner]))
 
 
 @public_router.get("/{partner_id}/image")
-async def get_partner_image(partner_id: int, db: AsyncSession = Depends(get_async_session)):
+async def get_partner_image(
+    partner_id: int,
+    request: Request,
+    size: ImageSize = Query("original", description="Размер: thumb, medium или original"),
+    format: ImageFormat = Query("native", description="Формат: native (исходный) или webp"),
+    db: AsyncSession = Depends(get_async_session),
+):
     """Получить изображение партнера по ID"""
-    partner = await partner_crud.get_partner(db, partner_id)
-    if not partner:
+    # Путь к изображению берется из кэша, к БД обращаемся только при промахе
+    image = await get_cached_image(
+        "partner", partner_id, lambda: partner_crud.get_partner(db, partner_id)
+    )
+    if image is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Партнер не найден."
         )
 
-    if not partner.image_url:
+    image_url, image_variants = image
+    if not image_url:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="У партнера нет изображения."
         )
 
-    # Получаем путь к файлу из URL
-    # URL имеет формат /media/partners/filename.ext
-    image_path = os.path.join(settings.MEDIA_ROOT, partner.image_url.lstrip("/media/"))
-
-    if not os.path.exists(image_path):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Изображение не найдено."
-        )
-
-    return FileResponse(image_path)
+    return await media_file_response(
+        request,
+        image_variant_url(image_url, image_variants, size, format),
+        not_found_detail="Изображение не найдено.",
+    )
 
 
 # === АДМИНИСТРАТИВНЫЕ ЭНДПОИНТЫ ===
@@ -112,12 +123,16 @@ async def create_partner_item(
         image = None
     
     # Сохраняем изображение, если оно предоставлено
-    image_url = None
+    stored_image = None
     if image:
-        image_url = await save_image(image, "partners")
+        stored_image = await save_image_variants(image, "partners")
 
     partner_in = PartnerCreate(
-        name=name, description=description, image_url=image_url, is_active=is_active
+        name=name,
+        description=description,
+        image_url=stored_image.url if stored_image else None,
+        image_variants=stored_image.variants if stored_image else None,
+        is_active=is_active,
     )
 
     return await partner_crud.create_partner(db=db, partner_in=partner_in)
@@ -137,17 +152,22 @@ async def update_partner_item(
 ):
     """Обновить партнера с возможностью обновления изображения (только для администраторов)"""
     # Сохраняем новое изображение, если оно предоставлено
-    image_url = None
+    stored_image = None
     if image:
-        image_url = await save_image(image, "partners")
+        stored_image = await save_image_variants(image, "partners")
     elif remove_image == "true":
-        image_url = None
+        stored_image = None
 
     partner_update = PartnerUpdate(
-        name=name, description=description, image_url=image_url, is_active=is_active
+        name=name,
+        description=description,
+        image_url=stored_image.url if stored_image else None,
+        image_variants=stored_image.variants if stored_image else None,
+        is_active=is_active,
     )
 
     partner = await partner_crud.update_partner(db=db, partner_id=partner_id, partner_in=partner_update)
+    invalidate_cached_image("partner", partner_id)
     if not partner:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Партнер не найден."
@@ -167,6 +187,7 @@ async def delete_partner_item(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Партнер не найден."
         )
+    invalidate_cached_image("partner", partner_id)
     return {"ok": True}
 
 
@@ -3,7 +3,7 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import get_current_active_user
-from app.core.security import verify_password
+from app.core.security import verify_password_async
 from app.crud import user as user_crud
 from app.db.session import get_async_session
 from app.models.user import User
@@ -31,6 +31,7 @@ async def forgot_password(
 
     # Отправляем email
     await send_reset_password_email(
+        db,
         email_to=user.email,
         token=token,
         username=user.username or "пользователь",  # Если username еще не задан
@@ -70,8 +71,10 @@ async def change_password(
     current_user: User = Depends(get_current_active_user),
 ):
     """Изменение пароля авторизованным администратором"""
-    if not verify_password(
-        password_change.current_password, current_user.hashed_password
+    # current_user может быть из кэша принципалов, где нет хэша пароля
+    user = await user_crud.get_user(db, current_user.id)
+    if not user or not await verify_password_async(
+        password_change.current_password, user.hashed_password
     ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Неправильный пароль."
@@ -7,6 +7,7 @@ from app.crud import review as review_crud
 from app.db.session import get_async_session
 from app.models.user import User
 from app.schemas.review import ReviewCreate, ReviewUpdate, ReviewInDB
+from app.utils.http_cache import cached_response
 
 # Публичный роутер для открытых эндпоинтов
 public_router = APIRouter()
@@ -19,17 +20,19 @@ admin_router = APIRouter()
 
 @public_router.get("/", response_model=list[ReviewInDB])
 async def read_public_reviews(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_async_session),
 ):
     """Получить список публичных отзывов (открытый эндпоинт)"""
-    return await review_crud.get_reviews(db, skip=skip, limit=limit, show_hidden=False)
+    reviews = await review_crud.get_reviews(db, skip=skip, limit=limit, show_hidden=False)
+    return cached_response(request, reviews, schema=list[ReviewInDB])
 
 
 @public_router.get("/{review_id}", response_model=ReviewInDB)
 async def read_public_review(
-    review_id: int, db: AsyncSession = Depends(get_async_session)
+    review_id: int, request: Request, db: AsyncSession = Depends(get_async_session)
 ):
     """Получить публичный отзыв по ID"""
     review = await review_crud.get_review(db=db, review_id=review_id)
@@ -37,11 +40,11 @@ async def read_public_review(
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Отзыв не найден."
         )
-    if review.is_hidden:
+    if not review.is_approved:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Отзыв не найден."
         )
-    return review
+    return cached_response(request, review, schema=ReviewInDB)
 
 
 # === АДМИНИСТРАТИВНЫЕ ЭНДПОИНТЫ ===
@@ -1,17 +1,23 @@
+import asyncio
 import os
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Request
+)
 from fastapi.responses import JSONResponse, HTMLResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Dict, Any
 
 from app.api.deps import get_current_admin_or_superuser
+from app.core.config import settings
 from app.crud import schedule as schedule_crud
 from app.db.session import get_async_session
 from app.models.user import User
 from app.schemas.schedule import (
-    ScheduleTemplateCreate, ScheduleTemplateInDB, ScheduleUploadResponse
+    ScheduleTemplateInDB, ScheduleEntryInDB, ScheduleUploadResponse, ScheduleImportJobInDB
 )
-from app.utils.schedule_generator import process_excel_schedule, validate_schedule_data
+from app.utils.schedule_generator import render_schedule_html, schedule_content_hash
+from app.utils.schedule_import import import_schedule_file, run_import_job, save_temp_upload
+from app.utils.http_cache import cached_response, make_etag, public_cache
 
 import logging
 
@@ -20,6 +26,15 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def _check_excel_filename(file: UploadFile) -> None:
+    """Проверить расширение загруженного файла"""
+    if not file.filename or not file.filename.endswith(('.xlsx', '.xls')):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Поддерживаются только файлы Excel (.xlsx, .xls)"
+        )
+
+
 @router.post("/upload-excel", response_model=ScheduleUploadResponse)
 async def upload_excel_schedule(
     *,
@@ -28,83 +43,83 @@ async def upload_excel_schedule(
     current_user: User = Depends(get_current_admin_or_superuser)
 ):
     """Загрузить Excel файл и сгенерировать JSON шаблоны расписаний"""
+    _check_excel_filename(file)
+    file_path = await save_temp_upload(file)
+
     try:
-        # Проверяем расширение файла
-        if not file.filename.endswith(('.xlsx', '.xls')):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Поддерживаются только файлы Excel (.xlsx, .xls)"
-            )
-        
-        # Создаем временную папку если её нет
-        temp_dir = "temp_uploads"
-        os.makedirs(temp_dir, exist_ok=True)
-        
-        # Сохраняем временный файл
-        file_path = os.path.join(temp_dir, file.filename)
-        with open(file_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
-        
-        # Обрабатываем файл и получаем JSON данные
-        processed_data = await process_excel_schedule(file_path, db)
-        
-        # Сохраняем шаблоны в базу данных
-        templates_to_create = []
-        for item in processed_data:
-            if validate_schedule_data(item["schedule_data"]) and item.get("college_id"):
-                template_data = ScheduleTemplateCreate(
-                    college_id=item["college_id"],
-                    college_name=item["college_name"],
-                    schedule_data=item["schedule_data"],
-                    is_active=True
-                )
-                templates_to_create.append(template_data)
-        
-        # Деактивируем старые шаблоны для этих колледжей
-        for item in processed_data:
-            if item.get("college_id"):
-                await schedule_crud.deactivate_schedule_templates_by_college_id(
-                    db, college_id=item["college_id"]
-                )
-        
-        # Создаем новые шаблоны
-        created_templates = await schedule_crud.create_schedule_templates_multi(
-            db, templates=templates_to_create
-        )
-        
-        # Удаляем временный файл
-        os.remove(file_path)
-        
-        # Формируем ответ
-        result_data = []
-        for template in created_templates:
-            result_data.append({
-                "college": template.college_name,
-                "id": template.id,
-                "is_active": template.is_active
-            })
-        
+        result_data = await import_schedule_file(db, file_path)
         return ScheduleUploadResponse(
             status="success",
             data=result_data
         )
-    
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+    except asyncio.TimeoutError:
+        logger.error("Превышено время обработки Excel файла")
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Превышено время обработки файла"
+        )
     except Exception as e:
-        import traceback
-        print('!!! ОШИБКА ПРИ СОХРАНЕНИИ РАСПИСАНИЯ:', repr(e))
-        print(traceback.format_exc())
-        # Удаляем временный файл в случае ошибки
-        if 'file_path' in locals() and os.path.exists(file_path):
-            os.remove(file_path)
+        logger.exception("Ошибка при сохранении расписания")
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Ошибка обработки файла: {str(e)}"
         )
+    finally:
+        # Удаляем временный файл
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+@router.post(
+    "/import-jobs",
+    response_model=ScheduleImportJobInDB,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def create_schedule_import_job(
+    *,
+    db: AsyncSession = Depends(get_async_session),
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    current_user: User = Depends(get_current_admin_or_superuser)
+):
+    """
+    Загрузить Excel файл для фоновой обработки.
+    Сразу возвращает задачу; статус доступен по GET /import-jobs/{job_id}
+    """
+    _check_excel_filename(file)
+    file_path = await save_temp_upload(file)
+
+    job = await schedule_crud.create_import_job(
+        db, filename=file.filename, created_by=current_user.username
+    )
+    background_tasks.add_task(run_import_job, job.id, file_path)
+    return job
+
+
+@router.get("/import-jobs/{job_id}", response_model=ScheduleImportJobInDB)
+async def get_schedule_import_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_session),
+    current_user: User = Depends(get_current_admin_or_superuser)
+):
+    """Получить статус и результаты задачи импорта"""
+    job = await schedule_crud.get_import_job(db, job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Задача импорта не найдена"
+        )
+    return job
 
 
 @router.get("/templates", response_model=List[ScheduleTemplateInDB])
 async def get_schedule_templates(
+    request: Request,
     skip: int = 0, 
     limit: int = 100, 
     db: AsyncSession = Depends(get_async_session)
@@ -113,163 +128,92 @@ async def get_schedule_templates(
     templates = await schedule_crud.get_active_schedule_templates(
         db, skip=skip, limit=limit
     )
-    
-    # Генерируем HTML для каждого шаблона
+
+    # HTML рендерится при загрузке; шаблоны без него дорендериваем один раз
     for template in templates:
-        schedule_data = template.schedule_data
-        schedule = schedule_data.get("schedule", [])
-        
-        table_html = '''
-        <style>
-        .schedule-table { max-width: 90%; margin: 20px auto; border-collapse: collapse; }
-        .schedule-table th, .schedule-table td { min-height: 80px; height: 80px; padding: 8px; border: 1px solid #ddd; }
-        .group-badge { display: inline-block; background:#b6e388; color:#222; font-weight:600; font-size:18px; border-radius:16px; padding:2px 8px; margin:4px 0; text-align:center; }
-        .discipline-text { font-size:16px; color:#222; font-weight:500; margin:4px 0; }
-        .room-square { display:inline-block; background:#222; color:#fff; font-weight:700; font-size:18px; border-radius:12px; padding:6px 16px; margin:4px 0; }
-        .auditory-text { font-size:16px; color:#222; font-weight:500; margin:4px 0; }
-        .dates-text { font-size:16px; color:#e74c3c; font-weight:500; margin:4px 0; }
-        </style>
-        <table class="schedule-table">
-            <tr>
-                <th>Название</th>
-                <th>1 смена <span style="font-size:14px;font-weight:400;">08:15 – 09:50 • 10:30 – 12:05 • 12:15 – 13:50</span></th>
-                <th>2 смена <span style="font-size:14px;font-weight:400;">14:15 – 15:50 • 16:30 – 18:05 • 18:15 – 19:50</span></th>
-            </tr>
-        '''
-        
-        # Обрабатываем schedule как список записей
-        for entry in schedule:
-            if isinstance(entry, dict):
-                table_html += '<tr>'
-                # Первая колонка: группа (зелёный фон), под ней дисциплина (без фона)
-                table_html += f'<td>'
-                if entry.get("group"):
-                    table_html += f'<div class="group-badge">{entry["group"]}</div>'
-                if entry.get("discipline"):
-                    table_html += f'<div class="discipline-text">{entry["discipline"]}</div>'
-                table_html += '</td>'
-                
-                # 1 смена
-                table_html += '<td>'
-                if str(entry.get("shift")) == "1":
-                    if entry.get("room"):
-                        table_html += f'<div class="room-square">{entry["room"]} каб.</div>'
-                    if entry.get("auditory"):
-                        table_html += f'<div class="auditory-text">{entry["auditory"]}</div>'
-                    if entry.get("dates"):
-                        table_html += f'<div class="dates-text">{entry["dates"]}</div>'
-                table_html += '</td>'
-                
-                # 2 смена
-                table_html += '<td>'
-                if str(entry.get("shift")) == "2":
-                    if entry.get("room"):
-                        table_html += f'<div class="room-square">{entry["room"]} каб.</div>'
-                    if entry.get("auditory"):
-                        table_html += f'<div class="auditory-text">{entry["auditory"]}</div>'
-                    if entry.get("dates"):
-                        table_html += f'<div class="dates-text">{entry["dates"]}</div>'
-                table_html += '</td>'
-                
-                table_html += '</tr>'
-        
-        table_html += '</table>'
-        
-        # Добавляем HTML в объект шаблона
-        template.html_content = table_html
-    
-    return templates
+        if template.html_content is None:
+            await _store_template_html(db, template)
+
+    return cached_response(
+        request,
+        templates,
+        schema=List[ScheduleTemplateInDB],
+        etag=make_etag([(template.id, template.content_hash) for template in templates]),
+        cache_control=public_cache(settings.SCHEDULE_CACHE_MAX_AGE),
+    )
 
 
 @router.get("/templates/{college_id}")
 async def get_schedule_template_by_college(
-    college_id: int, db: AsyncSession = Depends(get_async_session)
+    college_id: int, request: Request, db: AsyncSession = Depends(get_async_session)
 ):
     """Получить готовый HTML шаблон расписания по college_id (открытый эндпоинт)"""
-    template = await schedule_crud.get_schedule_template_by_college_id(
+    row = await schedule_crud.get_schedule_template_html_by_college_id(
         db, college_id=college_id
     )
-    if not template or not template.is_active:
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Расписание для данного колледжа не найдено"
         )
-    
-    schedule_data = template.schedule_data
-    schedule = schedule_data.get("schedule", [])
-    
-    # Отладочная информация
-    logger.info(f"=== SCHEDULE DEBUG FOR {college_id} ===")
-    logger.info(f"Schedule data type: {type(schedule_data)}")
-    logger.info(f"Schedule type: {type(schedule)}")
-    logger.info(f"Schedule length: {len(schedule) if isinstance(schedule, list) else 'Not a list'}")
-    if isinstance(schedule, list) and schedule:
-        first_entry = schedule[0]
-        logger.info(f"First entry: {first_entry}")
-        logger.info(f"First entry type: {type(first_entry)}")
-        logger.info(f"First entry keys: {list(first_entry.keys()) if isinstance(first_entry, dict) else 'Not a dict'}")
-        
-        # Подробный анализ первой записи
-        if isinstance(first_entry, dict):
-            for key, value in first_entry.items():
-                logger.info(f"  {key}: {value} (type: {type(value)})")
 
-    table_html = '''
-    <style>
-    .schedule-table { max-width: 90%; margin: 20px auto; border-collapse: collapse; }
-    .schedule-table th, .schedule-table td { min-height: 80px; height: 80px; padding: 8px; border: 1px solid #ddd; }
-    .group-badge { display: inline-block; background:#b6e388; color:#222; font-weight:600; font-size:18px; border-radius:16px; padding:2px 8px; margin:4px 0; text-align:center; }
-    .discipline-text { font-size:16px; color:#222; font-weight:500; margin:4px 0; }
-    .room-square { display:inline-block; background:#222; color:#fff; font-weight:700; font-size:18px; border-radius:12px; padding:6px 16px; margin:4px 0; }
-    .auditory-text { font-size:16px; color:#222; font-weight:500; margin:4px 0; }
-    .dates-text { font-size:16px; color:#e74c3c; font-weight:500; margin:4px 0; }
-    </style>
-    <table class="schedule-table">
-        <tr>
-            <th>Название</th>
-            <th>1 смена <span style="font-size:14px;font-weight:400;">08:15 – 09:50 • 10:30 – 12:05 • 12:15 – 13:50</span></th>
-            <th>2 смена <span style="font-size:14px;font-weight:400;">14:15 – 15:50 • 16:30 – 18:05 • 18:15 – 19:50</span></th>
-        </tr>
-'''
-    
-    # Обрабатываем schedule как список записей
-    for entry in schedule:
-        if isinstance(entry, dict):
-            table_html += '<tr>'
-            # Первая колонка: группа (зелёный фон), под ней дисциплина (без фона)
-            table_html += f'<td>'
-            if entry.get("group"):
-                table_html += f'<div class="group-badge">{entry["group"]}</div>'
-            if entry.get("discipline"):
-                table_html += f'<div class="discipline-text">{entry["discipline"]}</div>'
-            table_html += '</td>'
-            
-            # 1 смена
-            table_html += '<td>'
-            if str(entry.get("shift")) == "1":
-                if entry.get("room"):
-                    table_html += f'<div class="room-square">{entry["room"]} каб.</div>'
-                if entry.get("auditory"):
-                    table_html += f'<div class="auditory-text">{entry["auditory"]}</div>'
-                if entry.get("dates"):
-                    table_html += f'<div class="dates-text">{entry["dates"]}</div>'
-            table_html += '</td>'
-            
-            # 2 смена
-            table_html += '<td>'
-            if str(entry.get("shift")) == "2":
-                if entry.get("room"):
-                    table_html += f'<div class="room-square">{entry["room"]} каб.</div>'
-                if entry.get("auditory"):
-                    table_html += f'<div class="auditory-text">{entry["auditory"]}</div>'
-                if entry.get("dates"):
-                    table_html += f'<div class="dates-text">{entry["dates"]}</div>'
-            table_html += '</td>'
-            
-            table_html += '</tr>'
-    
-    table_html += '</table>'
-    return HTMLResponse(content=table_html)
+    template_id, html_content, content_hash = row
+    if html_content is None:
+        template = await schedule_crud.get_schedule_template(db, template_id)
+        html_content = await _store_template_html(db, template)
+        content_hash = template.content_hash
+
+    return cached_response(
+        request,
+        html_content,
+        etag=make_etag([template_id, content_hash]),
+        cache_control=public_cache(settings.SCHEDULE_CACHE_MAX_AGE),
+        media_type="text/html",
+    )
+
+
+@router.get("/entries", response_model=List[ScheduleEntryInDB])
+async def get_schedule_entries(
+    request: Request,
+    college_id: int | None = None,
+    group: str | None = None,
+    room: str | None = None,
+    shift: str | None = None,
+    skip: int = 0,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_session)
+):
+    """
+    Поиск записей расписания по группе, кабинету и смене (открытый эндпоинт).
+    Значения фильтров сравниваются точно, как в Excel файле
+    """
+    entries = await schedule_crud.get_schedule_entries(
+        db,
+        college_id=college_id,
+        group=group,
+        room=room,
+        shift=shift,
+        skip=skip,
+        limit=min(limit, 1000),
+    )
+    return cached_response(
+        request,
+        entries,
+        schema=List[ScheduleEntryInDB],
+        cache_control=public_cache(settings.SCHEDULE_CACHE_MAX_AGE),
+    )
+
+
+async def _store_template_html(db: AsyncSession, template) -> str:
+    """Отрендерить и сохранить HTML шаблона, созданного без него"""
+    html_content = render_schedule_html(template.schedule_data)
+    await schedule_crud.set_schedule_template_html(
+        db,
+        template,
+        html_content=html_content,
+        content_hash=schedule_content_hash(template.schedule_data),
+    )
+    return html_content
 
 
 @router.delete("/templates/{template_id}")
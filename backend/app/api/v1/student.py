@@ -1,11 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
-from fastapi.responses import FileResponse
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    status,
+    UploadFile,
+    File,
+    Form,
+    Query,
+    Request,
+    Response,
+)
+from starlette.status import HTTP_403_FORBIDDEN
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional, Union
 from datetime import date
 import os
 
 from app.api.deps import get_current_vacancy_user
+from app.api.permissions import ensure_can_manage_students, get_student_for_user
 from app.crud import student as student_crud, vacancy as vacancy_crud
 from app.db.session import get_async_session
 from app.models.user import User
@@ -17,6 +29,7 @@ from app.schemas.student import (
     StudentBulkStatusUpdate,
 )
 from app.utils.files import save_upload_file
+from app.utils.media import media_file_response
 from app.core.config import settings
 
 router = APIRouter()
@@ -73,11 +86,9 @@ async def apply_for_vacancy(
             detail="Вакансия недоступна для подачи заявок.",
         )
 
-    # Проверяем количество уже поданных заявок
-    current_applications = await student_crud.get_students_count_by_vacancy(
-        db, student_in.vacancy_id
-    )
-    if current_applications >= vacancy.required_amount:
+    # Быстрая проверка по счетчику до сохранения файла; окончательная —
+    # в create_student под блокировкой вакансии
+    if vacancy.applications_total >= vacancy.required_amount:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Достигнуто максимальное количество заявок на эту вакансию.",
@@ -96,60 +107,68 @@ async def apply_for_vacancy(
         resume_file_path = await save_upload_file(resume_file, "resumes")
 
     # Создаем студента с путем к файлу
-    return await student_crud.create_student(
-        db=db, student_in=student_in, resume_file_path=resume_file_path
-    )
+    try:
+        return await student_crud.create_student(
+            db=db, student_in=student_in, resume_file_path=resume_file_path
+        )
+    except ValueError as e:
+        # Файл не удаляем: то же резюме может быть приложено к другой заявке.
+        # Файл без ссылок удалит очистка хранилища (см. app.utils.media_sweeper)
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
 @router.get("/", response_model=list[StudentResponse])
 async def read_students(
+    response: Response,
     skip: int = 0,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[int] = Query(
+        None, description="id последней заявки предыдущей страницы (из X-Next-Cursor)"
+    ),
     vacancy_id: Optional[int] = None,
     status: Optional[ApplicationStatus] = None,
     db: AsyncSession = Depends(get_async_session),
     current_user: User = Depends(get_current_vacancy_user),
 ):
-    """Получить список студентов (только для рекрутеров и супер-администраторов)"""
+    """Получить список студентов (только для рекрутеров и супер-администраторов)
+
+    Заявки отсортированы по id. Для постраничного обхода передайте в cursor
+    значение заголовка X-Next-Cursor предыдущего ответа; skip оставлен
+    для совместимости.
+    """
     # Супер-администратор может видеть все заявки
     if current_user.is_superuser:
-        return await student_crud.get_students(
-            db=db, skip=skip, limit=limit, vacancy_id=vacancy_id, status=status
-        )
-    
+        recruiter_id = None
     # Рекрутер может видеть только заявки на свои вакансии
-    if current_user.is_recruiter:
+    elif current_user.is_recruiter:
         if vacancy_id:
             # Проверяем что вакансия принадлежит рекрутеру
             vacancy = await vacancy_crud.get_vacancy(db, vacancy_id)
             if not vacancy or vacancy.recruiter_id != current_user.id:
                 raise HTTPException(
-                    status_code=status.HTTP_403_FORBIDDEN,
+                    status_code=HTTP_403_FORBIDDEN,
                     detail="У вас нет прав на просмотр заявок на эту вакансию.",
                 )
-        else:
-            # Получаем все вакансии рекрутера
-            vacancies = await vacancy_crud.get_vacancies(
-                db, recruiter_id=current_user.id
-            )
-            vacancy_ids = [v.id for v in vacancies]
-            if not vacancy_ids:
-                return []
-
-            # Получаем заявки только на вакансии рекрутера
-            students = []
-            for vid in vacancy_ids:
-                vacancy_students = await student_crud.get_students_by_vacancy(
-                    db, vid, skip, limit
-                )
-                students.extend(vacancy_students)
-            return students[:limit]
-    
-    # Обычный администратор не имеет доступа к заявкам
-    raise HTTPException(
-        status_code=status.HTTP_403_FORBIDDEN,
-        detail="У вас нет прав на просмотр заявок.",
+        recruiter_id = current_user.id
+    else:
+        # Обычный администратор не имеет доступа к заявкам
+        raise HTTPException(
+            status_code=HTTP_403_FORBIDDEN,
+            detail="У вас нет прав на просмотр заявок.",
+        )
+
+    students = await student_crud.get_students(
+        db=db,
+        skip=skip,
+        limit=limit,
+        vacancy_id=vacancy_id,
+        status=status,
+        recruiter_id=recruiter_id,
+        after_id=cursor,
     )
+    if len(students) == limit:
+        response.headers["X-Next-Cursor"] = str(students[-1].id)
+    return students
 
 
 @router.get("/{student_id}", response_model=StudentResponse)
@@ -160,80 +179,43 @@ async def read_student(
     current_user: User = Depends(get_current_vacancy_user),
 ):
     """Получить детали студента (только для рекрутеров и супер-администраторов)"""
-    student = await student_crud.get_student(db, student_id)
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Заявка не найдена."
-        )
-
-    # Супер-администратор может видеть любую заявку
-    if current_user.is_superuser:
-        return student
-
     # Рекрутер может видеть только заявки на свои вакансии
-    if current_user.is_recruiter:
-        vacancy = await vacancy_crud.get_vacancy(db, student.vacancy_id)
-        if not vacancy or vacancy.recruiter_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="У вас нет прав на просмотр этой заявки.",
-            )
-        return student
-
-    # Обычный администратор не имеет доступа к заявкам
-    raise HTTPException(
-        status_code=status.HTTP_403_FORBIDDEN,
-        detail="У вас нет прав на просмотр заявок.",
+    return await get_student_for_user(
+        db,
+        student_id,
+        current_user,
+        forbidden_detail="У вас нет прав на просмотр этой заявки.",
+        role_forbidden_detail="У вас нет прав на просмотр заявок.",
     )
 
 
 @router.get("/{student_id}/resume-file")
 async def resume_file(
     *,
+    request: Request,
     db: AsyncSession = Depends(get_async_session),
     student_id: int,
     current_user: User = Depends(get_current_vacancy_user),
 ):
     """Отправка файла резюме студента (только для рекрутеров и супер-администраторов)"""
-    student = await student_crud.get_student(db, student_id)
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Заявка не найдена."
-        )
-
-    # Супер-администратор может скачать любое резюме
-    if current_user.is_superuser:
-        pass
     # Рекрутер может скачать только резюме с заявок на свои вакансии
-    elif current_user.is_recruiter:
-        vacancy = await vacancy_crud.get_vacancy(db, student.vacancy_id)
-        if not vacancy or vacancy.recruiter_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="У вас нет прав на скачивание этого резюме.",
-            )
-    else:
-        # Обычный администратор не имеет доступа к заявкам
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="У вас нет прав на скачивание резюме.",
-        )
+    student = await get_student_for_user(
+        db,
+        student_id,
+        current_user,
+        forbidden_detail="У вас нет прав на скачивание этого резюме.",
+        role_forbidden_detail="У вас нет прав на скачивание резюме.",
+    )
 
     if not student.resume_file:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Файл резюме не найден."
         )
 
-    # Получаем путь к файлу из URL
-    file_path = os.path.join(settings.MEDIA_ROOT, student.resume_file.lstrip("/media/"))
-
-    if not os.path.exists(file_path):
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Файл резюме не найден."
-        )
-
     # Используем сохраненное расширение файла или получаем из пути
-    file_extension = student.resume_file_extension or os.path.splitext(file_path)[1]
+    file_extension = (
+        student.resume_file_extension or os.path.splitext(student.resume_file)[1]
+    )
     if not file_extension:
         file_extension = ".pdf"  # fallback
     
@@ -258,10 +240,16 @@ async def resume_file(
     
     media_type = mime_types.get(file_extension.lower(), "application/octet-stream")
 
-    return FileResponse(
-        file_path,
+    # Резюме доступно только после проверки прав: кэш браузера переспрашивает сервер.
+    # Из S3 файл скачивается по временной подписанной ссылке в обход приложения
+    return await media_file_response(
+        request,
+        student.resume_file,
+        not_found_detail="Файл резюме не найден.",
+        cache_control="private, no-cache",
         media_type=media_type,
         filename=f"resume_{student.full_name.replace(' ', '_')}{file_extension}",
+        presigned=True,
     )
 
 
@@ -274,29 +262,14 @@ async def update_student(
     current_user: User = Depends(get_current_vacancy_user),
 ):
     """Обновить данные студента (только для рекрутеров и супер-администраторов)"""
-    student = await student_crud.get_student(db, student_id)
-    if not student:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="Заявка не найдена."
-        )
-
-    # Супер-администратор может редактировать любую заявку
-    if current_user.is_superuser:
-        pass
     # Рекрутер может редактировать только заявки на свои вакансии
-    elif current_user.is_recruiter:
-        vacancy = await vacancy_crud.get_vacancy(db, student.vacancy_id)
-        if not vacancy or vacancy.recruiter_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="У вас нет прав на редактирование этой заявки.",
-            )
-    else:
-        # Обычный администратор не имеет доступа к заявкам
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="У вас нет прав на редактирование заявок.",
-        )
+    await get_student_for_user(
+        db,
+        student_id,
+        current_user,
+        forbidden_detail="У вас нет прав на редактирование этой заявки.",
+        role_forbidden_detail="У вас нет прав на редактирование заявок.",
+    )
 
     updated_student = await student_crud.update_student(
         db=db,
@@ -315,26 +288,14 @@ async def bulk_update_student_status(
     current_user: User = Depends(get_current_vacancy_user),
 ):
     """Массовое обновление статусов студентов (только для рекрутеров и супер-администраторов)"""
-    # Супер-администратор может обновлять любые заявки
-    if current_user.is_superuser:
-        pass
-    # Рекрутер может обновлять только заявки на свои вакансии
-    elif current_user.is_recruiter:
-        for student_id in bulk_update.student_ids:
-            student = await student_crud.get_student(db, student_id)
-            if student:
-                vacancy = await vacancy_crud.get_vacancy(db, student.vacancy_id)
-                if not vacancy or vacancy.recruiter_id != current_user.id:
-                    raise HTTPException(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail=f"У вас нет прав на обновление заявки {student_id}.",
-                    )
-    else:
-        # Обычный администратор не имеет доступа к заявкам
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="У вас нет прав на массовое обновление статусов.",
-        )
+    # Рекрутер может обновлять только заявки на свои вакансии;
+    # принадлежность всех заявок проверяется одним запросом
+    await ensure_can_manage_students(
+        db,
+        bulk_update.student_ids,
+        current_user,
+        role_forbidden_detail="У вас нет прав на массовое обновление статусов.",
+    )
 
     updated_count = await student_crud.bulk_update_status(
         db=db, student_ids=bulk_update.student_ids, status=bulk_update.status
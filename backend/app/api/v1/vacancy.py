@@ -1,12 +1,14 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 
 from app.api.deps import get_current_recruiter, get_current_superuser, get_current_vacancy_user, get_current_user_optional
-from app.crud import vacancy as vacancy_crud, student as student_crud
+from app.crud import vacancy as vacancy_crud
 from app.db.session import get_async_session
 from app.models.user import User
+from app.models.vacancy import Vacancy
 from app.schemas.vacancy import VacancyCreate, VacancyUpdate, VacancyResponse
+from app.utils.http_cache import cached_response
 
 # Публичный роутер для открытых эндпоинтов
 public_router = APIRouter()
@@ -19,17 +21,20 @@ admin_router = APIRouter()
 
 @public_router.get("/", response_model=list[VacancyResponse])
 async def read_public_vacancies(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     db: AsyncSession = Depends(get_async_session),
 ):
     """Получить список публичных вакансий (открытый эндпоинт)"""
-    return await vacancy_crud.get_vacancies(db, skip=skip, limit=limit, include_hidden=False)
+    vacancies = await vacancy_crud.get_vacancies(db, skip=skip, limit=limit, include_hidden=False)
+    return cached_response(request, vacancies, schema=list[VacancyResponse])
 
 
 @public_router.get("/{vacancy_id}", response_model=VacancyResponse)
 async def read_public_vacancy(
     *,
+    request: Request,
     db: AsyncSession = Depends(get_async_session),
     vacancy_id: int,
 ):
@@ -41,11 +46,56 @@ async def read_public_vacancy(
     if vacancy.is_hidden:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Вакансия не найдена.")
     
-    return vacancy
+    return cached_response(request, vacancy, schema=VacancyResponse)
 
 
 # === АДМИНИСТРАТИВНЫЕ ЭНДПОИНТЫ ===
 
+def _check_statistics_access(user: User, vacancies: list[Vacancy]) -> None:
+    """Права на просмотр статистики вакансий"""
+    # Супер-администратор может видеть статистику любой вакансии
+    if user.is_superuser:
+        return
+    # Рекрутер может видеть статистику только своих вакансий
+    if user.is_recruiter:
+        for vacancy in vacancies:
+            if vacancy.recruiter_id != user.id:
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="У вас нет прав на просмотр статистики этой вакансии.",
+                )
+        return
+    # Обычный администратор не имеет доступа к вакансиям
+    raise HTTPException(
+        status_code=status.HTTP_403_FORBIDDEN,
+        detail="У вас нет прав на просмотр статистики вакансий.",
+    )
+
+
+def _vacancy_statistics(vacancy: Vacancy) -> dict:
+    """Статистика вакансии по счетчикам заявок"""
+    total_applications = vacancy.applications_total
+
+    # Рассчитываем конверсию (приглашенные / общее количество)
+    conversion_rate = (
+        (vacancy.applications_invited / total_applications * 100)
+        if total_applications > 0
+        else 0
+    )
+
+    return {
+        "vacancy_id": vacancy.id,
+        "total_applications": total_applications,
+        "new_applications": vacancy.applications_new,
+        "in_review_applications": vacancy.applications_in_review,
+        "invited_applications": vacancy.applications_invited,
+        "rejected_applications": vacancy.applications_rejected,
+        "conversion_rate": round(conversion_rate, 2),
+        "required_amount": vacancy.required_amount,
+        "is_full": total_applications >= vacancy.required_amount,
+    }
+
+
 @admin_router.get("/", response_model=list[VacancyResponse])
 async def read_all_vacancies(
     skip: int = 0,
@@ -72,6 +122,20 @@ async def read_all_vacancies(
     return await vacancy_crud.get_vacancies(db, skip=skip, limit=limit, include_hidden=False)
 
 
+@admin_router.get("/statistics")
+async def get_vacancies_statistics(
+    *,
+    db: AsyncSession = Depends(get_async_session),
+    vacancy_ids: list[int] = Query(..., max_length=500, description="ID вакансий"),
+    current_user: User = Depends(get_current_vacancy_user),
+):
+    """Получить статистику нескольких вакансий (несуществующие ID пропускаются)"""
+    vacancies = await vacancy_crud.get_vacancies_by_ids(db, vacancy_ids)
+    _check_statistics_access(current_user, vacancies)
+
+    return [_vacancy_statistics(vacancy) for vacancy in vacancies]
+
+
 @admin_router.get("/{vacancy_id}", response_model=VacancyResponse)
 async def read_vacancy_admin(
     *,
@@ -115,60 +179,9 @@ async def get_vacancy_statistics(
             status_code=status.HTTP_404_NOT_FOUND, detail="Вакансия не найдена."
         )
 
-    # Супер-администратор может видеть статистику любой вакансии
-    if current_user.is_superuser:
-        pass
-    # Рекрутер может видеть статистику только своих вакансий
-    elif current_user.is_recruiter:
-        if vacancy.recruiter_id != current_user.id:
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="У вас нет прав на просмотр статистики этой вакансии.",
-            )
-    else:
-        # Обычный администратор не имеет доступа к вакансиям
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="У вас нет прав на просмотр статистики вакансий.",
-        )
-
-    # Получаем количество заявок
-    total_applications = await student_crud.get_students_count_by_vacancy(
-        db, vacancy_id
-    )
+    _check_statistics_access(current_user, [vacancy])
 
-    # Получаем заявки по статусам
-    new_applications = await student_crud.get_students(
-        db, vacancy_id=vacancy_id, status="new"
-    )
-    in_review_applications = await student_crud.get_students(
-        db, vacancy_id=vacancy_id, status="in_review"
-    )
-    invited_applications = await student_crud.get_students(
-        db, vacancy_id=vacancy_id, status="invited"
-    )
-    rejected_applications = await student_crud.get_students(
-        db, vacancy_id=vacancy_id, status="rejected"
-    )
-
-    # Рассчитываем конверсию (приглашенные / общее количество)
-    conversion_rate = (
-        (len(invited_applications) / total_applications * 100)
-        if total_applications > 0
-        else 0
-    )
-
-    return {
-        "vacancy_id": vacancy_id,
-        "total_applications": total_applications,
-        "new_applications": len(new_applications),
-        "in_review_applications": len(in_review_applications),
-        "invited_applications": len(invited_applications),
-        "rejected_applications": len(rejected_applications),
-        "conversion_rate": round(conversion_rate, 2),
-        "required_amount": vacancy.required_amount,
-        "is_full": total_applications >= vacancy.required_amount,
-    }
+    return _vacancy_statistics(vacancy)
 
 
 @admin_router.post("/", response_model=VacancyResponse)
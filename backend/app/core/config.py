@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Literal
 from pydantic import PostgresDsn, EmailStr, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from pathlib import Path
@@ -23,6 +23,14 @@ class Settings(BaseSettings):
     POSTGRES_DB: str
     SQLALCHEMY_DATABASE_URI: PostgresDsn | None = None
     DB_ECHO: bool
+    DB_AUTO_MIGRATE: bool = True  # применять миграции при запуске приложения
+
+    # Настройки пула соединений
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20  # дополнительные соединения сверх DB_POOL_SIZE
+    DB_POOL_TIMEOUT: float = 30  # ожидание свободного соединения, секунды
+    DB_POOL_RECYCLE: int = 1800  # пересоздавать соединения старше N секунд (-1 — никогда)
+    DB_POOL_PRE_PING: bool = True  # проверять соединение перед выдачей из пула
 
     @field_validator("SQLALCHEMY_DATABASE_URI", mode="before")
     def assemble_db_connection(cls, v: str | None, info: Any) -> Any:
@@ -44,6 +52,18 @@ class Settings(BaseSettings):
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
     REFRESH_TOKEN_EXPIRE_DAYS: int
+    TOKEN_CACHE_MAXSIZE: int = 4096  # проверенных JWT в кэше, 0 — кэш выключен
+    TOKEN_REVOCATION_SYNC_INTERVAL: int = 30  # секунды между загрузками отзывов из БД
+    TOKEN_REVOCATION_PURGE_INTERVAL: int = 60 * 60  # секунды между очистками истекших отзывов
+
+    # Настройки хэширования паролей
+    BCRYPT_ROUNDS: int = 12  # при изменении хэши пересчитываются при входе
+    PASSWORD_HASH_WORKERS: int = 2  # одновременных вычислений bcrypt
+
+    # Кэш пользователей для авторизованных запросов
+    PRINCIPAL_CACHE_TTL: float = 60  # секунды, 0 — кэш выключен
+    PRINCIPAL_CACHE_MAXSIZE: int = 1024
+    PRINCIPAL_CACHE_REDIS_URL: str | None = None  # общий кэш для нескольких воркеров
 
     # Настройки почты
     MAIL_USERNAME: str
@@ -56,8 +76,28 @@ class Settings(BaseSettings):
     MAIL_USE_CREDENTIALS: bool
     MAIL_VALIDATE_CERTS: bool
 
+    # Очередь писем (таблица email_outbox и фоновая отправка)
+    EMAIL_BATCH_SIZE: int = 50  # писем за одну выборку из очереди
+    EMAIL_OUTBOX_POLL_INTERVAL: float = 5  # секунды, опрос очереди (письма других реплик)
+    EMAIL_SEND_LEASE: int = 300  # секунды, взятые письма не выдаются другим воркерам
+    EMAIL_MAX_ATTEMPTS: int = 8
+    EMAIL_RETRY_BASE_DELAY: int = 30  # секунды, задержка удваивается с каждой попыткой
+    EMAIL_RETRY_MAX_DELAY: int = 3600  # секунды
+    EMAIL_SMTP_TIMEOUT: float = 30  # секунды
+    EMAIL_SMTP_IDLE_TIMEOUT: float = 60  # секунды простоя до закрытия SMTP соединения
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 7  # отправленные письма хранятся для диагностики
+    EMAIL_OUTBOX_PURGE_INTERVAL: int = 3600  # секунды
+
     # Настройки медиафайлов
-    MEDIA_ROOT: Path = Path("media")
+    MEDIA_ROOT: Path = Path("media")  # при MEDIA_STORAGE=s3 — только временные файлы
+    MEDIA_STORAGE: Literal["local", "s3"] = "local"
+    MEDIA_S3_BUCKET: str | None = None
+    MEDIA_S3_ENDPOINT_URL: str | None = None  # MinIO и другие S3-совместимые хранилища
+    MEDIA_S3_REGION: str | None = None
+    MEDIA_S3_ACCESS_KEY_ID: str | None = None
+    MEDIA_S3_SECRET_ACCESS_KEY: str | None = None
+    MEDIA_S3_ADDRESSING_STYLE: Literal["auto", "path", "virtual"] = "auto"
+    MEDIA_PRESIGNED_URL_EXPIRE: int = 300  # секунды, временные ссылки на резюме
     MAX_IMAGE_SIZE: int = 5 * 1024 * 1024  # 5MB
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB для файлов резюме
     ALLOWED_IMAGE_TYPES: set[str] = {
@@ -92,6 +132,29 @@ class Settings(BaseSettings):
         "application/rtf",  # .rtf (альтернативный MIME тип)
         "application/x-rtf",  # .rtf (еще один альтернативный MIME тип)
     }
+    UPLOAD_CHUNK_SIZE: int = 256 * 1024  # загрузки читаются и пишутся частями
+    FILE_IO_WORKERS: int = 8  # потоков для записи файлов на диск
+    MEDIA_IMMUTABLE_MAX_AGE: int = 365 * 24 * 3600  # секунды, для файлов с UUID/sha256 именами
+    MEDIA_PATH_CACHE_TTL: int = 60  # секунды, кэш id -> путь изображения
+    MEDIA_PATH_CACHE_MAXSIZE: int = 4096
+    MEDIA_BLOB_GRACE_PERIOD: int = 3600  # секунды, файл без ссылок хранится не меньше
+    MEDIA_SWEEP_INTERVAL: int = 3600  # секунды, интервал очистки хранилища
+
+    # Настройки обработки изображений (варианты размеров и WebP)
+    IMAGE_PROCESS_EXECUTOR: Literal["process", "thread"] = "process"
+    IMAGE_PROCESS_WORKERS: int = 2
+    IMAGE_PROCESS_TIMEOUT: float = 60  # секунды
+    IMAGE_THUMB_SIZE: int = 320  # максимальная сторона миниатюры, px
+    IMAGE_MEDIUM_SIZE: int = 1024  # максимальная сторона среднего размера, px
+
+    # Настройки обработки Excel расписаний
+    SCHEDULE_PARSE_EXECUTOR: Literal["process", "thread"] = "process"
+    SCHEDULE_PARSE_WORKERS: int = 4  # листы одного файла разбираются параллельно
+    SCHEDULE_PARSE_TIMEOUT: float = 120  # секунды
+
+    # Настройки HTTP кэширования публичных эндпоинтов
+    PUBLIC_CACHE_MAX_AGE: int = 60  # секунды
+    SCHEDULE_CACHE_MAX_AGE: int = 300  # секунды
 
     # CORS
     CORS_ORIGINS: list[str]
@@ -0,0 +1,157 @@
+"""
+Кэш принципалов (пользователей) для get_current_user.
+
+Хранит снимок полей пользователя по username (subject токена) с TTL,
+чтобы не выполнять SELECT на каждый авторизованный запрос.
+По умолчанию кэш локальный для процесса; если задан PRINCIPAL_CACHE_REDIS_URL
+и установлен пакет redis, используется общий кэш в Redis, и инвалидация
+видна всем воркерам.
+"""
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any
+
+from app.core.config import settings
+from app.models.user import User
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Поля снимка; hashed_password намеренно не кэшируется
+PRINCIPAL_FIELDS = (
+    "id",
+    "email",
+    "username",
+    "is_superuser",
+    "is_registered",
+    "is_recruiter",
+    "created_at",
+    "updated_at",
+)
+DATETIME_FIELDS = ("created_at", "updated_at")
+
+
+def user_snapshot(user: User) -> dict[str, Any]:
+    """Снимок полей пользователя, пригодный для JSON"""
+    snapshot = {field: getattr(user, field) for field in PRINCIPAL_FIELDS}
+    for field in DATETIME_FIELDS:
+        if snapshot[field] is not None:
+            snapshot[field] = snapshot[field].isoformat()
+    return snapshot
+
+
+def user_from_snapshot(snapshot: dict[str, Any]) -> User:
+    """Восстановить пользователя из снимка (объект не привязан к сессии)"""
+    values = dict(snapshot)
+    for field in DATETIME_FIELDS:
+        if values.get(field) is not None:
+            values[field] = datetime.fromisoformat(values[field])
+    return User(**values)
+
+
+class MemoryPrincipalCache:
+    """Ограниченный LRU кэш с TTL в памяти процесса"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+
+    async def get(self, username: str) -> dict[str, Any] | None:
+        item = self._items.get(username)
+        if item is None:
+            return None
+        expires_at, snapshot = item
+        if expires_at < time.monotonic():
+            self._items.pop(username, None)
+            return None
+        self._items.move_to_end(username)
+        return snapshot
+
+    async def set(self, username: str, snapshot: dict[str, Any]) -> None:
+        self._items[username] = (time.monotonic() + self.ttl, snapshot)
+        self._items.move_to_end(username)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    async def delete(self, username: str) -> None:
+        self._items.pop(username, None)
+
+
+class RedisPrincipalCache:
+    """Общий для воркеров кэш в Redis (TTL средствами Redis)"""
+
+    prefix = "principal:"
+
+    def __init__(self, client: Any, ttl: float):
+        self.client = client
+        self.ttl = ttl
+
+    async def get(self, username: str) -> dict[str, Any] | None:
+        value = await self.client.get(self.prefix + username)
+        return json.loads(value) if value else None
+
+    async def set(self, username: str, snapshot: dict[str, Any]) -> None:
+        await self.client.set(
+            self.prefix + username, json.dumps(snapshot), ex=max(int(self.ttl), 1)
+        )
+
+    async def delete(self, username: str) -> None:
+        await self.client.delete(self.prefix + username)
+
+
+def _create_backend() -> MemoryPrincipalCache | RedisPrincipalCache:
+    if settings.PRINCIPAL_CACHE_REDIS_URL:
+        try:
+            from redis import asyncio as redis_asyncio
+        except ImportError:
+            logger.warning(
+                "PRINCIPAL_CACHE_REDIS_URL задан, но пакет redis не установлен "
+                "(poetry install -E redis); "
+                "используется локальный кэш принципалов"
+            )
+        else:
+            client = redis_asyncio.from_url(settings.PRINCIPAL_CACHE_REDIS_URL)
+            return RedisPrincipalCache(client, ttl=settings.PRINCIPAL_CACHE_TTL)
+    return MemoryPrincipalCache(
+        maxsize=settings.PRINCIPAL_CACHE_MAXSIZE, ttl=settings.PRINCIPAL_CACHE_TTL
+    )
+
+
+_backend = _create_backend()
+
+
+async def get_cached_principal(username: str) -> User | None:
+    """Пользователь из кэша или None. Ошибки кэша не прерывают запрос"""
+    if settings.PRINCIPAL_CACHE_TTL <= 0:
+        return None
+    try:
+        snapshot = await _backend.get(username)
+    except Exception as e:
+        logger.warning(f"Ошибка чтения кэша принципалов: {str(e)}")
+        return None
+    return user_from_snapshot(snapshot) if snapshot else None
+
+
+async def cache_principal(user: User) -> None:
+    """Положить пользователя в кэш"""
+    if settings.PRINCIPAL_CACHE_TTL <= 0 or not user.username:
+        return
+    try:
+        await _backend.set(user.username, user_snapshot(user))
+    except Exception as e:
+        logger.warning(f"Ошибка записи в кэш принципалов: {str(e)}")
+
+
+async def invalidate_principal(*usernames: str | None) -> None:
+    """Удалить пользователей из кэша (после изменения или удаления)"""
+    for username in usernames:
+        if not username:
+            continue
+        try:
+            await _backend.delete(username)
+        except Exception as e:
+            logger.warning(f"Ошибка инвалидации кэша принципалов: {str(e)}")
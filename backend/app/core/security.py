@@ -1,3 +1,7 @@
+import hashlib
+import time
+import uuid
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Optional
 from passlib.context import CryptContext
@@ -5,9 +9,19 @@ from jose import jwt
 from pydantic import BaseModel
 
 from app.core.config import settings
+from app.core.token_revocation import is_token_revoked
+from app.utils.executors import run_in_executor
 
-# Настройка контекста для хэширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Настройка контекста для хэширования паролей.
+# min/max совпадают со стоимостью по умолчанию: хэши с другим числом раундов
+# считаются устаревшими и пересчитываются при входе (verify_and_update)
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 
 class TokenData(BaseModel):
@@ -24,6 +38,42 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def _run_password_task(func, *args):
+    # Отдельный ограниченный пул: bcrypt отпускает GIL, поэтому потоки
+    # считают хэши параллельно, а число одновременных хэшей не превышает
+    # PASSWORD_HASH_WORKERS — остальные ждут в очереди, не блокируя event loop
+    return await run_in_executor(
+        "password", func, *args, kind="thread", max_workers=settings.PASSWORD_HASH_WORKERS
+    )
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password в пуле потоков, не блокирует event loop."""
+    return await _run_password_task(pwd_context.verify, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash в пуле потоков, не блокирует event loop."""
+    return await _run_password_task(pwd_context.hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Проверяет пароль и, если хэш устарел (изменился BCRYPT_ROUNDS или схема),
+    возвращает новый хэш для сохранения: (пароль верен, новый хэш или None).
+    """
+    return await _run_password_task(
+        pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+def _token_ids() -> dict:
+    """jti для отзыва токена и iat (unix time) для отзыва всех токенов пользователя"""
+    return {"jti": uuid.uuid4().hex, "iat": int(time.time())}
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Создает JWT access токен."""
     to_encode = data.copy()
@@ -34,7 +84,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
 
-    to_encode.update({"exp": expire, "type": "access"})
+    to_encode.update({"exp": expire, "type": "access", **_token_ids()})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
@@ -66,23 +116,81 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None)
             days=settings.REFRESH_TOKEN_EXPIRE_DAYS
         )
 
-    to_encode.update({"exp": expire, "type": "refresh"})
+    to_encode.update({"exp": expire, "type": "refresh", **_token_ids()})
     encoded_jwt = jwt.encode(
         to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM
     )
     return encoded_jwt
 
 
+class TokenCache:
+    """
+    LRU кэш проверенных payload по SHA-256 токена.
+    Запись живет до exp токена, поэтому истекший токен снова проходит
+    через jwt.decode и получает ошибку "Токен истек".
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def key(token: str) -> str:
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        item = self._items.get(key)
+        if item is not None and item[0] > time.time():
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[1]
+        if item is not None:
+            del self._items[key]
+        self.misses += 1
+        return None
+
+    def set(self, key: str, payload: dict) -> None:
+        exp = payload.get("exp")
+        if self.maxsize <= 0 or not isinstance(exp, (int, float)):
+            return
+        self._items[key] = (exp, payload)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._items),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+token_cache = TokenCache(maxsize=settings.TOKEN_CACHE_MAXSIZE)
+
+
 def verify_token(token: str, token_type: str = "access") -> dict:
     """Проверяет JWT токен и возвращает payload."""
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        if payload.get("type") != token_type:
-            raise ValueError(f"Неверный тип токена. Ожидается {token_type}")
-        return payload
-    except jwt.ExpiredSignatureError:
-        raise ValueError("Токен истек")
-    except jwt.JWTError:
-        raise ValueError("Неверный токен")
+    cache_key = TokenCache.key(token)
+    payload = token_cache.get(cache_key)
+    if payload is None:
+        try:
+            payload = jwt.decode(
+                token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+            )
+        except jwt.ExpiredSignatureError:
+            raise ValueError("Токен истек")
+        except jwt.JWTError:
+            raise ValueError("Неверный токен")
+        token_cache.set(cache_key, payload)
+
+    if payload.get("type") != token_type:
+        raise ValueError(f"Неверный тип токена. Ожидается {token_type}")
+    if is_token_revoked(payload):
+        raise ValueError("Токен отозван")
+    return dict(payload)
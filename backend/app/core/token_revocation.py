@@ -0,0 +1,175 @@
+"""
+Список отозванных JWT.
+
+Проверка на каждом запросе — поиск в словарях в памяти процесса, без запросов
+к БД. Отзывы сохраняются в таблицу revoked_tokens; фоновая задача периодически
+подтягивает отзывы, сделанные другими воркерами, и удаляет записи
+о токенах, которые уже истекли сами.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_session_maker
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# jti -> exp отозванного токена (unix time)
+_revoked_jtis: dict[str, float] = {}
+# subject -> момент отзыва всех токенов пользователя (unix time)
+_revoked_subjects: dict[str, float] = {}
+_last_sync: float | None = None
+_last_purge: float = 0.0
+
+
+def _crud():
+    # Ленивый импорт: app.crud при загрузке импортирует app.core.security,
+    # который использует этот модуль
+    from app.crud import revoked_token
+
+    return revoked_token
+
+
+def _to_datetime(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc).replace(tzinfo=None)
+
+
+def _to_timestamp(value: datetime) -> float:
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+def _subject_revocation_lifetime() -> float:
+    # Токены пользователя живут не дольше refresh токена; запас на сдвиг часов
+    return timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS + 1).total_seconds()
+
+
+def is_token_revoked(payload: dict[str, Any]) -> bool:
+    """Отозван ли токен (по jti или вместе со всеми токенами пользователя)"""
+    jti = payload.get("jti")
+    if jti is not None and jti in _revoked_jtis:
+        return True
+    if _revoked_subjects:
+        revoked_at = _revoked_subjects.get(payload.get("sub"))
+        # Токены без iat выпущены до появления отзыва — считаем их старыми
+        if revoked_at is not None and payload.get("iat", 0) <= revoked_at:
+            return True
+    return False
+
+
+def _remember(jti: str | None, subject: str | None, revoked_at: float, expires_at: float) -> None:
+    if jti:
+        _revoked_jtis[jti] = expires_at
+    elif subject:
+        _revoked_subjects[subject] = max(_revoked_subjects.get(subject, 0.0), revoked_at)
+
+
+async def revoke_token(db: AsyncSession, payload: dict[str, Any]) -> bool:
+    """Отозвать один токен по его jti. Токены без jti отозвать нельзя"""
+    jti = payload.get("jti")
+    exp = payload.get("exp")
+    if not jti or not isinstance(exp, (int, float)):
+        return False
+
+    revoked_at = time.time()
+    _remember(jti, None, revoked_at, exp)
+    try:
+        await _crud().create_revoked_token(
+            db,
+            jti=jti,
+            subject=payload.get("sub"),
+            revoked_at=_to_datetime(revoked_at),
+            expires_at=_to_datetime(exp),
+        )
+    except IntegrityError:
+        # Токен уже отозван
+        await db.rollback()
+    return True
+
+
+async def revoke_subject(db: AsyncSession, subject: str | None) -> None:
+    """Отозвать все выпущенные к этому моменту токены пользователя"""
+    if not subject:
+        return
+    revoked_at = time.time()
+    expires_at = revoked_at + _subject_revocation_lifetime()
+    _remember(None, subject, revoked_at, expires_at)
+    await _crud().create_revoked_token(
+        db,
+        subject=subject,
+        revoked_at=_to_datetime(revoked_at),
+        expires_at=_to_datetime(expires_at),
+    )
+
+
+def _forget_expired(now: float) -> None:
+    for jti in [jti for jti, exp in _revoked_jtis.items() if exp <= now]:
+        del _revoked_jtis[jti]
+    lifetime = _subject_revocation_lifetime()
+    for subject in [s for s, revoked_at in _revoked_subjects.items() if revoked_at + lifetime <= now]:
+        del _revoked_subjects[subject]
+
+
+async def sync_revoked_tokens(db: AsyncSession) -> None:
+    """
+    Подтянуть отзывы из БД: при первом вызове все действующие,
+    затем только новые (с перекрытием на интервал синхронизации)
+    """
+    global _last_sync
+    now = time.time()
+    revoked_since = None
+    if _last_sync is not None:
+        revoked_since = _to_datetime(_last_sync - 2 * settings.TOKEN_REVOCATION_SYNC_INTERVAL)
+
+    entries = await _crud().get_revoked_tokens(
+        db, now=_to_datetime(now), revoked_since=revoked_since
+    )
+    for entry in entries:
+        _remember(
+            entry.jti,
+            entry.subject,
+            _to_timestamp(entry.revoked_at),
+            _to_timestamp(entry.expires_at),
+        )
+    _forget_expired(now)
+    _last_sync = now
+
+
+async def purge_expired_revocations(db: AsyncSession) -> int:
+    """Удалить из БД отзывы истекших токенов"""
+    global _last_purge
+    _last_purge = time.time()
+    deleted = await _crud().delete_expired_revoked_tokens(
+        db, now=_to_datetime(_last_purge)
+    )
+    if deleted:
+        logger.info(f"Удалено истекших отзывов токенов: {deleted}")
+    return deleted
+
+
+async def run_revocation_sync() -> None:
+    """Фоновая задача: синхронизация списка отзывов и периодическая очистка"""
+    while True:
+        await asyncio.sleep(settings.TOKEN_REVOCATION_SYNC_INTERVAL)
+        try:
+            async with async_session_maker() as db:
+                await sync_revoked_tokens(db)
+                if time.time() - _last_purge >= settings.TOKEN_REVOCATION_PURGE_INTERVAL:
+                    await purge_expired_revocations(db)
+        except Exception as e:
+            logger.error(f"Ошибка синхронизации отозванных токенов: {str(e)}")
+
+
+def get_revocation_stats() -> dict[str, Any]:
+    """Размер списка отзывов в памяти процесса"""
+    return {
+        "revoked_tokens": len(_revoked_jtis),
+        "revoked_subjects": len(_revoked_subjects),
+        "last_sync": _to_datetime(_last_sync).isoformat() if _last_sync else None,
+    }
@@ -21,3 +21,6 @@ __all__ = [
     "partner",
     "college",
 ]
+from app.crud import revoked_token
+from app.crud import media_blob
+from app.crud import email_outbox
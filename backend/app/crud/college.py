@@ -1,6 +1,7 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.media_blob import release_media, replace_media, retain_media
 from app.models.college import College
 from app.schemas.college import CollegeCreate, CollegeUpdate
 
@@ -17,6 +18,12 @@ async def get_colleges_list(
     return result.scalars().all()
 
 
+async def get_college_names(db: AsyncSession) -> list[tuple[int, str]]:
+    """Получить (id, название) всех колледжей без загрузки остальных полей"""
+    result = await db.execute(select(College.id, College.name))
+    return [tuple(row) for row in result.all()]
+
+
 async def get_college(db: AsyncSession, college_id: int) -> College | None:
     """Получить колледж по ID"""
     result = await db.execute(select(College).where(College.id == college_id))
@@ -33,26 +40,43 @@ async def create_college(db: AsyncSession, college_in: CollegeCreate) -> College
     """Создать колледж"""
     db_college = College(**college_in.model_dump())
     db.add(db_college)
+    await retain_media(db, db_college.image_url)
     await db.commit()
     await db.refresh(db_college)
     return db_college
 
 
+async def _lock_college(db: AsyncSession, college_id: int) -> College | None:
+    """
+    Загрузить строку колледжа с блокировкой до конца транзакции (SELECT ... FOR UPDATE):
+    параллельные правки не снимут ссылку с одного и того же старого изображения дважды
+    """
+    result = await db.execute(
+        select(College)
+        .where(College.id == college_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
 async def update_college(
     db: AsyncSession, college_id: int, college_in: CollegeUpdate
 ) -> College | None:
     """Обновить колледж"""
-    db_college = await get_college(db, college_id)
+    db_college = await _lock_college(db, college_id)
     if not db_college:
         return None
 
+    old_image_url = db_college.image_url
     update_data = college_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
-        if field == "image_url":
+        if field in ("image_url", "image_variants"):
             setattr(db_college, field, value)
         elif value is not None:
             setattr(db_college, field, value)
 
+    await replace_media(db, old_image_url, db_college.image_url)
     await db.commit()
     await db.refresh(db_college)
     return db_college
@@ -60,10 +84,11 @@ async def update_college(
 
 async def delete_college(db: AsyncSession, college_id: int) -> bool:
     """Удалить колледж"""
-    db_college = await get_college(db, college_id)
+    db_college = await _lock_college(db, college_id)
     if not db_college:
         return False
 
+    await release_media(db, db_college.image_url)
     await db.delete(db_college)
     await db.commit()
     return True 
\ No newline at end of file
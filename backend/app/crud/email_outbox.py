@@ -0,0 +1,161 @@
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.email_outbox import EmailOutbox, EmailStatus
+
+
+def _new_email(
+    recipient: str,
+    subject: str,
+    body: str,
+    now: datetime,
+    subtype: str = "plain",
+    html_body: str | None = None,
+) -> EmailOutbox:
+    return EmailOutbox(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        subtype=subtype,
+        status=EmailStatus.PENDING,
+        attempts=0,
+        next_attempt_at=now,
+        created_at=now,
+    )
+
+
+async def create_email(
+    db: AsyncSession,
+    recipient: str,
+    subject: str,
+    body: str,
+    now: datetime,
+    subtype: str = "plain",
+    html_body: str | None = None,
+) -> EmailOutbox:
+    """Поставить письмо в очередь"""
+    db_obj = _new_email(recipient, subject, body, now, subtype, html_body)
+    db.add(db_obj)
+    await db.commit()
+    return db_obj
+
+
+async def create_emails(
+    db: AsyncSession, emails: list[dict[str, Any]], now: datetime
+) -> list[EmailOutbox]:
+    """Поставить в очередь несколько писем одной транзакцией"""
+    db_objs = [_new_email(now=now, **email) for email in emails]
+    db.add_all(db_objs)
+    await db.commit()
+    return db_objs
+
+
+async def claim_emails(
+    db: AsyncSession, now: datetime, lease_until: datetime, limit: int
+) -> list[EmailOutbox]:
+    """
+    Взять пачку писем в отправку.
+    Строки блокируются с SKIP LOCKED, а next_attempt_at сдвигается на lease_until,
+    поэтому другие воркеры не возьмут эти письма, пока идет отправка.
+    Если воркер упадет, письма вернутся в очередь после lease_until
+    """
+    result = await db.execute(
+        select(EmailOutbox)
+        .where(
+            EmailOutbox.status == EmailStatus.PENDING,
+            EmailOutbox.next_attempt_at <= now,
+        )
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    emails = result.scalars().all()
+    for email in emails:
+        email.next_attempt_at = lease_until
+    await db.commit()
+    return emails
+
+
+async def mark_emails_sent(db: AsyncSession, email_ids: list[int], now: datetime) -> None:
+    """Отметить письма отправленными"""
+    if not email_ids:
+        return
+    await db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(email_ids))
+        .values(
+            status=EmailStatus.SENT,
+            attempts=EmailOutbox.attempts + 1,
+            sent_at=now,
+            last_error=None,
+        )
+    )
+    await db.commit()
+
+
+async def mark_email_failed(
+    db: AsyncSession, email_id: int, error: str, retry_at: datetime | None
+) -> None:
+    """Неудачная попытка отправки: повтор в retry_at или (None) окончательная ошибка"""
+    values: dict[str, Any] = {"attempts": EmailOutbox.attempts + 1, "last_error": error}
+    if retry_at is None:
+        values["status"] = EmailStatus.FAILED
+    else:
+        values["next_attempt_at"] = retry_at
+    await db.execute(update(EmailOutbox).where(EmailOutbox.id == email_id).values(**values))
+    await db.commit()
+
+
+async def postpone_emails(
+    db: AsyncSession, email_ids: list[int], retry_at: datetime, error: str
+) -> None:
+    """Вернуть в очередь письма, которые не пытались отправить (без учета попытки)"""
+    if not email_ids:
+        return
+    await db.execute(
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(email_ids))
+        .values(next_attempt_at=retry_at, last_error=error)
+    )
+    await db.commit()
+
+
+async def get_outbox_stats(db: AsyncSession, now: datetime) -> dict[str, Any]:
+    """Глубина очереди: письма по статусам, готовые к отправке и возраст самого старого"""
+    by_status = await db.execute(
+        select(EmailOutbox.status, func.count()).group_by(EmailOutbox.status)
+    )
+    counts = {status.value: 0 for status in EmailStatus}
+    counts.update({status.value: count for status, count in by_status.all()})
+
+    due = await db.execute(
+        select(func.count(), func.min(EmailOutbox.created_at)).where(
+            EmailOutbox.status == EmailStatus.PENDING,
+            EmailOutbox.next_attempt_at <= now,
+        )
+    )
+    due_count, oldest_created_at = due.one()
+    return {
+        "pending": counts[EmailStatus.PENDING.value],
+        "sent": counts[EmailStatus.SENT.value],
+        "failed": counts[EmailStatus.FAILED.value],
+        "due": due_count,
+        "oldest_due_age_seconds": (
+            (now - oldest_created_at).total_seconds() if oldest_created_at else None
+        ),
+    }
+
+
+async def delete_sent_emails(db: AsyncSession, sent_before: datetime) -> int:
+    """Удалить отправленные письма старше sent_before"""
+    result = await db.execute(
+        delete(EmailOutbox).where(
+            EmailOutbox.status == EmailStatus.SENT, EmailOutbox.sent_at < sent_before
+        )
+    )
+    await db.commit()
+    return result.rowcount
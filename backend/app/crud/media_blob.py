@@ -0,0 +1,148 @@
+import re
+from datetime import datetime, timezone
+
+from sqlalchemy import case, select, update, delete
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.media_blob import MediaBlob
+
+# URL файла хранилища: /media/<папка>/ab/cd/<sha256>[_<вариант>].<расширение>
+BLOB_URL_RE = re.compile(
+    r"^/media/(?P<key>[\w-]+/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64})(?:_\w+)?(?:\.\w+)?$"
+)
+
+
+def blob_key_from_url(url: str | None) -> str | None:
+    """Ключ блоба по URL файла; None для файлов вне хранилища (старые UUID имена)"""
+    if not url:
+        return None
+    match = BLOB_URL_RE.match(url)
+    return match.group("key") if match else None
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def _change_ref_count(db: AsyncSession, blob_key: str, delta: int) -> None:
+    # Счетчик не уходит ниже нуля: лишнее снятие ссылки не должно «занимать»
+    # будущую ссылку на тот же контент
+    ref_count = MediaBlob.ref_count + delta
+    values = {
+        "ref_count": case((ref_count < 0, 0), else_=ref_count),
+        "updated_at": _utcnow(),
+    }
+    result = await db.execute(
+        update(MediaBlob).where(MediaBlob.blob_key == blob_key).values(**values)
+    )
+    if result.rowcount or delta < 0:
+        return
+    try:
+        async with db.begin_nested():
+            db.add(MediaBlob(blob_key=blob_key, ref_count=delta, updated_at=_utcnow()))
+    except IntegrityError:
+        # Запись создала параллельная транзакция
+        await db.execute(
+            update(MediaBlob).where(MediaBlob.blob_key == blob_key).values(**values)
+        )
+
+
+async def touch_media_blob(db: AsyncSession, blob_key: str) -> None:
+    """
+    Отметить блоб перед записью файлов в хранилище: создать запись
+    с нулевым счетчиком или обновить updated_at существующей. Фиксируется
+    сразу, чтобы очистка не удалила файлы, пока загрузка создает ссылку
+    """
+    values = {"updated_at": _utcnow()}
+    result = await db.execute(
+        update(MediaBlob).where(MediaBlob.blob_key == blob_key).values(**values)
+    )
+    if not result.rowcount:
+        try:
+            async with db.begin_nested():
+                db.add(MediaBlob(blob_key=blob_key, ref_count=0, updated_at=_utcnow()))
+        except IntegrityError:
+            # Запись создала параллельная транзакция
+            await db.execute(
+                update(MediaBlob).where(MediaBlob.blob_key == blob_key).values(**values)
+            )
+    await db.commit()
+
+
+async def retain_media(db: AsyncSession, *urls: str | None) -> None:
+    """Учесть новые ссылки на файлы (без commit — в транзакции вызывающего)"""
+    for url in urls:
+        blob_key = blob_key_from_url(url)
+        if blob_key:
+            await _change_ref_count(db, blob_key, 1)
+
+
+async def release_media(db: AsyncSession, *urls: str | None) -> None:
+    """Снять ссылки на файлы (без commit — в транзакции вызывающего)"""
+    for url in urls:
+        blob_key = blob_key_from_url(url)
+        if blob_key:
+            await _change_ref_count(db, blob_key, -1)
+
+
+async def replace_media(db: AsyncSession, old_url: str | None, new_url: str | None) -> None:
+    """Перенести ссылку со старого файла на новый (без commit)"""
+    if old_url != new_url:
+        await release_media(db, old_url)
+        await retain_media(db, new_url)
+
+
+async def get_unreferenced_media_blobs(
+    db: AsyncSession, released_before: datetime, limit: int = 500
+) -> list[MediaBlob]:
+    """Блобы без ссылок, счетчик которых не менялся с released_before"""
+    result = await db.execute(
+        select(MediaBlob)
+        .where(MediaBlob.ref_count == 0, MediaBlob.updated_at < released_before)
+        .order_by(MediaBlob.updated_at)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def delete_unreferenced_media_blob(
+    db: AsyncSession, blob_id: int, released_before: datetime
+) -> bool:
+    """
+    Удалить запись блоба, если на него по-прежнему нет ссылок
+    и его не отметила новая загрузка
+    """
+    result = await db.execute(
+        delete(MediaBlob).where(
+            MediaBlob.id == blob_id,
+            MediaBlob.ref_count == 0,
+            MediaBlob.updated_at < released_before,
+        )
+    )
+    await db.commit()
+    return bool(result.rowcount)
+
+
+async def get_negative_media_blob_keys(db: AsyncSession, limit: int = 500) -> list[str]:
+    """
+    Блобы с отрицательным счетчиком: ссылок снято больше, чем создано.
+    Такие блобы не удаляются — на файл могут ссылаться записи
+    """
+    result = await db.execute(
+        select(MediaBlob.blob_key)
+        .where(MediaBlob.ref_count < 0)
+        .order_by(MediaBlob.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def get_existing_blob_keys(db: AsyncSession, blob_keys: list[str]) -> set[str]:
+    """Какие из ключей есть в таблице блобов"""
+    if not blob_keys:
+        return set()
+    result = await db.execute(
+        select(MediaBlob.blob_key).where(MediaBlob.blob_key.in_(set(blob_keys)))
+    )
+    return set(result.scalars().all())
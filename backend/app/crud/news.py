@@ -1,6 +1,7 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.media_blob import release_media, replace_media, retain_media
 from app.models.news import News
 from app.schemas.news import NewsCreate, NewsUpdate
 
@@ -30,26 +31,43 @@ async def create_news(db: AsyncSession, news_in: NewsCreate) -> News:
     """Создать новость"""
     db_news = News(**news_in.model_dump())
     db.add(db_news)
+    await retain_media(db, db_news.image_url)
     await db.commit()
     await db.refresh(db_news)
     return db_news
 
 
+async def _lock_news(db: AsyncSession, news_id: int) -> News | None:
+    """
+    Загрузить строку новости с блокировкой до конца транзакции (SELECT ... FOR UPDATE):
+    параллельные правки не снимут ссылку с одного и того же старого изображения дважды
+    """
+    result = await db.execute(
+        select(News)
+        .where(News.id == news_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
 async def update_news(
     db: AsyncSession, news_id: int, news_in: NewsUpdate
 ) -> News | None:
     """Обновить новость"""
-    db_news = await get_news(db, news_id)
+    db_news = await _lock_news(db, news_id)
     if not db_news:
         return None
 
+    old_image_url = db_news.image_url
     update_data = news_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
-        if field == "image_url":
+        if field in ("image_url", "image_variants"):
             setattr(db_news, field, value)
         elif value is not None:
             setattr(db_news, field, value)
 
+    await replace_media(db, old_image_url, db_news.image_url)
     await db.commit()
     await db.refresh(db_news)
     return db_news
@@ -57,10 +75,11 @@ async def update_news(
 
 async def delete_news(db: AsyncSession, news_id: int) -> bool:
     """Удалить новость"""
-    db_news = await get_news(db, news_id)
+    db_news = await _lock_news(db, news_id)
     if not db_news:
         return False
 
+    await release_media(db, db_news.image_url)
     await db.delete(db_news)
     await db.commit()
     return True
@@ -1,6 +1,7 @@
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.crud.media_blob import release_media, replace_media, retain_media
 from app.models.partner import Partner
 from app.schemas.partner import PartnerCreate, PartnerUpdate
 
@@ -30,26 +31,43 @@ async def create_partner(db: AsyncSession, partner_in: PartnerCreate) -> Partner
     """Создать партнера"""
     db_partner = Partner(**partner_in.model_dump())
     db.add(db_partner)
+    await retain_media(db, db_partner.image_url)
     await db.commit()
     await db.refresh(db_partner)
     return db_partner
 
 
+async def _lock_partner(db: AsyncSession, partner_id: int) -> Partner | None:
+    """
+    Загрузить строку партнера с блокировкой до конца транзакции (SELECT ... FOR UPDATE):
+    параллельные правки не снимут ссылку с одного и того же старого изображения дважды
+    """
+    result = await db.execute(
+        select(Partner)
+        .where(Partner.id == partner_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return result.scalar_one_or_none()
+
+
 async def update_partner(
     db: AsyncSession, partner_id: int, partner_in: PartnerUpdate
 ) -> Partner | None:
     """Обновить партнера"""
-    db_partner = await get_partner(db, partner_id)
+    db_partner = await _lock_partner(db, partner_id)
     if not db_partner:
         return None
 
+    old_image_url = db_partner.image_url
     update_data = partner_in.model_dump(exclude_unset=True)
     for field, value in update_data.items():
-        if field == "image_url":
+        if field in ("image_url", "image_variants"):
             setattr(db_partner, field, value)
         elif value is not None:
             setattr(db_partner, field, value)
 
+    await replace_media(db, old_image_url, db_partner.image_url)
     await db.commit()
     await db.refresh(db_partner)
     return db_partner
@@ -57,10 +75,11 @@ async def update_partner(
 
 async def delete_partner(db: AsyncSession, partner_id: int) -> bool:
     """Удалить партнера"""
-    db_partner = await get_partner(db, partner_id)
+    db_partner = await _lock_partner(db, partner_id)
     if not db_partner:
         return False
 
+    await release_media(db, db_partner.image_url)
     await db.delete(db_partner)
     await db.commit()
     return True
@@ -0,0 +1,39 @@
+from datetime import datetime
+from sqlalchemy import select, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.revoked_token import RevokedToken
+
+
+async def create_revoked_token(
+    db: AsyncSession,
+    revoked_at: datetime,
+    expires_at: datetime,
+    jti: str | None = None,
+    subject: str | None = None,
+) -> RevokedToken:
+    """Записать отзыв токена (по jti) или всех токенов пользователя (по subject)"""
+    db_obj = RevokedToken(
+        jti=jti, subject=subject, revoked_at=revoked_at, expires_at=expires_at
+    )
+    db.add(db_obj)
+    await db.commit()
+    return db_obj
+
+
+async def get_revoked_tokens(
+    db: AsyncSession, now: datetime, revoked_since: datetime | None = None
+) -> list[RevokedToken]:
+    """Действующие отзывы (опционально — только появившиеся после revoked_since)"""
+    query = select(RevokedToken).where(RevokedToken.expires_at > now)
+    if revoked_since is not None:
+        query = query.where(RevokedToken.revoked_at >= revoked_since)
+    result = await db.execute(query)
+    return result.scalars().all()
+
+
+async def delete_expired_revoked_tokens(db: AsyncSession, now: datetime) -> int:
+    """Удалить отзывы токенов, которые уже истекли сами"""
+    result = await db.execute(delete(RevokedToken).where(RevokedToken.expires_at <= now))
+    await db.commit()
+    return result.rowcount
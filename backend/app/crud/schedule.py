@@ -1,9 +1,11 @@
 from typing import Any, Dict, Optional, Union, List
-from sqlalchemy import select, update, delete
+from sqlalchemy import select, update, delete, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
-from app.models.schedule import Schedule, ScheduleTemplate
+from app.models.schedule import (
+    Schedule, ScheduleTemplate, ScheduleEntry, ScheduleImportJob, ImportJobStatus
+)
 from app.schemas.schedule import ScheduleCreate, ScheduleUpdate, ScheduleTemplateCreate, ScheduleTemplateUpdate
 
 import logging
@@ -96,6 +98,38 @@ async def get_schedule_template_by_college_id(
     return result.scalar_one_or_none()
 
 
+async def get_schedule_template_html_by_college_id(
+    db: AsyncSession, college_id: int
+) -> tuple[int, str | None, str | None] | None:
+    """
+    Получить (id, html_content, content_hash) активного шаблона колледжа
+    без загрузки JSON с данными расписания
+    """
+    result = await db.execute(
+        select(
+            ScheduleTemplate.id,
+            ScheduleTemplate.html_content,
+            ScheduleTemplate.content_hash,
+        )
+        .where(ScheduleTemplate.college_id == college_id)
+        .where(ScheduleTemplate.is_active == True)
+        .order_by(ScheduleTemplate.id.desc())
+        .limit(1)
+    )
+    row = result.first()
+    return tuple(row) if row else None
+
+
+async def set_schedule_template_html(
+    db: AsyncSession, template: ScheduleTemplate, html_content: str, content_hash: str
+) -> ScheduleTemplate:
+    """Сохранить отрендеренный HTML шаблона (для шаблонов, созданных до его появления)"""
+    template.html_content = html_content
+    template.content_hash = content_hash
+    await db.commit()
+    return template
+
+
 async def get_active_schedule_templates(
     db: AsyncSession, skip: int = 0, limit: int = 100
 ) -> List[ScheduleTemplate]:
@@ -167,6 +201,7 @@ async def delete_schedule_template(db: AsyncSession, template_id: int) -> bool:
             return False
 
         logger.info(f"Deleting template {template_id} from database")
+        await db.execute(delete(ScheduleEntry).where(ScheduleEntry.template_id == template_id))
         await db.delete(db_template)
         await db.commit()
         logger.info(f"Template {template_id} deleted successfully")
@@ -190,7 +225,168 @@ async def deactivate_schedule_templates_by_college_id(
     await db.commit()
 
 
+async def get_active_schedule_templates_by_college_ids(
+    db: AsyncSession, college_ids: List[int]
+) -> Dict[int, ScheduleTemplate]:
+    """Получить активные шаблоны колледжей: {college_id: шаблон}"""
+    if not college_ids:
+        return {}
+    result = await db.execute(
+        select(ScheduleTemplate)
+        .where(ScheduleTemplate.college_id.in_(college_ids))
+        .where(ScheduleTemplate.is_active == True)
+        .order_by(ScheduleTemplate.id.asc())
+    )
+    # При дубликатах побеждает последний, как в get_schedule_template_by_college_id
+    return {template.college_id: template for template in result.scalars().all()}
+
+
+async def replace_schedule_templates(
+    db: AsyncSession, templates: List[ScheduleTemplateCreate]
+) -> List[ScheduleTemplate]:
+    """
+    Заменить активные шаблоны колледжей новыми в одной транзакции.
+    Если у колледжа уже есть версия с тем же content_hash, она активируется
+    повторно вместо вставки копии. Фиксация — одним commit
+    """
+    college_ids = {template.college_id for template in templates}
+    if not college_ids:
+        return []
+
+    try:
+        existing = await db.execute(
+            select(ScheduleTemplate.college_id, ScheduleTemplate.content_hash, ScheduleTemplate.id)
+            .where(ScheduleTemplate.college_id.in_(college_ids))
+            .where(ScheduleTemplate.content_hash.in_(
+                {template.content_hash for template in templates if template.content_hash}
+            ))
+        )
+        existing_ids = {
+            (college_id, content_hash): template_id
+            for college_id, content_hash, template_id in existing.all()
+        }
+
+        await db.execute(
+            update(ScheduleTemplate)
+            .where(ScheduleTemplate.college_id.in_(college_ids))
+            .values(is_active=False)
+        )
+
+        db_objs = []
+        for template in templates:
+            template_id = existing_ids.get((template.college_id, template.content_hash))
+            if template_id is not None:
+                db_obj = await db.get(ScheduleTemplate, template_id)
+                db_obj.is_active = True
+                db_obj.college_name = template.college_name
+                db_obj.html_content = template.html_content
+            else:
+                db_obj = ScheduleTemplate(**template.model_dump())
+                db.add(db_obj)
+            db_objs.append(db_obj)
+
+        await db.flush()
+        await rebuild_schedule_entries(db, db_objs)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+
+    return db_objs
+
+
+# Функции для работы с нормализованными записями расписания
+ENTRY_FIELDS = ("group", "discipline", "room", "shift", "auditory", "dates")
+
+
+async def rebuild_schedule_entries(
+    db: AsyncSession, templates: List[ScheduleTemplate]
+) -> None:
+    """
+    Пересобрать записи расписания колледжей по активным шаблонам.
+    Не фиксирует транзакцию — вызывается внутри replace_schedule_templates
+    """
+    college_ids = {template.college_id for template in templates}
+    if not college_ids:
+        return
+
+    await db.execute(delete(ScheduleEntry).where(ScheduleEntry.college_id.in_(college_ids)))
+    rows = [
+        {
+            "college_id": template.college_id,
+            "template_id": template.id,
+            **{field: str(entry.get(field) or "") for field in ENTRY_FIELDS},
+        }
+        for template in templates
+        for entry in template.schedule_data.get("schedule", [])
+    ]
+    if rows:
+        await db.execute(insert(ScheduleEntry), rows)
+
+
+async def get_schedule_entries(
+    db: AsyncSession,
+    college_id: int | None = None,
+    group: str | None = None,
+    room: str | None = None,
+    shift: str | None = None,
+    skip: int = 0,
+    limit: int = 100,
+) -> List[ScheduleEntry]:
+    """Получить записи расписания с фильтрами (точное совпадение, по индексам)"""
+    query = select(ScheduleEntry)
+    if college_id is not None:
+        query = query.where(ScheduleEntry.college_id == college_id)
+    if group is not None:
+        query = query.where(ScheduleEntry.group == group)
+    if room is not None:
+        query = query.where(ScheduleEntry.room == room)
+    if shift is not None:
+        query = query.where(ScheduleEntry.shift == shift)
+
+    result = await db.execute(query.order_by(ScheduleEntry.id.asc()).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
 async def delete_all_schedule_templates(db: AsyncSession) -> None:
     """Удалить все шаблоны расписаний"""
+    await db.execute(delete(ScheduleEntry))
     await db.execute(delete(ScheduleTemplate))
     await db.commit()
+
+
+# Функции для работы с задачами импорта
+async def create_import_job(
+    db: AsyncSession, filename: str, created_by: str | None = None
+) -> ScheduleImportJob:
+    """Создать задачу импорта"""
+    db_job = ScheduleImportJob(
+        filename=filename,
+        created_by=created_by,
+        status=ImportJobStatus.PENDING,
+        progress=0,
+    )
+    db.add(db_job)
+    await db.commit()
+    await db.refresh(db_job)
+    return db_job
+
+
+async def get_import_job(db: AsyncSession, job_id: int) -> ScheduleImportJob | None:
+    """Получить задачу импорта по ID"""
+    result = await db.execute(
+        select(ScheduleImportJob).where(ScheduleImportJob.id == job_id)
+    )
+    return result.scalar_one_or_none()
+
+
+async def update_import_job(
+    db: AsyncSession, job_id: int, **values: Any
+) -> None:
+    """Обновить статус/прогресс/результаты задачи импорта"""
+    await db.execute(
+        update(ScheduleImportJob)
+        .where(ScheduleImportJob.id == job_id)
+        .values(**values)
+    )
+    await db.commit()
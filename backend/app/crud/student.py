@@ -1,8 +1,10 @@
-from sqlalchemy import select, and_
+from sqlalchemy import select, update, func, and_
 from sqlalchemy.ext.asyncio import AsyncSession
 import os
 
+from app.crud.media_blob import release_media, retain_media
 from app.models.student import Student, ApplicationStatus
+from app.models.vacancy import Vacancy
 from app.schemas.student import StudentCreate, StudentUpdate
 
 
@@ -12,30 +14,119 @@ async def get_student(db: AsyncSession, student_id: int) -> Student | None:
     return result.scalar_one_or_none()
 
 
+async def get_student_with_recruiter(
+    db: AsyncSession, student_id: int
+) -> tuple[Student, int | None] | None:
+    """Получить студента вместе с recruiter_id его вакансии одним запросом"""
+    result = await db.execute(
+        select(Student, Vacancy.recruiter_id)
+        .outerjoin(Vacancy, Student.vacancy_id == Vacancy.id)
+        .where(Student.id == student_id)
+    )
+    row = result.one_or_none()
+    return (row[0], row[1]) if row else None
+
+
+async def get_recruiter_ids_by_student_ids(
+    db: AsyncSession, student_ids: list[int]
+) -> dict[int, int | None]:
+    """
+    recruiter_id вакансий для набора студентов одним запросом.
+    Несуществующие студенты в результат не попадают
+    """
+    if not student_ids:
+        return {}
+    result = await db.execute(
+        select(Student.id, Vacancy.recruiter_id)
+        .outerjoin(Vacancy, Student.vacancy_id == Vacancy.id)
+        .where(Student.id.in_(set(student_ids)))
+    )
+    return {student_id: recruiter_id for student_id, recruiter_id in result.all()}
+
+
 async def get_students(
     db: AsyncSession,
     skip: int = 0,
     limit: int = 100,
     vacancy_id: int | None = None,
     status: ApplicationStatus | None = None,
+    recruiter_id: int | None = None,
+    after_id: int | None = None,
 ) -> list[Student]:
-    """Получить список студентов"""
+    """
+    Получить список студентов в порядке id.
+    recruiter_id — только заявки на вакансии рекрутера (один запрос с JOIN),
+    after_id — keyset пагинация: заявки с id больше курсора
+    """
     query = select(Student)
 
+    if recruiter_id is not None:
+        query = query.join(Vacancy, Student.vacancy_id == Vacancy.id).where(
+            Vacancy.recruiter_id == recruiter_id
+        )
+
     if vacancy_id is not None:
         query = query.where(Student.vacancy_id == vacancy_id)
 
     if status is not None:
         query = query.where(Student.status == status)
 
-    result = await db.execute(query.offset(skip).limit(limit))
+    if after_id is not None:
+        query = query.where(Student.id > after_id)
+
+    result = await db.execute(query.order_by(Student.id).offset(skip).limit(limit))
     return result.scalars().all()
 
 
+# Колонки счетчиков вакансии по статусам заявок
+STATUS_COUNTERS = {
+    ApplicationStatus.NEW: "applications_new",
+    ApplicationStatus.IN_REVIEW: "applications_in_review",
+    ApplicationStatus.INVITED: "applications_invited",
+    ApplicationStatus.REJECTED: "applications_rejected",
+}
+
+
+async def _lock_vacancies(db: AsyncSession, vacancy_ids: list[int]) -> dict[int, Vacancy]:
+    """
+    Заблокировать строки вакансий до конца транзакции (SELECT ... FOR UPDATE).
+    Блокировки берутся в порядке id, чтобы параллельные транзакции не взаимоблокировались
+    """
+    if not vacancy_ids:
+        return {}
+    result = await db.execute(
+        select(Vacancy)
+        .where(Vacancy.id.in_(set(vacancy_ids)))
+        .order_by(Vacancy.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return {vacancy.id: vacancy for vacancy in result.scalars().all()}
+
+
+def _count_application(vacancy: Vacancy, status: ApplicationStatus, delta: int) -> None:
+    """Изменить счетчик заявок вакансии в статусе status"""
+    column = STATUS_COUNTERS[status]
+    setattr(vacancy, column, getattr(vacancy, column) + delta)
+
+
 async def create_student(
     db: AsyncSession, student_in: StudentCreate, resume_file_path: str | None = None
 ) -> Student:
-    """Создать заявку студента"""
+    """
+    Создать заявку студента.
+    Количество заявок проверяется под блокировкой строки вакансии, поэтому
+    одновременные заявки не превышают required_amount.
+    ValueError — вакансия не найдена или набор заявок завершен
+    """
+    vacancy = (await _lock_vacancies(db, [student_in.vacancy_id])).get(student_in.vacancy_id)
+    if vacancy is None:
+        await db.rollback()
+        raise ValueError("Вакансия не найдена.")
+    if vacancy.applications_total >= vacancy.required_amount:
+        await db.rollback()
+        raise ValueError("Достигнуто максимальное количество заявок на эту вакансию.")
+
     student_data = student_in.model_dump()
     if resume_file_path:
         student_data["resume_file"] = resume_file_path
@@ -43,8 +134,12 @@ async def create_student(
         file_extension = os.path.splitext(resume_file_path)[1]
         student_data["resume_file_extension"] = file_extension
 
-    db_student = Student(**student_data)
+    db_student = Student(**student_data, status=ApplicationStatus.NEW)
     db.add(db_student)
+    vacancy.applications_total += 1
+    _count_application(vacancy, db_student.status, 1)
+    await retain_media(db, db_student.resume_file)
+
     await db.commit()
     await db.refresh(db_student)
     return db_student
@@ -61,6 +156,15 @@ async def update_student(
         return None
 
     update_data = student_in.model_dump(exclude_unset=True)
+    new_status = update_data.get("status")
+    if new_status is not None:
+        # Статус перечитываем под блокировкой вакансии: его могли изменить параллельно
+        vacancy = (await _lock_vacancies(db, [db_student.vacancy_id]))[db_student.vacancy_id]
+        await db.refresh(db_student)
+        if db_student.status != new_status:
+            _count_application(vacancy, db_student.status, -1)
+            _count_application(vacancy, new_status, 1)
+
     for field, value in update_data.items():
         if value is not None:
             setattr(db_student, field, value)
@@ -73,15 +177,31 @@ async def update_student(
 async def bulk_update_status(
     db: AsyncSession, student_ids: list[int], status: ApplicationStatus
 ) -> int:
-    """Массовое обновление статусов студентов"""
-    result = await db.execute(select(Student).where(Student.id.in_(student_ids)))
-    students = result.scalars().all()
-
-    for student in students:
-        student.status = status
-
+    """Массовое обновление статусов студентов одним UPDATE"""
+    if not student_ids:
+        return 0
+    student_ids = set(student_ids)
+
+    vacancy_ids = await db.execute(
+        select(Student.vacancy_id).where(Student.id.in_(student_ids)).distinct()
+    )
+    vacancies = await _lock_vacancies(db, vacancy_ids.scalars().all())
+
+    # Сколько заявок каждой вакансии уходит из какого статуса
+    moved = await db.execute(
+        select(Student.vacancy_id, Student.status, func.count())
+        .where(Student.id.in_(student_ids), Student.status != status)
+        .group_by(Student.vacancy_id, Student.status)
+    )
+    for vacancy_id, old_status, count in moved.all():
+        _count_application(vacancies[vacancy_id], old_status, -count)
+        _count_application(vacancies[vacancy_id], status, count)
+
+    result = await db.execute(
+        update(Student).where(Student.id.in_(student_ids)).values(status=status)
+    )
     await db.commit()
-    return len(students)
+    return result.rowcount
 
 
 async def delete_student(db: AsyncSession, student_id: int) -> bool:
@@ -90,6 +210,12 @@ async def delete_student(db: AsyncSession, student_id: int) -> bool:
     if not db_student:
         return False
 
+    vacancy = (await _lock_vacancies(db, [db_student.vacancy_id]))[db_student.vacancy_id]
+    await db.refresh(db_student)
+    vacancy.applications_total -= 1
+    _count_application(vacancy, db_student.status, -1)
+    await release_media(db, db_student.resume_file)
+
     await db.delete(db_student)
     await db.commit()
     return True
@@ -104,5 +230,7 @@ async def get_students_by_vacancy(
 
 async def get_students_count_by_vacancy(db: AsyncSession, vacancy_id: int) -> int:
     """Получить количество заявок на вакансию"""
-    result = await db.execute(select(Student).where(Student.vacancy_id == vacancy_id))
-    return len(result.scalars().all())
+    result = await db.execute(
+        select(func.count()).select_from(Student).where(Student.vacancy_id == vacancy_id)
+    )
+    return result.scalar_one()
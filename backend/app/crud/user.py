@@ -1,5 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from jose import jwt
 from datetime import datetime, timedelta
 from typing import Any, Dict, Optional, Union
@@ -7,8 +8,10 @@ import logging
 
 from app.models.user import User
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash, verify_password
+from app.core.security import get_password_hash_async, verify_password_async
 from app.core.config import settings
+from app.core.principal_cache import invalidate_principal
+from app.core.token_revocation import revoke_subject
 
 logger = logging.getLogger(__name__)
 
@@ -43,7 +46,7 @@ async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
         email=user_in.email,
         username=user_in.username,
         hashed_password=(
-            get_password_hash(user_in.password) if user_in.password else None
+            await get_password_hash_async(user_in.password) if user_in.password else None
         ),
         is_superuser=user_in.is_superuser,
         is_registered=user_in.is_registered,
@@ -55,6 +58,60 @@ async def create_user(db: AsyncSession, user_in: UserCreate) -> User:
     return db_obj
 
 
+async def get_users_by_emails(db: AsyncSession, emails: list[str]) -> list[User]:
+    """Получить пользователей по списку email одним запросом"""
+    if not emails:
+        return []
+    result = await db.execute(select(User).where(User.email.in_(set(emails))))
+    return result.scalars().all()
+
+
+async def create_users(db: AsyncSession, users_in: list[UserCreate]) -> list[User]:
+    """
+    Создать нескольких пользователей без пароля (приглашения).
+    Без commit — в транзакции вызывающего. Адреса, которые успел создать
+    параллельный запрос, пропускаются: возвращаются только созданные пользователи
+    """
+    pending = list(users_in)
+    db_objs: list[User] = []
+    while pending:
+        db_objs = [
+            User(
+                email=user_in.email,
+                username=user_in.username,
+                is_superuser=user_in.is_superuser,
+                is_registered=user_in.is_registered,
+                is_recruiter=user_in.is_recruiter,
+            )
+            for user_in in pending
+        ]
+        try:
+            async with db.begin_nested():
+                db.add_all(db_objs)
+            break
+        except IntegrityError:
+            # Часть адресов создал параллельный запрос: повторяем без них
+            taken = {
+                user.email
+                for user in await get_users_by_emails(db, [u.email for u in pending])
+            }
+            if not taken:
+                raise
+            pending = [user_in for user_in in pending if user_in.email not in taken]
+            db_objs = []
+    if not db_objs:
+        return []
+
+    # Подгружаем значения по умолчанию из БД (created_at) одним запросом
+    result = await db.execute(
+        select(User)
+        .where(User.id.in_([db_obj.id for db_obj in db_objs]))
+        .order_by(User.id)
+        .execution_options(populate_existing=True)
+    )
+    return result.scalars().all()
+
+
 async def update_user(
     db: AsyncSession, user_id: int, update_data: Dict[str, Any]
 ) -> Optional[User]:
@@ -63,16 +120,18 @@ async def update_user(
     user = result.scalar_one_or_none()
     if not user:
         return None
+    old_username = user.username
 
     # Обновляем поля пользователя
     for field, value in update_data.items():
         if field == "password":
-            setattr(user, "hashed_password", get_password_hash(value))
+            setattr(user, "hashed_password", await get_password_hash_async(value))
         else:
             setattr(user, field, value)
 
     await db.commit()
     await db.refresh(user)
+    await invalidate_principal(old_username, user.username)
     return user
 
 
@@ -84,6 +143,9 @@ async def delete_user(db: AsyncSession, user_id: int) -> bool:
 
     await db.delete(db_user)
     await db.commit()
+    await invalidate_principal(db_user.username)
+    # Уже выданные токены перестают действовать сразу, а не по истечении срока
+    await revoke_subject(db, db_user.username)
     return True
 
 
@@ -96,6 +158,7 @@ async def set_user_registered(db: AsyncSession, user_id: int) -> User | None:
     db_user.is_registered = True
     await db.commit()
     await db.refresh(db_user)
+    await invalidate_principal(db_user.username)
     return db_user
 
 
@@ -104,7 +167,7 @@ async def authenticate_user(db: AsyncSession, email: str, password: str) -> User
     user = await get_user_by_email(db, email)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
 
@@ -11,6 +11,16 @@ async def get_vacancy(db: AsyncSession, vacancy_id: int) -> Vacancy | None:
     return result.scalar_one_or_none()
 
 
+async def get_vacancies_by_ids(db: AsyncSession, vacancy_ids: list[int]) -> list[Vacancy]:
+    """Получить вакансии по списку ID (несуществующие пропускаются)"""
+    if not vacancy_ids:
+        return []
+    result = await db.execute(
+        select(Vacancy).where(Vacancy.id.in_(set(vacancy_ids))).order_by(Vacancy.id)
+    )
+    return result.scalars().all()
+
+
 async def get_vacancies(
     db: AsyncSession,
     skip: int = 0,
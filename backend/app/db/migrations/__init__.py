@@ -0,0 +1,152 @@
+"""
+Версионные миграции схемы БД.
+
+Ревизии лежат в app/db/migrations/versions: каждая — модуль с revision,
+down_revision и функцией upgrade(connection), выполняющей явный DDL.
+Примененные ревизии записываются в таблицу schema_migrations.
+При старте приложения применяются только недостающие ревизии; если схема
+уже на последней ревизии, выполняется один SELECT и больше ничего.
+"""
+import importlib
+import pkgutil
+from functools import lru_cache
+from types import ModuleType
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+VERSION_TABLE = "schema_migrations"
+
+# Ключ advisory lock PostgreSQL: одновременно стартующие экземпляры
+# применяют миграции по очереди
+ADVISORY_LOCK_KEY = 727165110
+
+version_table = sa.Table(
+    VERSION_TABLE,
+    sa.MetaData(),
+    sa.Column("version_num", sa.String(32), primary_key=True),
+    sa.Column("applied_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+)
+
+
+@lru_cache(maxsize=None)
+def load_revisions() -> tuple[ModuleType, ...]:
+    """Загрузить ревизии и упорядочить их по цепочке down_revision"""
+    from app.db.migrations import versions
+
+    modules = [
+        importlib.import_module(f"{versions.__name__}.{info.name}")
+        for info in pkgutil.iter_modules(versions.__path__)
+    ]
+    by_parent = {module.down_revision: module for module in modules}
+    if len(by_parent) != len(modules):
+        raise RuntimeError("Несколько ревизий миграций ссылаются на одну родительскую")
+
+    ordered = []
+    parent = None
+    while parent in by_parent:
+        module = by_parent[parent]
+        ordered.append(module)
+        parent = module.revision
+    if len(ordered) != len(modules):
+        raise RuntimeError("Цепочка ревизий миграций разорвана")
+    return tuple(ordered)
+
+
+def head_revision() -> str | None:
+    """Последняя ревизия"""
+    revisions = load_revisions()
+    return revisions[-1].revision if revisions else None
+
+
+def _applied_revisions(connection: Connection) -> set[str]:
+    if not sa.inspect(connection).has_table(VERSION_TABLE):
+        return set()
+    return set(connection.execute(sa.select(version_table.c.version_num)).scalars())
+
+
+def _pending_revisions(connection: Connection) -> list[ModuleType]:
+    applied = _applied_revisions(connection)
+    return [module for module in load_revisions() if module.revision not in applied]
+
+
+def _upgrade(connection: Connection) -> list[str]:
+    if connection.dialect.name == "postgresql":
+        # Блокировка снимается вместе с завершением транзакции
+        connection.execute(sa.select(sa.func.pg_advisory_xact_lock(ADVISORY_LOCK_KEY)))
+    version_table.create(connection, checkfirst=True)
+
+    # Повторная проверка под блокировкой: миграции мог применить другой экземпляр
+    applied = []
+    for module in _pending_revisions(connection):
+        logger.info(f"Применяется миграция {module.revision}: {module.__doc__.strip()}")
+        module.upgrade(connection)
+        connection.execute(sa.insert(version_table).values(version_num=module.revision))
+        applied.append(module.revision)
+    return applied
+
+
+async def get_pending_revisions(engine: AsyncEngine) -> list[str]:
+    """Ревизии, которые еще не применены"""
+    async with engine.connect() as conn:
+        pending = await conn.run_sync(_pending_revisions)
+    return [module.revision for module in pending]
+
+
+async def upgrade_to_head(engine: AsyncEngine) -> list[str]:
+    """
+    Применить недостающие ревизии в одной транзакции.
+    Возвращает список примененных ревизий (пустой, если схема актуальна)
+    """
+    # Быстрый путь: схема на последней ревизии — блокировки и DDL не нужны
+    if not await get_pending_revisions(engine):
+        logger.info(f"Схема БД актуальна (ревизия {head_revision()})")
+        return []
+
+    async with engine.begin() as conn:
+        applied = await conn.run_sync(_upgrade)
+    if applied:
+        logger.info(f"Схема БД обновлена до ревизии {head_revision()}")
+    return applied
+
+
+async def ensure_at_head(engine: AsyncEngine) -> None:
+    """Проверить, что схема на последней ревизии (при выключенном DB_AUTO_MIGRATE)"""
+    pending = await get_pending_revisions(engine)
+    if pending:
+        raise RuntimeError(
+            f"Схема БД не обновлена, не применены ревизии: {', '.join(pending)}. "
+            "Выполните: python -m app.db.migrations upgrade"
+        )
+
+
+# Вспомогательные функции для ревизий: повторный запуск не ломает схему,
+# созданную ранее через Base.metadata.create_all
+def has_column(connection: Connection, table_name: str, column_name: str) -> bool:
+    """Есть ли колонка в таблице"""
+    return any(
+        column["name"] == column_name
+        for column in sa.inspect(connection).get_columns(table_name)
+    )
+
+
+def add_column(connection: Connection, table_name: str, column: sa.Column) -> None:
+    """ALTER TABLE ... ADD COLUMN, если колонки еще нет"""
+    if has_column(connection, table_name, column.name):
+        return
+    sa.Table(table_name, sa.MetaData(), column)
+    preparer = connection.dialect.identifier_preparer
+    column_ddl = sa.schema.CreateColumn(column).compile(dialect=connection.dialect)
+    connection.execute(
+        sa.text(f"ALTER TABLE {preparer.quote(table_name)} ADD COLUMN {column_ddl}")
+    )
+
+
+def create_index(connection: Connection, index: sa.Index) -> None:
+    """CREATE INDEX, если индекса еще нет"""
+    index.create(connection, checkfirst=True)
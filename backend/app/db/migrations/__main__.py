@@ -0,0 +1,33 @@
+"""
+Запуск миграций вручную (например, перед выкладкой при DB_AUTO_MIGRATE=false):
+
+    python -m app.db.migrations upgrade   # применить недостающие ревизии
+    python -m app.db.migrations current   # показать непримененные ревизии
+"""
+import asyncio
+import sys
+
+from app.db.migrations import get_pending_revisions, head_revision, upgrade_to_head
+from app.db.session import engine
+
+import logging
+
+
+async def main(command: str) -> None:
+    try:
+        if command == "upgrade":
+            applied = await upgrade_to_head(engine)
+            print(f"Применено ревизий: {len(applied)}, текущая: {head_revision()}")
+        elif command == "current":
+            pending = await get_pending_revisions(engine)
+            print(f"Последняя ревизия: {head_revision()}")
+            print(f"Не применены: {', '.join(pending) if pending else 'нет'}")
+        else:
+            sys.exit(f"Неизвестная команда: {command} (upgrade | current)")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(sys.argv[1] if len(sys.argv) > 1 else "upgrade"))
@@ -0,0 +1,160 @@
+"""Исходная схема: таблицы, создававшиеся через Base.metadata.create_all"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+revision = "0001"
+down_revision = None
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "users",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("email", sa.String(100), nullable=False, unique=True, index=True),
+    sa.Column("username", sa.String(50), nullable=True, unique=True, index=True),
+    sa.Column("hashed_password", sa.String(100), nullable=True),
+    sa.Column("is_superuser", sa.Boolean, nullable=False),
+    sa.Column("is_registered", sa.Boolean, nullable=False),
+    sa.Column("is_recruiter", sa.Boolean, nullable=False),
+    sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+)
+
+sa.Table(
+    "news",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("title", sa.Text, nullable=False),
+    sa.Column("content", sa.Text, nullable=False),
+    sa.Column("image_url", sa.String(500), nullable=True),
+    sa.Column("is_hidden", sa.Boolean, nullable=False),
+    sa.Column("created_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+    sa.Column("updated_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+)
+
+sa.Table(
+    "reviews",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("name", sa.String(100), nullable=False),
+    sa.Column("email", sa.String(100), nullable=False),
+    sa.Column("review", sa.Text, nullable=False),
+    sa.Column("is_approved", sa.Boolean, nullable=False),
+    sa.Column("created_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+)
+
+sa.Table(
+    "feedbacks",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("name", sa.String(100), nullable=False),
+    sa.Column("email", sa.String(100), nullable=False),
+    sa.Column("message", sa.String, nullable=True),
+    sa.Column("is_hidden", sa.Boolean, nullable=False),
+    sa.Column("created_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+)
+
+sa.Table(
+    "schedules",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("title", sa.String(200), nullable=False),
+    sa.Column("shift_number", sa.Integer, nullable=False),
+    sa.Column("description", sa.Text, nullable=True),
+    sa.Column("college_name", sa.String(255), nullable=False),
+    sa.Column("room_number", sa.String(50), nullable=False),
+    sa.Column("start_date", sa.Date, nullable=False),
+    sa.Column("end_date", sa.Date, nullable=False),
+)
+
+sa.Table(
+    "schedule_templates",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("college_id", sa.Integer, nullable=False),
+    sa.Column("college_name", sa.String(255), nullable=False),
+    sa.Column("schedule_data", sa.JSON, nullable=False),
+    sa.Column("is_active", sa.Boolean, nullable=False),
+)
+
+sa.Table(
+    "vacancies",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("title", sa.Text, nullable=False),
+    sa.Column("description", sa.Text, nullable=False),
+    sa.Column("direction", sa.String(100), nullable=False),
+    sa.Column("speciality", sa.Text, nullable=False),
+    sa.Column("requirements", sa.Text, nullable=False),
+    sa.Column("work_format", sa.String(50), nullable=False),
+    sa.Column("start", sa.DateTime, nullable=True),
+    sa.Column("end", sa.DateTime, nullable=True),
+    sa.Column("chart", sa.Text, nullable=False),
+    sa.Column("company_name", sa.String(200), nullable=False),
+    sa.Column("contact_person", sa.String(200), nullable=False),
+    sa.Column("is_hidden", sa.Boolean, nullable=False),
+    sa.Column("required_amount", sa.Integer, nullable=False),
+    sa.Column("salary_from", sa.Integer, nullable=True),
+    sa.Column("salary_to", sa.Integer, nullable=True),
+    sa.Column("address", sa.Text, nullable=True),
+    sa.Column("city", sa.String(100), nullable=True),
+    sa.Column("metro_station", sa.String(100), nullable=True),
+    sa.Column("is_internship", sa.Boolean, nullable=False),
+    sa.Column("recruiter_id", sa.Integer, sa.ForeignKey("users.id"), nullable=False),
+)
+
+sa.Table(
+    "students",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("full_name", sa.String(200), nullable=False),
+    sa.Column("birth_date", sa.Date, nullable=False),
+    sa.Column("speciality", sa.String(200), nullable=False),
+    sa.Column("phone", sa.String(20), nullable=False),
+    sa.Column("resume_link", sa.String(500), nullable=True),
+    sa.Column("resume_file", sa.String(500), nullable=True),
+    sa.Column("resume_file_extension", sa.String(10), nullable=True),
+    sa.Column(
+        "status",
+        sa.Enum("NEW", "IN_REVIEW", "INVITED", "REJECTED", name="applicationstatus"),
+        nullable=False,
+    ),
+    sa.Column("vacancy_id", sa.Integer, sa.ForeignKey("vacancies.id"), nullable=False),
+)
+
+sa.Table(
+    "partners",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("name", sa.String(255), nullable=False),
+    sa.Column("description", sa.Text, nullable=True),
+    sa.Column("image_url", sa.String(500), nullable=True),
+    sa.Column("is_active", sa.Boolean, nullable=False),
+    sa.Column("created_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+    sa.Column("updated_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+)
+
+sa.Table(
+    "colleges",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("name", sa.String(255), nullable=False, unique=True),
+    sa.Column("image_url", sa.String(500), nullable=False),
+    sa.Column("created_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+    sa.Column("updated_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+)
+
+sa.Table(
+    "actions",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("username", sa.String(50), nullable=False),
+    sa.Column("action", sa.String(100), nullable=False),
+    sa.Column("created_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    # checkfirst: базы, созданные через create_all, принимаются как есть
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,97 @@
+"""HTML и хэш шаблонов расписаний, задачи импорта, нормализованные записи расписания"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from app.db.migrations import add_column, create_index
+
+revision = "0002"
+down_revision = "0001"
+
+metadata = sa.MetaData()
+
+schedule_templates = sa.Table(
+    "schedule_templates",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("college_id", sa.Integer, nullable=False),
+    sa.Column("schedule_data", sa.JSON, nullable=False),
+    sa.Column("is_active", sa.Boolean, nullable=False),
+    sa.Column("content_hash", sa.String(64), nullable=True),
+)
+
+sa.Table(
+    "schedule_import_jobs",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("filename", sa.String(255), nullable=False),
+    sa.Column(
+        "status",
+        sa.Enum("PENDING", "RUNNING", "DONE", "FAILED", name="importjobstatus"),
+        nullable=False,
+    ),
+    sa.Column("progress", sa.Integer, nullable=False),
+    sa.Column("results", sa.JSON, nullable=True),
+    sa.Column("error", sa.Text, nullable=True),
+    sa.Column("created_by", sa.String(50), nullable=True),
+    sa.Column("created_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+    sa.Column("updated_at", sa.DateTime, server_default=sa.func.now(), nullable=False),
+)
+
+schedule_entries = sa.Table(
+    "schedule_entries",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("college_id", sa.Integer, nullable=False),
+    sa.Column(
+        "template_id",
+        sa.Integer,
+        sa.ForeignKey("schedule_templates.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    ),
+    sa.Column("group", sa.String(255), nullable=False),
+    sa.Column("discipline", sa.Text, nullable=False),
+    sa.Column("room", sa.String(100), nullable=False),
+    sa.Column("shift", sa.String(50), nullable=False),
+    sa.Column("auditory", sa.Text, nullable=False),
+    sa.Column("dates", sa.Text, nullable=False),
+    sa.Index("ix_schedule_entries_college_shift_room", "college_id", "shift", "room"),
+    sa.Index("ix_schedule_entries_college_group", "college_id", "group"),
+)
+
+ENTRY_FIELDS = ("group", "discipline", "room", "shift", "auditory", "dates")
+
+
+def upgrade(connection: Connection) -> None:
+    add_column(connection, "schedule_templates", sa.Column("html_content", sa.Text, nullable=True))
+    add_column(connection, "schedule_templates", sa.Column("content_hash", sa.String(64), nullable=True))
+    create_index(connection, sa.Index("ix_schedule_templates_college_id", schedule_templates.c.college_id))
+    create_index(connection, sa.Index("ix_schedule_templates_content_hash", schedule_templates.c.content_hash))
+
+    metadata.create_all(
+        connection,
+        tables=[metadata.tables["schedule_import_jobs"], schedule_entries],
+        checkfirst=True,
+    )
+
+    # Заполняем записи по уже загруженным активным шаблонам
+    if connection.execute(sa.select(sa.func.count()).select_from(schedule_entries)).scalar():
+        return
+    templates = connection.execute(
+        sa.select(
+            schedule_templates.c.id,
+            schedule_templates.c.college_id,
+            schedule_templates.c.schedule_data,
+        ).where(schedule_templates.c.is_active == sa.true())
+    )
+    rows = [
+        {
+            "college_id": college_id,
+            "template_id": template_id,
+            **{field: str(entry.get(field) or "") for field in ENTRY_FIELDS},
+        }
+        for template_id, college_id, schedule_data in templates
+        for entry in (schedule_data or {}).get("schedule", [])
+    ]
+    if rows:
+        connection.execute(sa.insert(schedule_entries), rows)
@@ -0,0 +1,22 @@
+"""Таблица отозванных JWT"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+revision = "0003"
+down_revision = "0002"
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "revoked_tokens",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("jti", sa.String(64), nullable=True, unique=True),
+    sa.Column("subject", sa.String(50), nullable=True),
+    sa.Column("revoked_at", sa.DateTime, nullable=False, index=True),
+    sa.Column("expires_at", sa.DateTime, nullable=False, index=True),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
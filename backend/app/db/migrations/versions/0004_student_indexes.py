@@ -0,0 +1,31 @@
+"""Индексы для выборки заявок рекрутера"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from app.db.migrations import create_index
+
+revision = "0004"
+down_revision = "0003"
+
+metadata = sa.MetaData()
+
+students = sa.Table(
+    "students",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("vacancy_id", sa.Integer, nullable=False),
+)
+
+vacancies = sa.Table(
+    "vacancies",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("recruiter_id", sa.Integer, nullable=False),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    create_index(
+        connection, sa.Index("ix_students_vacancy_id_id", students.c.vacancy_id, students.c.id)
+    )
+    create_index(connection, sa.Index("ix_vacancies_recruiter_id", vacancies.c.recruiter_id))
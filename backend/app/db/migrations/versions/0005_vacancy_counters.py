@@ -0,0 +1,60 @@
+"""Счетчики заявок по статусам в вакансиях"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from app.db.migrations import add_column
+
+revision = "0005"
+down_revision = "0004"
+
+metadata = sa.MetaData()
+
+# Колонка счетчика -> значение статуса в students.status (None — все заявки)
+COUNTERS = {
+    "applications_total": None,
+    "applications_new": "NEW",
+    "applications_in_review": "IN_REVIEW",
+    "applications_invited": "INVITED",
+    "applications_rejected": "REJECTED",
+}
+
+students = sa.Table(
+    "students",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column(
+        "status",
+        sa.Enum("NEW", "IN_REVIEW", "INVITED", "REJECTED", name="applicationstatus"),
+        nullable=False,
+    ),
+    sa.Column("vacancy_id", sa.Integer, nullable=False),
+)
+
+vacancies = sa.Table(
+    "vacancies",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    *(sa.Column(name, sa.Integer, nullable=False) for name in COUNTERS),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    for name in COUNTERS:
+        add_column(
+            connection,
+            "vacancies",
+            sa.Column(name, sa.Integer, nullable=False, server_default="0"),
+        )
+
+    # Заполняем счетчики по существующим заявкам
+    values = {}
+    for name, status in COUNTERS.items():
+        count = (
+            sa.select(sa.func.count())
+            .select_from(students)
+            .where(students.c.vacancy_id == vacancies.c.id)
+        )
+        if status is not None:
+            count = count.where(students.c.status == status)
+        values[name] = count.scalar_subquery()
+    connection.execute(sa.update(vacancies).values(**values))
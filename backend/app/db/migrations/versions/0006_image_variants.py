@@ -0,0 +1,13 @@
+"""Варианты изображений новостей, партнеров и колледжей"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from app.db.migrations import add_column
+
+revision = "0006"
+down_revision = "0005"
+
+
+def upgrade(connection: Connection) -> None:
+    for table_name in ("news", "partners", "colleges"):
+        add_column(connection, table_name, sa.Column("image_variants", sa.JSON, nullable=True))
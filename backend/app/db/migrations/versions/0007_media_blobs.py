@@ -0,0 +1,21 @@
+"""Таблица блобов контентно-адресуемого хранилища медиа"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+revision = "0007"
+down_revision = "0006"
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "media_blobs",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("blob_key", sa.String(255), nullable=False, unique=True),
+    sa.Column("ref_count", sa.Integer, nullable=False, server_default="0"),
+    sa.Column("updated_at", sa.DateTime, nullable=False, index=True),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
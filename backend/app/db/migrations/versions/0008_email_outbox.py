@@ -0,0 +1,33 @@
+"""Очередь исходящих писем"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+revision = "0008"
+down_revision = "0007"
+
+metadata = sa.MetaData()
+
+sa.Table(
+    "email_outbox",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("recipient", sa.String(255), nullable=False),
+    sa.Column("subject", sa.String(255), nullable=False),
+    sa.Column("body", sa.Text, nullable=False),
+    sa.Column("subtype", sa.String(10), nullable=False),
+    sa.Column(
+        "status",
+        sa.Enum("PENDING", "SENT", "FAILED", name="emailstatus"),
+        nullable=False,
+    ),
+    sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+    sa.Column("next_attempt_at", sa.DateTime, nullable=False),
+    sa.Column("last_error", sa.Text, nullable=True),
+    sa.Column("created_at", sa.DateTime, nullable=False),
+    sa.Column("sent_at", sa.DateTime, nullable=True, index=True),
+    sa.Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+)
+
+
+def upgrade(connection: Connection) -> None:
+    metadata.create_all(connection, checkfirst=True)
@@ -0,0 +1,12 @@
+"""HTML версия писем в очереди"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from app.db.migrations import add_column
+
+revision = "0009"
+down_revision = "0008"
+
+
+def upgrade(connection: Connection) -> None:
+    add_column(connection, "email_outbox", sa.Column("html_body", sa.Text, nullable=True))
@@ -0,0 +1,75 @@
+"""Текстовые колонки группы, кабинета и смены в записях расписания"""
+import sqlalchemy as sa
+from sqlalchemy.engine import Connection
+
+from app.db.migrations import create_index
+
+revision = "0010"
+down_revision = "0009"
+
+COLUMNS = ("group", "room", "shift")
+
+metadata = sa.MetaData()
+
+schedule_entries = sa.Table(
+    "schedule_entries_rebuild",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("college_id", sa.Integer, nullable=False),
+    sa.Column(
+        "template_id",
+        sa.Integer,
+        sa.ForeignKey("schedule_templates.id", ondelete="CASCADE"),
+        nullable=False,
+    ),
+    sa.Column("group", sa.Text, nullable=False),
+    sa.Column("discipline", sa.Text, nullable=False),
+    sa.Column("room", sa.Text, nullable=False),
+    sa.Column("shift", sa.Text, nullable=False),
+    sa.Column("auditory", sa.Text, nullable=False),
+    sa.Column("dates", sa.Text, nullable=False),
+)
+
+sa.Table(
+    "schedule_templates",
+    metadata,
+    sa.Column("id", sa.Integer, primary_key=True),
+)
+
+INDEXES = (
+    ("ix_schedule_entries_template_id", ("template_id",)),
+    ("ix_schedule_entries_college_shift_room", ("college_id", "shift", "room")),
+    ("ix_schedule_entries_college_group", ("college_id", "group")),
+)
+
+
+def _rebuild_table(connection: Connection) -> None:
+    # SQLite не умеет ALTER COLUMN: копируем записи в новую таблицу
+    schedule_entries.create(connection)
+    columns = ", ".join(
+        connection.dialect.identifier_preparer.quote(column.name)
+        for column in schedule_entries.columns
+    )
+    connection.execute(sa.text(
+        f"INSERT INTO schedule_entries_rebuild ({columns}) "
+        f"SELECT {columns} FROM schedule_entries"
+    ))
+    connection.execute(sa.text("DROP TABLE schedule_entries"))
+    connection.execute(sa.text(
+        "ALTER TABLE schedule_entries_rebuild RENAME TO schedule_entries"
+    ))
+    table = sa.Table("schedule_entries", sa.MetaData(), autoload_with=connection)
+    for name, columns in INDEXES:
+        create_index(connection, sa.Index(name, *(table.c[column] for column in columns)))
+
+
+def upgrade(connection: Connection) -> None:
+    if connection.dialect.name != "postgresql":
+        _rebuild_table(connection)
+        return
+    # Ограничения длины убираются без перезаписи таблицы и индексов
+    preparer = connection.dialect.identifier_preparer
+    alters = ", ".join(
+        f"ALTER COLUMN {preparer.quote(name)} TYPE TEXT" for name in COLUMNS
+    )
+    connection.execute(sa.text(f"ALTER TABLE schedule_entries {alters}"))
@@ -0,0 +1 @@
+"""Ревизии миграций схемы БД"""
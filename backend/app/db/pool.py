@@ -0,0 +1,79 @@
+import time
+from dataclasses import dataclass, asdict
+from typing import Any
+
+from sqlalchemy import event, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+
+@dataclass
+class PoolStats:
+    """Счетчики пула соединений с момента запуска процесса"""
+
+    checkouts: int = 0  # Выдано соединений
+    wait_time_total: float = 0.0  # Суммарное ожидание соединения, секунды
+    wait_time_max: float = 0.0  # Максимальное ожидание соединения, секунды
+    timeouts: int = 0  # Не дождались соединения за pool_timeout
+    connect_errors: int = 0  # Ошибки установки нового соединения
+    invalidations: int = 0  # Соединения, признанные нерабочими (в т.ч. pre-ping)
+
+
+class MeteredAsyncQueuePool(AsyncAdaptedQueuePool):
+    """Пул соединений, который считает время ожидания и ошибки выдачи соединений"""
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        recreated = "_dispatch" in kwargs
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+        if not recreated:
+            # При recreate() обработчики событий копируются из старого пула
+            event.listen(self, "invalidate", self._on_invalidate)
+
+    def recreate(self) -> "MeteredAsyncQueuePool":
+        pool = super().recreate()
+        # Счетчики переживают пересоздание пула (engine.dispose)
+        pool.stats = self.stats
+        return pool
+
+    def _on_invalidate(self, dbapi_connection, connection_record, exception) -> None:
+        self.stats.invalidations += 1
+
+    def _do_get(self):
+        # Внутренний повтор QueuePool._do_get при гонке учитывается как отдельная выдача
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.timeouts += 1
+            raise
+        except Exception:
+            self.stats.connect_errors += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.stats.wait_time_total += waited
+            self.stats.wait_time_max = max(self.stats.wait_time_max, waited)
+        self.stats.checkouts += 1
+        return connection
+
+
+def get_pool_metrics(engine: AsyncEngine) -> dict[str, Any]:
+    """Текущее состояние пула соединений движка и накопленные счетчики"""
+    pool = engine.pool
+    metrics: dict[str, Any] = {"pool_class": type(pool).__name__, "status": pool.status()}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        metrics.update(
+            pool_size=pool.size(),
+            checked_in=pool.checkedin(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    stats = getattr(pool, "stats", None)
+    if stats is not None:
+        metrics.update(asdict(stats))
+        attempts = stats.checkouts + stats.timeouts + stats.connect_errors
+        metrics["wait_time_avg"] = stats.wait_time_total / attempts if attempts else 0.0
+    return metrics
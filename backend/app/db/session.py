@@ -3,10 +3,19 @@ from typing import AsyncGenerator
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from app.core.config import settings
+from app.db.pool import MeteredAsyncQueuePool
 
 # Создаем асинхронный движок
 engine = create_async_engine(
-    str(settings.SQLALCHEMY_DATABASE_URI), echo=settings.DB_ECHO, future=True
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    echo=settings.DB_ECHO,
+    future=True,
+    poolclass=MeteredAsyncQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
 )
 
 # Создаем фабрику асинхронных сессий
@@ -3,11 +3,14 @@ from app.models.user import User
 from app.models.news import News
 from app.models.review import Review
 from app.models.feedback import Feedback
-from app.models.schedule import Schedule, ScheduleTemplate
+from app.models.schedule import Schedule, ScheduleTemplate, ScheduleEntry, ScheduleImportJob
 from app.models.vacancy import Vacancy
 from app.models.student import Student, ApplicationStatus
 from app.models.partner import Partner
 from app.models.college import College
+from app.models.revoked_token import RevokedToken
+from app.models.media_blob import MediaBlob
+from app.models.email_outbox import EmailOutbox, EmailStatus
 
 __all__ = [
     "Base",
@@ -17,9 +20,15 @@ __all__ = [
     "Feedback",
     "Schedule",
     "ScheduleTemplate",
+    "ScheduleEntry",
+    "ScheduleImportJob",
     "Vacancy",
     "Student",
     "ApplicationStatus",
     "Partner",
     "College",
+    "RevokedToken",
+    "MediaBlob",
+    "EmailOutbox",
+    "EmailStatus",
 ]
@@ -1,4 +1,4 @@
-from sqlalchemy import String
+from sqlalchemy import String, JSON
 from sqlalchemy.orm import Mapped, mapped_column
 
 from app.models.base import Base
@@ -15,5 +15,7 @@ class College(Base):
 
     name: Mapped[str] = mapped_column(String(255), nullable=False, unique=True)
     image_url: Mapped[str] = mapped_column(String(500), nullable=False)
+    # Варианты изображения: размер -> формат -> URL (app.utils.images)
+    image_variants: Mapped[dict | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[created_at]
     updated_at: Mapped[updated_at] 
\ No newline at end of file
@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import String, Text, Enum, Index
+from sqlalchemy.orm import Mapped, mapped_column
+import enum
+
+from app.models.base import Base
+
+
+class EmailStatus(str, enum.Enum):
+    """Статусы писем в очереди"""
+
+    PENDING = "pending"  # Ожидает отправки (в том числе повторной)
+    SENT = "sent"  # Отправлено
+    FAILED = "failed"  # Отправка невозможна или исчерпаны попытки
+
+
+class EmailOutbox(Base):
+    """
+    Письмо в очереди на отправку.
+    Письма отправляет фоновая задача (см. app.utils.email_outbox);
+    next_attempt_at — когда письмо можно (повторно) взять в отправку.
+    Все время хранится в UTC.
+    """
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        # Выборка очереди: WHERE status = 'PENDING' AND next_attempt_at <= now
+        Index("ix_email_outbox_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    recipient: Mapped[str] = mapped_column(String(255))
+    subject: Mapped[str] = mapped_column(String(255))
+    body: Mapped[str] = mapped_column(Text)
+    html_body: Mapped[str | None] = mapped_column(Text, nullable=True)  # HTML альтернатива body
+    subtype: Mapped[str] = mapped_column(String(10), default="plain")
+    status: Mapped[EmailStatus] = mapped_column(
+        Enum(EmailStatus), default=EmailStatus.PENDING
+    )
+    attempts: Mapped[int] = mapped_column(default=0, server_default="0")
+    next_attempt_at: Mapped[datetime]
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime]
+    sent_at: Mapped[datetime | None] = mapped_column(nullable=True, index=True)
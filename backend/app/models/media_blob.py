@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class MediaBlob(Base):
+    """
+    Файл контентно-адресуемого хранилища медиа.
+    blob_key — <папка>/ab/cd/<sha256> (путь без расширения относительно MEDIA_ROOT):
+    все файлы с этим префиксом (оригинал и варианты изображения) принадлежат блобу.
+    ref_count — сколько новостей, партнеров, колледжей и заявок ссылаются на файл;
+    блобы с нулевым счетчиком удаляет фоновая очистка. Время хранится в UTC.
+    """
+
+    __tablename__ = "media_blobs"
+
+    blob_key: Mapped[str] = mapped_column(String(255), unique=True)
+    ref_count: Mapped[int] = mapped_column(default=0, server_default="0")
+    updated_at: Mapped[datetime] = mapped_column(index=True)  # последнее изменение счетчика
@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from app.models.base import Base
+
+
+class RevokedToken(Base):
+    """
+    Отозванный JWT.
+    Запись с jti отзывает один токен; запись без jti отзывает все токены
+    пользователя (subject), выпущенные до revoked_at.
+    Все время хранится в UTC.
+    """
+
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str | None] = mapped_column(String(64), unique=True, nullable=True)
+    subject: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    revoked_at: Mapped[datetime] = mapped_column(index=True)
+    expires_at: Mapped[datetime] = mapped_column(index=True)  # после этого запись не нужна
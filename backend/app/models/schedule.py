@@ -1,9 +1,10 @@
 from datetime import date
-from sqlalchemy import String, Text, JSON
+from sqlalchemy import String, Text, JSON, Enum, ForeignKey, Index
 from sqlalchemy.orm import Mapped, mapped_column
+import enum
 
 from app.models.base import Base
-from app.db.custom_types import str_null_false
+from app.db.custom_types import str_null_false, created_at, updated_at
 
 
 class Schedule(Base):
@@ -25,7 +26,65 @@ class ScheduleTemplate(Base):
 
     __tablename__ = "schedule_templates"
 
-    college_id: Mapped[int] = mapped_column(nullable=False)
+    college_id: Mapped[int] = mapped_column(nullable=False, index=True)
     college_name: Mapped[str] = mapped_column(String(255), nullable=False)
     schedule_data: Mapped[dict] = mapped_column(JSON, nullable=False)
+    html_content: Mapped[str | None] = mapped_column(
+        Text, nullable=True
+    )  # Готовая HTML таблица, рендерится один раз при загрузке
+    content_hash: Mapped[str | None] = mapped_column(
+        String(64), nullable=True, index=True
+    )  # SHA-256 от записей расписания, версии колледжа не дублируются
     is_active: Mapped[bool] = mapped_column(default=True)
+
+
+class ScheduleEntry(Base):
+    """
+    Запись расписания активного шаблона в нормализованном виде.
+    Пересобирается при каждой активации шаблона колледжа
+    """
+
+    __tablename__ = "schedule_entries"
+    __table_args__ = (
+        Index("ix_schedule_entries_college_shift_room", "college_id", "shift", "room"),
+        Index("ix_schedule_entries_college_group", "college_id", "group"),
+    )
+
+    college_id: Mapped[int] = mapped_column(nullable=False)
+    template_id: Mapped[int] = mapped_column(
+        ForeignKey("schedule_templates.id", ondelete="CASCADE"), index=True
+    )
+    group: Mapped[str] = mapped_column(Text, default="")
+    discipline: Mapped[str] = mapped_column(Text, default="")
+    room: Mapped[str] = mapped_column(Text, default="")
+    shift: Mapped[str] = mapped_column(Text, default="")
+    auditory: Mapped[str] = mapped_column(Text, default="")
+    dates: Mapped[str] = mapped_column(Text, default="")
+
+
+class ImportJobStatus(str, enum.Enum):
+    """Статусы задач импорта расписаний"""
+
+    PENDING = "pending"  # Ожидает обработки
+    RUNNING = "running"  # Обрабатывается
+    DONE = "done"  # Завершена
+    FAILED = "failed"  # Ошибка
+
+
+class ScheduleImportJob(Base):
+    """Модель фоновой задачи импорта Excel файла с расписаниями"""
+
+    __tablename__ = "schedule_import_jobs"
+
+    filename: Mapped[str] = mapped_column(String(255))
+    status: Mapped[ImportJobStatus] = mapped_column(
+        Enum(ImportJobStatus), default=ImportJobStatus.PENDING
+    )
+    progress: Mapped[int] = mapped_column(default=0)  # Прогресс в процентах
+    results: Mapped[list | None] = mapped_column(
+        JSON, nullable=True
+    )  # Результаты по колледжам
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_by: Mapped[str | None] = mapped_column(String(50), nullable=True)
+    created_at: Mapped[created_at]
+    updated_at: Mapped[updated_at]
@@ -1,5 +1,5 @@
 from datetime import date
-from sqlalchemy import String, Text, ForeignKey, Enum
+from sqlalchemy import String, Text, ForeignKey, Enum, Index
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 import enum
 
@@ -38,3 +38,8 @@ class Student(Base):
     # Связь с вакансией
     vacancy_id: Mapped[int] = mapped_column(ForeignKey("vacancies.id"))
     vacancy: Mapped["Vacancy"] = relationship("Vacancy", back_populates="applications")
+
+    __table_args__ = (
+        # Выборка заявок по вакансиям с keyset пагинацией по id
+        Index("ix_students_vacancy_id_id", "vacancy_id", "id"),
+    )
@@ -25,6 +25,13 @@ class Vacancy(Base):
     )  # Контактное лицо от компании
     is_hidden: Mapped[bool] = mapped_column(default=False)
     required_amount: Mapped[int]  # Нужное кол-во студентов
+
+    # Счетчики заявок по статусам; обновляются вместе с заявками (app.crud.student)
+    applications_total: Mapped[int] = mapped_column(default=0, server_default="0")
+    applications_new: Mapped[int] = mapped_column(default=0, server_default="0")
+    applications_in_review: Mapped[int] = mapped_column(default=0, server_default="0")
+    applications_invited: Mapped[int] = mapped_column(default=0, server_default="0")
+    applications_rejected: Mapped[int] = mapped_column(default=0, server_default="0")
     
     # Новые поля для вакансий
     salary_from: Mapped[int | None] = mapped_column(Integer, nullable=True)  # Зарплата от
@@ -34,7 +41,7 @@ class Vacancy(Base):
     metro_station: Mapped[str | None] = mapped_column(String(100), nullable=True)  # Станция метро
     is_internship: Mapped[bool] = mapped_column(default=False)  # Флаг стажировки
 
-    recruiter_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    recruiter_id: Mapped[int] = mapped_column(ForeignKey("users.id"), index=True)
 
     recruiter: Mapped["User"] = relationship("User", back_populates="vacancies")
     applications: Mapped[list["Student"]] = relationship(
@@ -2,7 +2,6 @@ import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from pathlib import Path
 from datetime import timedelta
 import uvicorn
@@ -10,12 +9,18 @@ import uvicorn
 from app.core.config import settings
 from app.api.v1 import api_router
 from app.db.session import engine, async_session_maker, get_async_session
-from app.models import Base
+from app.db.migrations import upgrade_to_head, ensure_at_head
 from app.crud.user import get_user_by_email, create_user
 from app.schemas.user import UserCreate
 from app.core.security import create_registration_token
+from app.core.token_revocation import run_revocation_sync, sync_revoked_tokens
 from app.utils.email import send_registration_email
+from app.utils.email_outbox import run_email_worker
+from app.utils.email_templates import load_email_templates
 from app.utils.task_scheduler import run_periodic_task, actions_weekly_cleanup
+from app.utils.executors import shutdown_executors
+from app.utils.media import MediaFiles, serve_media
+from app.utils.media_sweeper import run_media_sweeper
 
 import logging
 logging.basicConfig(level=logging.DEBUG)
@@ -27,10 +32,14 @@ async def lifespan(app: FastAPI):
     Контекстный менеджер жизненного цикла приложения.
     Выполняется при запуске и остановке.
     """
-    # Удаляем все таблицы и создаем их заново при запуске
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.drop_all)
-        await conn.run_sync(Base.metadata.create_all)
+    # Применяем недостающие миграции; если схема актуальна — только проверка версии
+    if settings.DB_AUTO_MIGRATE:
+        await upgrade_to_head(engine)
+    else:
+        await ensure_at_head(engine)
+
+    # Компилируем шаблоны писем один раз (ошибки в шаблонах видны при запуске)
+    load_email_templates()
 
     # Запуск задачи очистки таблицы с событиями
     async def start_background_tasks():
@@ -39,7 +48,18 @@ async def lifespan(app: FastAPI):
 
     asyncio.create_task(start_background_tasks())
 
-    # Создаем директории для медиафайлов
+    # Загружаем список отозванных токенов и запускаем его синхронизацию
+    async with async_session_maker() as session:
+        await sync_revoked_tokens(session)
+    asyncio.create_task(run_revocation_sync())
+
+    # Очистка файлов хранилища медиа, на которые не осталось ссылок
+    asyncio.create_task(run_media_sweeper())
+
+    # Отправка очереди писем (эндпоинты только ставят письма в очередь)
+    asyncio.create_task(run_email_worker())
+
+    # Создаем директории для медиафайлов (и временных файлов при MEDIA_STORAGE=s3)
     media_root = Path(settings.MEDIA_ROOT)
     (media_root / "news").mkdir(parents=True, exist_ok=True)
     (media_root / "resumes").mkdir(parents=True, exist_ok=True)
@@ -65,11 +85,12 @@ async def lifespan(app: FastAPI):
             )
 
             # Отправляем email с приглашением
-            await send_registration_email(email_to=admin.email, token=token)
+            await send_registration_email(session, email_to=admin.email, token=token)
 
     yield
 
     # Очистка ресурсов при остановке
+    shutdown_executors()
     await engine.dispose()
 
 
@@ -90,8 +111,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Монтируем статические файлы
-app.mount("/media", StaticFiles(directory="media"), name="media")
+# Монтируем статические файлы; без локального каталога они отдаются из хранилища
+if settings.MEDIA_STORAGE == "local":
+    # Каталог MEDIA_ROOT создается при запуске (lifespan), поэтому не проверяем его здесь
+    app.mount(
+        "/media",
+        MediaFiles(directory=settings.MEDIA_ROOT, check_dir=False),
+        name="media",
+    )
+else:
+    app.add_api_route(
+        "/media/{key:path}", serve_media, methods=["GET"], include_in_schema=False
+    )
 
 # Подключаем роутеры
 app.include_router(api_router, prefix=settings.API_V1_STR)
@@ -7,6 +7,7 @@ class CollegeBase(BaseModel):
 
     name: str
     image_url: str
+    image_variants: dict[str, dict[str, str]] | None = None
 
 
 class CollegeCreate(CollegeBase):
@@ -20,6 +21,7 @@ class CollegeUpdate(BaseModel):
 
     name: str | None = None
     image_url: str | None = None
+    image_variants: dict[str, dict[str, str]] | None = None
 
 
 class CollegeInDB(CollegeBase):
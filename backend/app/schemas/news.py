@@ -8,6 +8,7 @@ class NewsBase(BaseModel):
     title: str
     content: str
     image_url: str | None = None
+    image_variants: dict[str, dict[str, str]] | None = None
     is_hidden: bool = False
 
 
@@ -23,6 +24,7 @@ class NewsUpdate(BaseModel):
     title: str | None = None
     content: str | None = None
     image_url: str | None = None
+    image_variants: dict[str, dict[str, str]] | None = None
     is_hidden: bool | None = None
 
 
@@ -8,6 +8,7 @@ class PartnerBase(BaseModel):
     name: str
     description: str | None = None
     image_url: str | None = None
+    image_variants: dict[str, dict[str, str]] | None = None
     is_active: bool = True
 
 
@@ -23,6 +24,7 @@ class PartnerUpdate(BaseModel):
     name: str | None = None
     description: str | None = None
     image_url: str | None = None
+    image_variants: dict[str, dict[str, str]] | None = None
     is_active: bool | None = None
 
 
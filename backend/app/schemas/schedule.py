@@ -1,7 +1,9 @@
-from datetime import date
+from datetime import date, datetime
 from typing import Any, Dict
 from pydantic import BaseModel, ConfigDict
 
+from app.models.schedule import ImportJobStatus
+
 
 class ScheduleBase(BaseModel):
     """Базовая схема расписания"""
@@ -49,7 +51,8 @@ class ScheduleTemplateBase(BaseModel):
 
 
 class ScheduleTemplateCreate(ScheduleTemplateBase):
-    pass
+    html_content: str | None = None
+    content_hash: str | None = None
 
 
 class ScheduleTemplateUpdate(ScheduleTemplateBase):
@@ -62,6 +65,23 @@ class ScheduleTemplateUpdate(ScheduleTemplateBase):
 class ScheduleTemplateInDB(ScheduleTemplateBase):
     id: int
     html_content: str | None = None
+    content_hash: str | None = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ScheduleEntryInDB(BaseModel):
+    """Схема записи расписания"""
+
+    id: int
+    college_id: int
+    template_id: int
+    group: str
+    discipline: str
+    room: str
+    shift: str
+    auditory: str
+    dates: str
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -69,3 +89,19 @@ class ScheduleTemplateInDB(ScheduleTemplateBase):
 class ScheduleUploadResponse(BaseModel):
     status: str
     data: list[dict[str, Any]]
+
+
+class ScheduleImportJobInDB(BaseModel):
+    """Схема задачи импорта расписаний"""
+
+    id: int
+    filename: str
+    status: ImportJobStatus
+    progress: int
+    results: list[dict[str, Any]] | None = None
+    error: str | None = None
+    created_by: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, EmailStr, ConfigDict
+from pydantic import BaseModel, EmailStr, ConfigDict, Field
 from datetime import datetime
 
 
@@ -52,6 +52,20 @@ class UserInDB(UserBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class UserBulkInvite(BaseModel):
+    """Схема для массового приглашения пользователей"""
+
+    emails: list[EmailStr] = Field(min_length=1, max_length=500)
+    is_recruiter: bool = False
+
+
+class UserBulkInviteResult(BaseModel):
+    """Результат массового приглашения"""
+
+    invited: list[UserInDB]  # новые и еще не зарегистрированные пользователи
+    skipped: list[EmailStr]  # уже зарегистрированные пользователи
+
+
 class UserWithToken(UserInDB):
     """Схема пользователя с токеном"""
 
@@ -1,92 +1,76 @@
-from pathlib import Path
-
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig
 from pydantic import EmailStr
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.utils.email_outbox import enqueue_email, enqueue_emails
+from app.utils.email_templates import RenderedEmail, get_email_template, render_email
 
 
-conf = ConnectionConfig(
-    MAIL_USERNAME=settings.MAIL_USERNAME,
-    MAIL_PASSWORD=settings.MAIL_PASSWORD,
-    MAIL_FROM=settings.MAIL_FROM,
-    MAIL_PORT=settings.MAIL_PORT,
-    MAIL_SERVER=settings.MAIL_SERVER,
-    MAIL_FROM_NAME=settings.PROJECT_NAME,
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    TEMPLATE_FOLDER=Path(__file__).parent / "email-templates",
-)
-
-fastmail = FastMail(conf)
-
-
-async def send_registration_email(email_to: EmailStr, token: str) -> None:
-    """Отправка email с приглашением для регистрации"""
-    registration_url = f"{settings.FRONTEND_URL}/register?token={token}"
-
-    message = MessageSchema(
-        subject="Приглашение для регистрации",
-        recipients=[email_to],
-        body=f"""
-            Здравствуйте!
-            
-            Вы получили это письмо, потому что ваш email был указан при создании учетной записи администратора.
-            
-            Для завершения регистрации, пожалуйста, перейдите по следующей ссылке:
-            {registration_url}
-            
-            Если вы не запрашивали создание учетной записи, просто проигнорируйте это письмо.
-            
-            С уважением,
-            Команда {settings.PROJECT_NAME}
-        """,
-        subtype="plain",
+async def _enqueue_rendered(db: AsyncSession, email_to: str, email: RenderedEmail) -> None:
+    await enqueue_email(
+        db,
+        recipient=email_to,
+        subject=email.subject,
+        body=email.text,
+        html_body=email.html,
     )
 
-    await fastmail.send_message(message)
 
-
-async def send_reset_password_email(email_to: str, token: str, username: str) -> None:
-    """Отправить email для сброса пароля"""
-    reset_link = f"{settings.FRONTEND_URL}/reset-password?token={token}"
-
-    message = MessageSchema(
-        subject="Сброс пароля",
-        recipients=[email_to],
-        body=f"""
-        Здравствуйте, {username}!
-        
-        Вы запросили сброс пароля. Для установки нового пароля перейдите по ссылке:
-        {reset_link}
-        
-        Если вы не запрашивали сброс пароля, проигнорируйте это письмо.
-        
-        Ссылка действительна в течение 24 часов.
-        """,
-        subtype="plain",
+def _registration_context(token: str) -> dict[str, str | None]:
+    return {
+        "username": None,
+        "registration_link": f"{settings.FRONTEND_URL}/register?token={token}",
+    }
+
+
+async def send_registration_email(db: AsyncSession, email_to: EmailStr, token: str) -> None:
+    """Отправка email с приглашением для регистрации (через очередь писем)"""
+    email = render_email(get_email_template("registration"), _registration_context(token))
+    await _enqueue_rendered(db, email_to, email)
+
+
+async def send_registration_emails(
+    db: AsyncSession, invitations: list[tuple[str, str]]
+) -> int:
+    """
+    Массовая отправка приглашений: invitations — пары (email, токен регистрации).
+    Шаблон компилируется один раз, письма ставятся в очередь одной транзакцией
+    """
+    template = get_email_template("registration")
+    emails = []
+    for email_to, token in invitations:
+        email = render_email(template, _registration_context(token))
+        emails.append(
+            {
+                "recipient": email_to,
+                "subject": email.subject,
+                "body": email.text,
+                "html_body": email.html,
+            }
+        )
+    return await enqueue_emails(db, emails)
+
+
+async def send_reset_password_email(
+    db: AsyncSession, email_to: str, token: str, username: str
+) -> None:
+    """Отправить email для сброса пароля (через очередь писем)"""
+    email = render_email(
+        get_email_template("reset_password"),
+        {
+            "username": username,
+            "reset_link": f"{settings.FRONTEND_URL}/reset-password?token={token}",
+        },
     )
+    await _enqueue_rendered(db, email_to, email)
 
-    await fastmail.send_message(message)
 
-
-async def send_feedback_response(email_to: str, name: str, response_text: str) -> None:
-    """Отправить ответ на обратную связь"""
-    message = MessageSchema(
-        subject="Ответ на ваше обращение",
-        recipients=[email_to],
-        body=f"""
-        Здравствуйте, {name}!
-        
-        Получен ответ на ваше обращение:
-        
-        {response_text}
-        
-        С уважением,
-        Администрация Руднево
-        """,
-        subtype="plain",
+async def send_feedback_response(
+    db: AsyncSession, email_to: str, name: str, response_text: str
+) -> None:
+    """Отправить ответ на обратную связь (через очередь писем)"""
+    email = render_email(
+        get_email_template("feedback_response"),
+        {"name": name, "response_text": response_text},
     )
-
-    await fastmail.send_message(message)
+    await _enqueue_rendered(db, email_to, email)
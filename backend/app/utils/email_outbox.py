@@ -0,0 +1,275 @@
+"""
+Очередь исходящих писем.
+
+Эндпоинты не ждут SMTP сервер: письмо записывается в таблицу email_outbox,
+а фоновая задача отправляет очередь пачками через одно постоянное
+SMTP соединение. Временные ошибки (недоступность сервера, коды 4xx)
+повторяются с экспоненциальной задержкой, постоянные (коды 5xx) сразу
+помечают письмо как неотправляемое. Письма берутся в отправку с блокировкой
+строк, поэтому несколько воркеров и реплик не отправят одно письмо дважды.
+"""
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from email.utils import formataddr, make_msgid
+from typing import Any
+
+import aiosmtplib
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import email_outbox as email_outbox_crud
+from app.db.session import async_session_maker
+from app.models.email_outbox import EmailOutbox
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Ошибки соединения: пачка прерывается, остальные письма ждут повтора
+_CONNECTION_ERRORS = (
+    aiosmtplib.SMTPConnectError,
+    aiosmtplib.SMTPServerDisconnected,
+    aiosmtplib.SMTPTimeoutError,
+    aiosmtplib.SMTPAuthenticationError,
+    OSError,
+    asyncio.TimeoutError,
+)
+
+_wakeup = asyncio.Event()
+_stats: dict[str, Any] = {
+    "sent_total": 0,
+    "retried_total": 0,
+    "failed_total": 0,
+    "smtp_connections": 0,
+    "last_error": None,
+    "last_sent_at": None,
+}
+_last_purge: float = 0.0
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+async def enqueue_email(
+    db: AsyncSession,
+    recipient: str,
+    subject: str,
+    body: str,
+    subtype: str = "plain",
+    html_body: str | None = None,
+) -> EmailOutbox:
+    """Поставить письмо в очередь и разбудить отправку в этом процессе"""
+    email = await email_outbox_crud.create_email(
+        db,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        subtype=subtype,
+        html_body=html_body,
+        now=_utcnow(),
+    )
+    _wakeup.set()
+    return email
+
+
+async def enqueue_emails(db: AsyncSession, emails: list[dict[str, Any]]) -> int:
+    """
+    Поставить в очередь пачку писем одной транзакцией.
+    emails — аргументы enqueue_email (recipient, subject, body, html_body)
+    """
+    if not emails:
+        return 0
+    await email_outbox_crud.create_emails(db, emails, now=_utcnow())
+    _wakeup.set()
+    return len(emails)
+
+
+def build_message(email: EmailOutbox) -> EmailMessage:
+    """MIME сообщение для письма из очереди"""
+    message = EmailMessage()
+    message["From"] = formataddr((settings.PROJECT_NAME, str(settings.MAIL_FROM)))
+    message["To"] = email.recipient
+    message["Subject"] = email.subject
+    message["Message-ID"] = make_msgid()
+    message.set_content(email.body, subtype=email.subtype)
+    if email.html_body:
+        # multipart/alternative: клиент покажет HTML, а без его поддержки — текст
+        message.add_alternative(email.html_body, subtype="html")
+    return message
+
+
+class SMTPSender:
+    """
+    Постоянное SMTP соединение: открывается при первой отправке,
+    переоткрывается после разрыва и закрывается после EMAIL_SMTP_IDLE_TIMEOUT простоя
+    """
+
+    def __init__(self):
+        self._smtp: aiosmtplib.SMTP | None = None
+        self._last_used = 0.0
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        credentials = {}
+        if settings.MAIL_USE_CREDENTIALS:
+            credentials = {
+                "username": settings.MAIL_USERNAME,
+                "password": settings.MAIL_PASSWORD,
+            }
+        smtp = aiosmtplib.SMTP(
+            hostname=settings.MAIL_SERVER,
+            port=settings.MAIL_PORT,
+            use_tls=settings.MAIL_SSL_TLS,
+            start_tls=settings.MAIL_STARTTLS,
+            validate_certs=settings.MAIL_VALIDATE_CERTS,
+            timeout=settings.EMAIL_SMTP_TIMEOUT,
+            **credentials,
+        )
+        await smtp.connect()
+        _stats["smtp_connections"] += 1
+        return smtp
+
+    async def send(self, message: EmailMessage) -> None:
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = await self._connect()
+        try:
+            await self._smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # Сервер закрыл простаивающее соединение: одна повторная попытка
+            self._smtp = await self._connect()
+            await self._smtp.send_message(message)
+        self._last_used = time.monotonic()
+
+    async def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except Exception:
+            smtp.close()
+
+    async def close_if_idle(self) -> None:
+        if time.monotonic() - self._last_used >= settings.EMAIL_SMTP_IDLE_TIMEOUT:
+            await self.close()
+
+
+def _retry_at(attempts: int, now: datetime) -> datetime | None:
+    """Время следующей попытки после attempts неудачных; None — попытки исчерпаны"""
+    if attempts >= settings.EMAIL_MAX_ATTEMPTS:
+        return None
+    delay = min(
+        settings.EMAIL_RETRY_BASE_DELAY * 2 ** (attempts - 1),
+        settings.EMAIL_RETRY_MAX_DELAY,
+    )
+    return now + timedelta(seconds=delay)
+
+
+def _is_permanent(error: Exception) -> bool:
+    # Коды 5xx: адрес отклонен, письмо не будет принято и при повторе
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(500 <= e.code < 600 for e in error.recipients)
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and 500 <= code < 600
+
+
+async def _record_failure(
+    db: AsyncSession, email: EmailOutbox, error: Exception, permanent: bool
+) -> None:
+    attempts = email.attempts + 1
+    retry_at = None if permanent else _retry_at(attempts, _utcnow())
+    await email_outbox_crud.mark_email_failed(db, email.id, str(error), retry_at)
+    _stats["last_error"] = str(error)
+    if retry_at is None:
+        _stats["failed_total"] += 1
+        logger.error(f"Письмо {email.id} для {email.recipient} не отправлено: {str(error)}")
+    else:
+        _stats["retried_total"] += 1
+        logger.warning(
+            f"Письмо {email.id} не отправлено (попытка {attempts}), "
+            f"повтор в {retry_at.isoformat()}: {str(error)}"
+        )
+
+
+async def process_outbox(db: AsyncSession, sender: SMTPSender) -> int:
+    """Отправить одну пачку писем. Возвращает количество отправленных"""
+    now = _utcnow()
+    emails = await email_outbox_crud.claim_emails(
+        db,
+        now=now,
+        lease_until=now + timedelta(seconds=settings.EMAIL_SEND_LEASE),
+        limit=settings.EMAIL_BATCH_SIZE,
+    )
+    sent_ids: list[int] = []
+    for index, email in enumerate(emails):
+        try:
+            await sender.send(build_message(email))
+        except _CONNECTION_ERRORS as e:
+            # Сервер недоступен: остальные письма пачки даже не пробуем
+            await sender.close()
+            await _record_failure(db, email, e, permanent=False)
+            rest = [other.id for other in emails[index + 1:]]
+            retry_at = _utcnow() + timedelta(seconds=settings.EMAIL_RETRY_BASE_DELAY)
+            await email_outbox_crud.postpone_emails(db, rest, retry_at, str(e))
+            break
+        except Exception as e:
+            await _record_failure(db, email, e, permanent=_is_permanent(e))
+        else:
+            sent_ids.append(email.id)
+
+    await email_outbox_crud.mark_emails_sent(db, sent_ids, _utcnow())
+    if sent_ids:
+        _stats["sent_total"] += len(sent_ids)
+        _stats["last_sent_at"] = _utcnow().isoformat()
+    return len(sent_ids)
+
+
+async def purge_sent_emails(db: AsyncSession) -> int:
+    """Удалить отправленные письма старше EMAIL_OUTBOX_RETENTION_DAYS"""
+    global _last_purge
+    _last_purge = time.monotonic()
+    deleted = await email_outbox_crud.delete_sent_emails(
+        db, sent_before=_utcnow() - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS)
+    )
+    if deleted:
+        logger.info(f"Удалено отправленных писем из очереди: {deleted}")
+    return deleted
+
+
+async def _wait_for_emails() -> None:
+    # Письма этого процесса будят отправку сразу, письма других реплик — по опросу
+    try:
+        await asyncio.wait_for(_wakeup.wait(), timeout=settings.EMAIL_OUTBOX_POLL_INTERVAL)
+    except asyncio.TimeoutError:
+        pass
+    _wakeup.clear()
+
+
+async def run_email_worker() -> None:
+    """Фоновая задача: отправка очереди писем"""
+    sender = SMTPSender()
+    try:
+        while True:
+            sent = 0
+            try:
+                async with async_session_maker() as db:
+                    sent = await process_outbox(db, sender)
+                    if time.monotonic() - _last_purge >= settings.EMAIL_OUTBOX_PURGE_INTERVAL:
+                        await purge_sent_emails(db)
+            except Exception as e:
+                _stats["last_error"] = str(e)
+                logger.error(f"Ошибка отправки очереди писем: {str(e)}")
+            # Пачка отправлена целиком — в очереди, скорее всего, есть еще письма.
+            # После ошибок ждем, чтобы не переподключаться к недоступному серверу в цикле
+            if sent < settings.EMAIL_BATCH_SIZE:
+                await sender.close_if_idle()
+                await _wait_for_emails()
+    finally:
+        await sender.close()
+
+
+async def get_email_outbox_metrics(db: AsyncSession) -> dict[str, Any]:
+    """Глубина очереди (общая для всех реплик) и счетчики отправки этого процесса"""
+    return {**await email_outbox_crud.get_outbox_stats(db, now=_utcnow()), **_stats}
@@ -0,0 +1,82 @@
+"""
+Шаблоны писем.
+
+Каждое письмо — пара шаблонов из папки email-templates: <имя>.html
+и <имя>.txt (текстовая альтернатива для почтовых клиентов без HTML).
+Шаблоны компилируются один раз при запуске приложения (load_email_templates)
+и дальше используются из памяти; при массовой рассылке один скомпилированный
+шаблон рендерится для всех получателей.
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import jinja2
+
+from app.core.config import settings
+
+TEMPLATE_FOLDER = Path(__file__).parent / "email-templates"
+
+# Имя шаблона -> тема письма
+EMAIL_SUBJECTS = {
+    "registration": "Приглашение для регистрации",
+    "reset_password": "Сброс пароля",
+    "feedback_response": "Ответ на ваше обращение",
+}
+
+
+@dataclass
+class EmailTemplate:
+    """Скомпилированные шаблоны одного письма"""
+
+    subject: str
+    html: jinja2.Template
+    text: jinja2.Template
+
+
+@dataclass
+class RenderedEmail:
+    """Письмо, готовое к постановке в очередь"""
+
+    subject: str
+    text: str
+    html: str
+
+
+_environment = jinja2.Environment(
+    loader=jinja2.FileSystemLoader(TEMPLATE_FOLDER),
+    # Экранируются только HTML шаблоны: в текстовой версии данные выводятся как есть
+    autoescape=jinja2.select_autoescape(enabled_extensions=("html",)),
+    # Опечатка в имени переменной — ошибка при рендеринге, а не пустое место в письме
+    undefined=jinja2.StrictUndefined,
+    keep_trailing_newline=True,
+    auto_reload=False,
+)
+_templates: dict[str, EmailTemplate] = {}
+
+
+def load_email_templates() -> None:
+    """Скомпилировать все шаблоны писем (при запуске: ошибки шаблонов видны сразу)"""
+    for name, subject in EMAIL_SUBJECTS.items():
+        _templates[name] = EmailTemplate(
+            subject=subject,
+            html=_environment.get_template(f"{name}.html"),
+            text=_environment.get_template(f"{name}.txt"),
+        )
+
+
+def get_email_template(name: str) -> EmailTemplate:
+    """Скомпилированный шаблон письма"""
+    if not _templates:
+        load_email_templates()
+    return _templates[name]
+
+
+def render_email(template: EmailTemplate, context: dict[str, Any]) -> RenderedEmail:
+    """Отрендерить письмо для одного получателя"""
+    context = {"project_name": settings.PROJECT_NAME, **context}
+    return RenderedEmail(
+        subject=template.subject,
+        text=template.text.render(context),
+        html=template.html.render(context),
+    )
@@ -0,0 +1,70 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import Any, Callable, Literal
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+ExecutorKind = Literal["process", "thread"]
+
+# Именованные пулы, создаются при первом обращении
+_executors: dict[str, Executor] = {}
+
+
+def get_executor(name: str, kind: ExecutorKind = "thread", max_workers: int | None = None) -> Executor:
+    """Получить (или создать) именованный пул потоков или процессов"""
+    executor = _executors.get(name)
+    if executor is None:
+        if kind == "process":
+            # spawn: дочерние процессы не наследуют потоки и event loop родителя
+            executor = ProcessPoolExecutor(
+                max_workers=max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        else:
+            executor = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=f"{name}-worker"
+            )
+        _executors[name] = executor
+        logger.info(f"Создан пул '{name}' ({kind}, max_workers={max_workers})")
+    return executor
+
+
+async def run_in_executor(
+    name: str,
+    func: Callable[..., Any],
+    *args: Any,
+    kind: ExecutorKind = "thread",
+    max_workers: int | None = None,
+    timeout: float | None = None,
+    **kwargs: Any,
+) -> Any:
+    """
+    Выполнить блокирующую функцию в именованном пуле, не блокируя event loop.
+    Для пула процессов func и аргументы должны сериализоваться (pickle).
+    При превышении timeout выбрасывается asyncio.TimeoutError; уже запущенная
+    задача в пуле при этом дорабатывает до конца.
+    """
+    executor = get_executor(name, kind=kind, max_workers=max_workers)
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(executor, partial(func, *args, **kwargs)),
+            timeout=timeout,
+        )
+    except BrokenProcessPool:
+        # Рабочий процесс упал — пересоздадим пул при следующем вызове
+        _executors.pop(name, None)
+        executor.shutdown(wait=False, cancel_futures=True)
+        raise
+
+
+def shutdown_executors(wait: bool = False) -> None:
+    """Остановить все пулы (вызывается при остановке приложения)"""
+    for executor in _executors.values():
+        executor.shutdown(wait=wait, cancel_futures=True)
+    _executors.clear()
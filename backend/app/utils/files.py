@@ -1,59 +1,203 @@
+import hashlib
 import os
+import shutil
 import uuid
+from dataclasses import dataclass
+from pathlib import Path
 
 from fastapi import HTTPException, UploadFile, status
-from PIL import Image
 
 from app.core.config import settings
+from app.crud import media_blob as media_blob_crud
+from app.db.session import async_session_maker
+from app.utils.executors import run_in_executor
+from app.utils.images import ImageVariants, build_image_variants, image_variant_names
+from app.utils.media import media_key
+from app.utils.storage import get_storage, run_file_io
 import logging
 
 
 logger = logging.getLogger(__name__)
 
 
-async def save_upload_file(
-    file: UploadFile, folder: str, max_size: int | None = None
-) -> str:
+@dataclass
+class StoredUpload:
+    """Загруженный файл, сохраненный в хранилище"""
+
+    url: str
+    key: str
+    size: int
+    sha256: str
+
+
+def _remove_quietly(file_path: Path) -> None:
+    try:
+        file_path.unlink(missing_ok=True)
+    except OSError:
+        logger.warning(f"Не удалось удалить файл {file_path}")
+
+
+async def stream_upload(
+    file: UploadFile, file_path: Path, max_size: int, too_large_detail: str
+) -> tuple[int, str]:
     """
-    Сохранить загруженный файл в указанную папку.
-    Возвращает путь к файлу.
+    Записать загрузку на диск частями, не держа ее целиком в памяти.
+    Запись прерывается, как только превышен max_size; недописанный файл удаляется.
+    Возвращает размер и sha256 содержимого.
     """
-    # Проверяем размер файла
-    max_size = max_size or settings.MAX_FILE_SIZE
-    content = await file.read()
+    too_large = HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail=too_large_detail
+    )
+    # Размер уже известен, если multipart парсер сохранил файл целиком
+    if file.size is not None and file.size > max_size:
+        raise too_large
 
-    if len(content) > max_size:
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        f = await run_file_io(open, file_path, "wb")
+    except OSError:
         raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Файл слишком большой."
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Ошибка при сохранении файла.",
         )
+    try:
+        while chunk := await file.read(settings.UPLOAD_CHUNK_SIZE):
+            size += len(chunk)
+            if size > max_size:
+                raise too_large
+            digest.update(chunk)
+            await run_file_io(f.write, chunk)
+        await run_file_io(f.close)
+    except BaseException as e:
+        f.close()
+        _remove_quietly(file_path)
+        if isinstance(e, OSError):
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Ошибка при сохранении файла.",
+            )
+        raise
+    return size, digest.hexdigest()
+
+
+# Временные файлы загрузок: имя итогового файла известно только после хэширования.
+# Они всегда на локальном диске (MEDIA_ROOT), даже если хранилище — S3
+TEMP_UPLOAD_FOLDER = ".uploads"
+
 
-    # Создаем директорию, если её нет
-    folder_path = settings.MEDIA_ROOT / folder
+def _temp_upload_path(suffix: str = ".upload") -> Path:
+    folder_path = settings.MEDIA_ROOT / TEMP_UPLOAD_FOLDER
     folder_path.mkdir(parents=True, exist_ok=True)
+    return folder_path / f"{uuid.uuid4()}{suffix}"
 
-    # Генерируем уникальное имя файла
-    ext = os.path.splitext(file.filename)[1]
-    filename = f"{uuid.uuid4()}{ext}"
-    file_path = folder_path / filename
 
-    # Сохраняем файл
+def blob_dir(folder: str, sha256: str) -> str:
+    """Папка блоба в хранилище: <папка>/ab/cd"""
+    return f"{folder}/{sha256[:2]}/{sha256[2:4]}"
+
+
+def _file_extension(file: UploadFile) -> str:
+    return os.path.splitext(file.filename or "")[1].lower()
+
+
+def _storage_error() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+        detail="Ошибка при сохранении файла.",
+    )
+
+
+async def _mark_blob(blob_key: str) -> None:
+    # Запись блоба фиксируется до записи файлов: очистка не сочтет их брошенными
+    async with async_session_maker() as db:
+        await media_blob_crud.touch_media_blob(db, blob_key)
+
+
+async def _touch_existing(keys: list[str]) -> bool:
+    # Все ли файлы уже есть в хранилище. Время изменения обновляется,
+    # чтобы очистка не удалила файлы до появления ссылки на них
+    storage = get_storage()
+    for key in keys:
+        if not await storage.touch(key):
+            return False
+    return True
+
+
+async def delete_stale_file(key: str, modified_before: float | None = None) -> bool:
+    """Удалить файл хранилища; modified_before — только если он не менялся с этого времени"""
+    storage = get_storage()
+    if modified_before is not None:
+        # Перепроверяем перед удалением: загрузка могла обновить файл после обхода
+        stored = await storage.stat(key)
+        if stored is None or stored.modified_at >= modified_before:
+            return False
+    return await storage.delete(key)
+
+
+async def remove_blob_files(blob_key: str, modified_before: float | None = None) -> int:
+    """Удалить файлы блоба (оригинал и варианты); modified_before — только старые"""
+    removed = 0
+    for stored in await get_storage().list_objects(blob_key):
+        if modified_before is not None and stored.modified_at >= modified_before:
+            continue
+        if await delete_stale_file(stored.key, modified_before):
+            removed += 1
+    return removed
+
+
+async def save_upload_stream(
+    file: UploadFile, folder: str, max_size: int | None = None
+) -> StoredUpload:
+    """
+    Сохранить загруженный файл в контентно-адресуемое хранилище:
+    <папка>/ab/cd/<sha256><расширение>. Повторная загрузка того же содержимого
+    не создает копию. Возвращает URL, ключ, размер и sha256 файла.
+    """
+    max_size = max_size or settings.MAX_FILE_SIZE
+    temp_path = _temp_upload_path()
+    size, sha256 = await stream_upload(file, temp_path, max_size, "Файл слишком большой.")
+
+    key = f"{blob_dir(folder, sha256)}/{sha256}{_file_extension(file)}"
     try:
-        with open(file_path, "wb") as f:
-            f.write(content)
+        await _mark_blob(f"{blob_dir(folder, sha256)}/{sha256}")
+        await get_storage().store_file(key, temp_path)
     except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="Ошибка при сохранении файла.",
-        )
+        logger.error(f"Не удалось сохранить файл {key}: {str(e)}")
+        raise _storage_error()
+    finally:
+        await run_file_io(_remove_quietly, temp_path)
+    return StoredUpload(url=f"/media/{key}", key=key, size=size, sha256=sha256)
+
+
+async def save_upload_file(
+    file: UploadFile, folder: str, max_size: int | None = None
+) -> str:
+    """
+    Сохранить загруженный файл в указанную папку.
+    Возвращает путь к файлу.
+    """
+    stored = await save_upload_stream(file, folder, max_size)
+    return stored.url
 
-    # Возвращаем путь к файлу
-    return f"/media/{folder}/{filename}"
 
+@dataclass
+class StoredImage:
+    """Сохраненное изображение и его варианты"""
 
-async def save_image(file: UploadFile, folder: str, max_size: int | None = None) -> str:
+    url: str
+    variants: ImageVariants
+
+
+async def save_image_variants(
+    file: UploadFile, folder: str, max_size: int | None = None
+) -> StoredImage:
     """
-    Сохранить изображение в указанную папку.
-    Возвращает URL для доступа к изображению.
+    Сохранить изображение в контентно-адресуемое хранилище вместе с вариантами
+    (thumb, medium, original; исходный формат и WebP).
+    Если такое изображение уже загружалось, варианты не строятся заново.
+    Перекодирование выполняется вне event loop (IMAGE_PROCESS_EXECUTOR)
+    во временной папке, затем варианты переносятся в хранилище.
     """
     logger.debug(f"filename: {file.filename}, content_type: {file.content_type}")
     if not file.content_type in settings.ALLOWED_IMAGE_TYPES:
@@ -63,45 +207,79 @@ async def save_image(file: UploadFile, folder: str, max_size: int | None = None)
         )
 
     max_size = max_size or settings.MAX_IMAGE_SIZE
-    content = await file.read()
+    temp_path = _temp_upload_path()
+    _, sha256 = await stream_upload(file, temp_path, max_size, "Изображение слишком большое.")
 
-    if len(content) > max_size:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Изображение слишком большое.",
-        )
+    directory = blob_dir(folder, sha256)
+    ext = _file_extension(file)
+    sizes = {
+        "thumb": settings.IMAGE_THUMB_SIZE,
+        "medium": settings.IMAGE_MEDIUM_SIZE,
+        "original": None,
+    }
+    variant_names = image_variant_names(sha256, ext, sizes)
+    names = [name for formats in variant_names.values() for name in formats.values()]
+    temp_dir = _temp_upload_path(suffix="")
 
-    # Создаем директорию, если её нет
-    folder_path = settings.MEDIA_ROOT / folder
-    folder_path.mkdir(parents=True, exist_ok=True)
-
-    # Генерируем уникальное имя файла
-    ext = os.path.splitext(file.filename)[1]
-    filename = f"{uuid.uuid4()}{ext}"
-    file_path = folder_path / filename
-
-    # Оптимизируем и сохраняем изображение
     try:
-        from io import BytesIO
-
-        image = Image.open(BytesIO(content))
-        image.save(file_path, optimize=True, quality=85)
+        await _mark_blob(f"{directory}/{sha256}")
+        if not await _touch_existing([f"{directory}/{name}" for name in names]):
+            await run_file_io(temp_dir.mkdir)
+            try:
+                # Оптимизируем изображение и строим варианты
+                await run_in_executor(
+                    "images",
+                    build_image_variants,
+                    str(temp_path),
+                    str(temp_dir),
+                    sha256,
+                    ext,
+                    sizes,
+                    f"/media/{directory}",
+                    kind=settings.IMAGE_PROCESS_EXECUTOR,
+                    max_workers=settings.IMAGE_PROCESS_WORKERS,
+                    timeout=settings.IMAGE_PROCESS_TIMEOUT,
+                )
+            except Exception as e:
+                logger.warning(f"Не удалось обработать изображение {file.filename}: {str(e)}")
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST, detail="Невалидное изображение."
+                )
+            storage = get_storage()
+            for name in names:
+                await storage.store_file(f"{directory}/{name}", temp_dir / name)
+    except HTTPException:
+        raise
     except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail="Невалидное изображение."
-        )
+        logger.error(f"Не удалось сохранить изображение {file.filename}: {str(e)}")
+        raise _storage_error()
+    finally:
+        await run_file_io(_remove_quietly, temp_path)
+        await run_file_io(shutil.rmtree, temp_dir, True)
 
+    variants = {
+        size: {fmt: f"/media/{directory}/{name}" for fmt, name in formats.items()}
+        for size, formats in variant_names.items()
+    }
     # Возвращаем URL для доступа к изображению
-    return f"/media/{folder}/{filename}"
+    return StoredImage(url=variants["original"]["native"], variants=variants)
+
+
+async def save_image(file: UploadFile, folder: str, max_size: int | None = None) -> str:
+    """
+    Сохранить изображение в указанную папку.
+    Возвращает URL для доступа к изображению.
+    """
+    stored = await save_image_variants(file, folder, max_size)
+    return stored.url
 
 
 async def delete_file(file_path: str) -> bool:
     """Удалить файл"""
     try:
-        full_path = settings.MEDIA_ROOT / file_path.lstrip("/media/")
-        if full_path.exists():
-            full_path.unlink()
-            return True
+        key = media_key(file_path)
+        if key is not None:
+            return await get_storage().delete(key)
     except Exception:
         pass
     return False
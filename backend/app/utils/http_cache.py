@@ -0,0 +1,104 @@
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Iterable
+
+from fastapi import Request, Response, status
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.config import settings
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def public_cache(max_age: int | None = None) -> str:
+    """Значение Cache-Control для публичных эндпоинтов"""
+    if max_age is None:
+        max_age = settings.PUBLIC_CACHE_MAX_AGE
+    return f"public, max-age={max_age}"
+
+
+def make_etag(data: Any) -> str:
+    """Слабый ETag по содержимому (SHA-1 от канонического JSON)"""
+    if not isinstance(data, bytes):
+        data = json.dumps(
+            data, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str
+        ).encode("utf-8")
+    return f'W/"{hashlib.sha1(data).hexdigest()}"'
+
+
+def rows_etag(rows: Iterable[Any]) -> str:
+    """ETag списка строк по парам (id, updated_at) без сериализации тела"""
+    return make_etag([(row.id, row.updated_at) for row in rows])
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверить заголовок If-None-Match (слабое сравнение)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    def opaque(tag: str) -> str:
+        tag = tag.strip()
+        return tag[2:] if tag.startswith("W/") else tag
+
+    return opaque(etag) in {opaque(tag) for tag in header.split(",")}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    """Ответ 304 Not Modified с валидаторами"""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
+
+
+def cached_response(
+    request: Request,
+    content: Any,
+    *,
+    schema: Any = None,
+    etag: str | None = None,
+    cache_control: str | None = None,
+    media_type: str = "application/json",
+) -> Response:
+    """
+    Сформировать ответ с ETag и Cache-Control.
+    Если клиент прислал совпадающий If-None-Match — возвращает 304 без тела.
+    content — ORM объекты (вместе со schema), модели/словари для JSON
+    или готовая строка для других media_type.
+    Если etag передан заранее (например, rows_etag), тело при 304 не сериализуется.
+    """
+    cache_control = cache_control or public_cache()
+
+    if etag is not None and etag_matches(request, etag):
+        return not_modified(etag, cache_control)
+
+    if media_type == "application/json":
+        if schema is not None:
+            adapter = _adapter(schema)
+            content = adapter.dump_python(
+                adapter.validate_python(content, from_attributes=True), mode="json"
+            )
+        body = json.dumps(
+            jsonable_encoder(content), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+    else:
+        body = content.encode("utf-8") if isinstance(content, str) else content
+
+    if etag is None:
+        etag = make_etag(body)
+        if etag_matches(request, etag):
+            return not_modified(etag, cache_control)
+
+    return Response(
+        content=body,
+        media_type=media_type,
+        headers={"ETag": etag, "Cache-Control": cache_control},
+    )
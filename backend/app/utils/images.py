@@ -0,0 +1,97 @@
+"""
+Варианты изображений для адаптивной выдачи.
+
+При загрузке изображение перекодируется в несколько размеров (thumb, medium,
+original), каждый — в исходном формате и в WebP. Функция build_image_variants
+выполняется в пуле процессов (см. IMAGE_PROCESS_EXECUTOR), поэтому модуль
+не зависит от FastAPI и БД.
+"""
+import os
+from typing import Literal
+
+from PIL import Image, ImageOps
+
+ImageSize = Literal["thumb", "medium", "original"]
+ImageFormat = Literal["native", "webp"]
+
+# Вариант изображения: размер -> формат -> URL
+ImageVariants = dict[str, dict[str, str]]
+
+# Форматы, которые PIL должен сохранять без альфа-канала
+_OPAQUE_FORMATS = {".jpg", ".jpeg"}
+
+
+def _prepare(image: Image.Image, ext: str) -> Image.Image:
+    # Палитра и CMYK плохо масштабируются и не сохраняются в WebP/JPEG как есть
+    if image.mode not in ("RGB", "RGBA", "L"):
+        has_alpha = image.mode in ("LA", "PA") or "transparency" in image.info
+        image = image.convert("RGBA" if has_alpha else "RGB")
+    if ext in _OPAQUE_FORMATS and image.mode == "RGBA":
+        image = image.convert("RGB")
+    return image
+
+
+def image_variant_names(
+    stem: str, ext: str, sizes: dict[str, int | None]
+) -> dict[str, dict[str, str]]:
+    """
+    Имена файлов вариантов: оригинал в исходном формате — <stem><ext>,
+    остальные — <stem>_<size><ext> и <stem>_<size>.webp
+    """
+    ext = ext.lower()
+    names = {}
+    for size in sizes:
+        suffix = "" if size == "original" else f"_{size}"
+        names[size] = {"native": f"{stem}{suffix}{ext}", "webp": f"{stem}{suffix}.webp"}
+    return names
+
+
+def build_image_variants(
+    source: str,
+    folder: str,
+    stem: str,
+    ext: str,
+    sizes: dict[str, int | None],
+    url_prefix: str,
+) -> ImageVariants:
+    """
+    Сохранить варианты изображения source в папку folder
+    (имена — см. image_variant_names).
+    sizes — максимальная сторона для каждого размера (None — без уменьшения).
+    Возвращает URL вариантов: {размер: {"native": url, "webp": url}}.
+    """
+    ext = ext.lower()
+    names = image_variant_names(stem, ext, sizes)
+    with Image.open(source) as opened:
+        # Учитываем поворот из EXIF: при сохранении метаданные не переносятся
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+
+    for size, max_side in sizes.items():
+        resized = image.copy()
+        if max_side:
+            resized.thumbnail((max_side, max_side), Image.LANCZOS)
+        _prepare(resized, ext).save(
+            os.path.join(folder, names[size]["native"]), optimize=True, quality=85
+        )
+        _prepare(resized, ".webp").save(
+            os.path.join(folder, names[size]["webp"]), "WEBP", quality=80, method=4
+        )
+    return {
+        size: {fmt: f"{url_prefix}/{name}" for fmt, name in formats.items()}
+        for size, formats in names.items()
+    }
+
+
+def image_variant_url(
+    image_url: str | None,
+    variants: ImageVariants | None,
+    size: ImageSize = "original",
+    image_format: ImageFormat = "native",
+) -> str | None:
+    """
+    URL нужного варианта изображения.
+    Для изображений, загруженных до появления вариантов, — исходный image_url
+    """
+    variant = (variants or {}).get(size, {}).get(image_format)
+    return variant or image_url
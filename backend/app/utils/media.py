@@ -0,0 +1,265 @@
+"""
+Отдача медиафайлов.
+
+Файлы берутся из хранилища (см. app.utils.storage). С локальным хранилищем
+они отдаются через FileResponse: сервер с расширением http.response.pathsend
+отправляет файл без копирования в приложение. С S3 файл передается потоком
+из хранилища, а приватные файлы можно отдавать переадресацией на временную
+подписанную ссылку. В обоих случаях поддерживаются запросы диапазонов (Range).
+Загруженные файлы называются по UUID или sha256 содержимого
+и не перезаписываются, поэтому по прямым URL /media/... они кэшируются
+как неизменяемые.
+Для эндпоинтов /{id}/image путь к изображению берется из кэша в памяти
+процесса, чтобы не обращаться к БД на каждый просмотр страницы.
+"""
+import os
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request, Response, status
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.types import Scope
+
+from app.core.config import settings
+from app.utils.http_cache import etag_matches, not_modified, public_cache
+from app.utils.storage import (
+    MediaStorage,
+    StoredObject,
+    get_storage,
+    guess_media_type,
+    normalize_key,
+)
+
+MEDIA_URL_PREFIX = "/media/"
+
+# Папки с публичными изображениями: имена файлов уникальны (UUID или sha256)
+PUBLIC_MEDIA_FOLDERS = {"news", "partners", "colleges"}
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def immutable_cache() -> str:
+    """Cache-Control для файлов, содержимое которых по этому URL не меняется"""
+    return f"public, max-age={settings.MEDIA_IMMUTABLE_MAX_AGE}, immutable"
+
+
+def media_key(url: str) -> str | None:
+    """
+    Ключ файла в хранилище по URL вида /media/<папка>/<файл>.
+    None, если URL указывает за пределы хранилища
+    """
+    relative = url[len(MEDIA_URL_PREFIX):] if url.startswith(MEDIA_URL_PREFIX) else url
+    return normalize_key(relative)
+
+
+def _content_disposition(filename: str) -> str:
+    return f"attachment; filename*=utf-8''{quote(filename)}"
+
+
+def _byte_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """
+    Диапазон из заголовка Range (только один диапазон).
+    None — отдать файл целиком; ValueError — диапазон за пределами файла
+    """
+    match = _RANGE_RE.match(header or "")
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            # Некорректный диапазон (bytes=5-3) игнорируется: отдаем файл целиком (RFC 9110)
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # bytes=-N: последние N байт
+        start, end = max(size - int(last), 0), size - 1
+    if start >= size:
+        raise ValueError("Диапазон за пределами файла")
+    return start, end
+
+
+def _stream_response(
+    request: Request,
+    storage: MediaStorage,
+    stored: StoredObject,
+    headers: dict[str, str],
+    media_type: str | None,
+) -> Response:
+    media_type = media_type or guess_media_type(stored.key)
+    headers["Accept-Ranges"] = "bytes"
+    if stored.size == 0:
+        return Response(b"", headers=headers, media_type=media_type)
+
+    try:
+        byte_range = _byte_range(request.headers.get("range"), stored.size)
+    except ValueError:
+        return Response(
+            status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+            headers={"Content-Range": f"bytes */{stored.size}"},
+        )
+    status_code = status.HTTP_200_OK
+    start, end = 0, stored.size - 1
+    if byte_range is not None:
+        status_code = status.HTTP_206_PARTIAL_CONTENT
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{stored.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    return StreamingResponse(
+        storage.iter_range(stored.key, start, end),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type,
+    )
+
+
+async def media_file_response(
+    request: Request,
+    url: str,
+    *,
+    not_found_detail: str,
+    cache_control: str | None = None,
+    media_type: str | None = None,
+    filename: str | None = None,
+    presigned: bool = False,
+) -> Response:
+    """
+    Ответ с файлом по его URL: ETag, Cache-Control, 304 по If-None-Match
+    и частичная отдача по Range. 404 с not_found_detail, если файла нет.
+    presigned — переадресовать на временную ссылку хранилища, если оно их поддерживает
+    """
+    storage = get_storage()
+    key = media_key(url)
+    stored = await storage.stat(key) if key else None
+    if stored is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found_detail)
+
+    if presigned:
+        presigned_url = await storage.presigned_url(
+            key, settings.MEDIA_PRESIGNED_URL_EXPIRE, filename
+        )
+        if presigned_url:
+            return RedirectResponse(
+                presigned_url,
+                status_code=status.HTTP_307_TEMPORARY_REDIRECT,
+                headers={"Cache-Control": "private, no-store"},
+            )
+
+    cache_control = cache_control or public_cache()
+    if etag_matches(request, stored.etag):
+        return not_modified(stored.etag, cache_control)
+
+    headers = {"ETag": stored.etag, "Cache-Control": cache_control}
+    path = storage.local_path(key)
+    if path is not None:
+        return FileResponse(path, media_type=media_type, filename=filename, headers=headers)
+    if filename:
+        headers["Content-Disposition"] = _content_disposition(filename)
+    return _stream_response(request, storage, stored, headers, media_type)
+
+
+async def serve_media(request: Request, key: str) -> Response:
+    """
+    /media/<ключ> для хранилищ без локального каталога (MEDIA_STORAGE=s3).
+    Кэширование — как у MediaFiles
+    """
+    folder = key.split("/", 1)[0]
+    cache_control = (
+        immutable_cache() if folder in PUBLIC_MEDIA_FOLDERS and "/" in key else "no-cache"
+    )
+    return await media_file_response(
+        request, key, not_found_detail="Файл не найден.", cache_control=cache_control
+    )
+
+
+class MediaFiles(StaticFiles):
+    """StaticFiles для /media: публичные изображения кэшируются как неизменяемые"""
+
+    def _top_folder(self, full_path: Any) -> str | None:
+        # Файлы хранилища лежат в подпапках (<папка>/ab/cd/<sha256>),
+        # поэтому берется первая папка относительно корня
+        try:
+            relative = Path(os.path.realpath(full_path)).relative_to(
+                os.path.realpath(self.directory)
+            )
+        except ValueError:
+            return None
+        return relative.parts[0] if len(relative.parts) > 1 else None
+
+    def file_response(
+        self,
+        full_path: Any,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if self._top_folder(full_path) in PUBLIC_MEDIA_FOLDERS:
+            response.headers["Cache-Control"] = immutable_cache()
+        return response
+
+
+class MediaPathCache:
+    """Ограниченный LRU кэш с TTL: (тип объекта, id) -> данные изображения"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items: OrderedDict[tuple[str, int], tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: tuple[str, int]) -> Any | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            self._items.pop(key, None)
+            return None
+        self._items.move_to_end(key)
+        return value
+
+    def set(self, key: tuple[str, int], value: Any) -> None:
+        if self.ttl <= 0:
+            return
+        self._items[key] = (time.monotonic() + self.ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def delete(self, key: tuple[str, int]) -> None:
+        self._items.pop(key, None)
+
+
+media_path_cache = MediaPathCache(
+    maxsize=settings.MEDIA_PATH_CACHE_MAXSIZE, ttl=settings.MEDIA_PATH_CACHE_TTL
+)
+
+CachedImage = tuple[str | None, dict | None]
+
+
+async def get_cached_image(
+    kind: str, object_id: int, load: Callable[[], Awaitable[Any]]
+) -> CachedImage | None:
+    """
+    (image_url, image_variants) объекта: из кэша или через load() из БД.
+    None — объект не найден (такой результат не кэшируется)
+    """
+    key = (kind, object_id)
+    image = media_path_cache.get(key)
+    if image is None:
+        obj = await load()
+        if obj is None:
+            return None
+        image = (obj.image_url, obj.image_variants)
+        media_path_cache.set(key, image)
+    return image
+
+
+def invalidate_cached_image(kind: str, object_id: int) -> None:
+    """Сбросить кэш изображения объекта (после изменения или удаления)"""
+    media_path_cache.delete((kind, object_id))
@@ -0,0 +1,130 @@
+"""
+Очистка контентно-адресуемого хранилища медиа.
+
+Файлы удаляются не сразу при снятии последней ссылки, а фоновой задачей
+спустя MEDIA_BLOB_GRACE_PERIOD: загрузка, которая прямо сейчас получила
+тот же файл, успевает создать ссылку, а отклоненная загрузка не удаляет
+файл, нужный другим записям. Кроме блобов с нулевым счетчиком удаляются
+файлы, на которые записей нет вовсе (загрузка завершилась ошибкой),
+и брошенные временные файлы загрузок.
+"""
+import asyncio
+import re
+import shutil
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.crud import media_blob as media_blob_crud
+from app.db.session import async_session_maker
+from app.utils.files import TEMP_UPLOAD_FOLDER, delete_stale_file, remove_blob_files
+from app.utils.storage import get_storage
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Папки хранилища; старые файлы с UUID именами лежат в их корне и не трогаются
+MEDIA_BLOB_FOLDERS = ("news", "partners", "colleges", "resumes")
+SWEEP_BATCH_SIZE = 500
+
+_BLOB_KEY_RE = re.compile(r"^[\w-]+/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}")
+
+
+async def _find_stale_blobs(modified_before: float) -> dict[str, list[str]]:
+    # Ключ блоба -> ключи его файлов, не менявшихся с modified_before
+    storage = get_storage()
+    stale: dict[str, list[str]] = {}
+    for folder in MEDIA_BLOB_FOLDERS:
+        for stored in await storage.list_objects(f"{folder}/"):
+            match = _BLOB_KEY_RE.match(stored.key)
+            if match and stored.modified_at < modified_before:
+                stale.setdefault(match.group(), []).append(stored.key)
+    return stale
+
+
+def _remove_stale_uploads(modified_before: float) -> int:
+    # Временные файлы и папки загрузок всегда на локальном диске
+    folder = settings.MEDIA_ROOT / TEMP_UPLOAD_FOLDER
+    if not folder.is_dir():
+        return 0
+    removed = 0
+    for path in folder.iterdir():
+        try:
+            if path.stat().st_mtime >= modified_before:
+                continue
+            if path.is_dir():
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                path.unlink()
+            removed += 1
+        except OSError:
+            continue
+    return removed
+
+
+async def sweep_media(db: AsyncSession) -> int:
+    """
+    Удалить блобы без ссылок старше MEDIA_BLOB_GRACE_PERIOD и файлы,
+    для которых нет записей. Возвращает количество удаленных файлов
+    """
+    grace_period = timedelta(seconds=settings.MEDIA_BLOB_GRACE_PERIOD)
+    released_before = datetime.now(timezone.utc).replace(tzinfo=None) - grace_period
+    modified_before = time.time() - grace_period.total_seconds()
+    removed = 0
+
+    # Отрицательный счетчик — рассинхронизация учета ссылок: файлы не трогаем
+    negative = await media_blob_crud.get_negative_media_blob_keys(db, limit=SWEEP_BATCH_SIZE)
+    if negative:
+        logger.warning(
+            f"Блобы с отрицательным счетчиком ссылок ({len(negative)}), "
+            f"не удаляются: {', '.join(negative[:10])}"
+        )
+
+    while True:
+        blobs = await media_blob_crud.get_unreferenced_media_blobs(
+            db, released_before, limit=SWEEP_BATCH_SIZE
+        )
+        for blob in blobs:
+            # Запись удаляется, только если ссылка так и не появилась
+            if not await media_blob_crud.delete_unreferenced_media_blob(
+                db, blob.id, released_before
+            ):
+                continue
+            removed += await remove_blob_files(blob.blob_key, modified_before)
+        if len(blobs) < SWEEP_BATCH_SIZE:
+            break
+
+    # Файлы без записей: загрузка не дошла до создания ссылки
+    stale = await _find_stale_blobs(modified_before)
+    blob_keys = list(stale)
+    known: set[str] = set()
+    # Ключи проверяются пачками: список IN не растет вместе с хранилищем
+    for start in range(0, len(blob_keys), SWEEP_BATCH_SIZE):
+        known |= await media_blob_crud.get_existing_blob_keys(
+            db, blob_keys[start:start + SWEEP_BATCH_SIZE]
+        )
+    for blob_key, keys in stale.items():
+        if blob_key in known:
+            continue
+        for key in keys:
+            removed += await delete_stale_file(key, modified_before)
+    removed += await run_in_threadpool(_remove_stale_uploads, modified_before)
+
+    if removed:
+        logger.info(f"Удалено файлов хранилища медиа без ссылок: {removed}")
+    return removed
+
+
+async def run_media_sweeper() -> None:
+    """Фоновая задача: периодическая очистка хранилища медиа"""
+    while True:
+        await asyncio.sleep(settings.MEDIA_SWEEP_INTERVAL)
+        try:
+            async with async_session_maker() as db:
+                await sweep_media(db)
+        except Exception as e:
+            logger.error(f"Ошибка очистки хранилища медиа: {str(e)}")
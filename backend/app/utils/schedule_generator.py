@@ -1,11 +1,20 @@
+import asyncio
 import os
+import html
+import hashlib
 import pandas as pd
 from openpyxl import load_workbook
 from typing import Dict, List, Any
 import jinja2
 from pathlib import Path
 import json
+import logging
+from collections import Counter
+from app.core.config import settings
 from app.crud import college as college_crud
+from app.utils.executors import run_in_executor
+
+logger = logging.getLogger(__name__)
 
 
 class ScheduleTemplateGenerator:
@@ -181,117 +190,138 @@ class ScheduleTemplateGenerator:
 schedule_generator = ScheduleTemplateGenerator() 
 
 
+# Excel ограничивает название листа 31 символом
+EXCEL_SHEET_NAME_LIMIT = 31
+
+
+def normalize_college_name(name: str) -> str:
+    """Нормализованное название колледжа для сопоставления с названием листа"""
+    name = str(name).casefold().replace("ё", "е")
+    for char in "«»\"'":
+        name = name.replace(char, "")
+    return " ".join(name.split())
+
+
+class CollegeIndex:
+    """
+    Индекс колледжей по нормализованному названию.
+    Строится один раз на импорт; обрезанные Excel названия листов (31 символ)
+    сопоставляются по однозначному префиксу.
+    """
+
+    def __init__(self, colleges: List[tuple[int, str]]):
+        self._by_name: Dict[str, tuple[int, str]] = {
+            normalize_college_name(name): (college_id, name)
+            for college_id, name in colleges
+        }
+
+    def match(self, sheet_name: str) -> tuple[int, str] | None:
+        """Найти (id, название) колледжа для листа или None"""
+        key = normalize_college_name(sheet_name)
+        college = self._by_name.get(key)
+        if college or len(sheet_name.strip()) < EXCEL_SHEET_NAME_LIMIT:
+            return college
+
+        candidates = [value for name, value in self._by_name.items() if name.startswith(key)]
+        return candidates[0] if len(candidates) == 1 else None
+
+
+def list_excel_sheets(file_path: str) -> List[str]:
+    """Названия листов Excel файла"""
+    with pd.ExcelFile(file_path) as excel_file:
+        return list(excel_file.sheet_names)
+
+
+def parse_excel_sheet(file_path: str, sheet_name: str) -> tuple[str, Dict[str, Any] | None]:
+    """
+    Синхронный разбор одного листа: возвращает (название листа, данные расписания).
+    Выполняется в пуле процессов/потоков, поэтому не обращается к БД.
+    """
+    df = pd.read_excel(file_path, sheet_name=sheet_name)
+    return sheet_name, process_sheet_data(df, sheet_name)
+
+
 async def process_excel_schedule(file_path: str, db_session=None) -> List[Dict[str, Any]]:
     """
-    Обрабатывает Excel файл с расписаниями и возвращает список JSON данных
-    для каждого колледжа. Более гибкая обработка - использует первый лист.
+    Обрабатывает Excel файл с расписаниями (лист на колледж) и возвращает
+    список JSON данных по листам. Листы разбираются параллельно вне event loop
+    (см. SCHEDULE_PARSE_EXECUTOR), запросы к БД остаются асинхронными.
+    Для листов, не сопоставленных с колледжем, college_id равен None.
     """
-    try:
-        # Читаем Excel файл через контекстный менеджер
-        with pd.ExcelFile(file_path) as excel_file:
-            results = []
-            # Получаем список активных колледжей из базы данных
-            available_colleges = set()
-            colleges_by_name = dict()
-            if db_session:
-                try:
-                    colleges = await college_crud.get_colleges_list(db_session)
-                    available_colleges = {college.name for college in colleges}
-                    colleges_by_name = {college.name: college.id for college in colleges}
-                except Exception as e:
-                    print(f"Ошибка при получении списка колледжей: {str(e)}")
-
-            print(f"=== DEBUG: Обработка Excel файла ===")
-            print(f"Доступные колледжи в БД: {available_colleges}")
-            print(f"Листы в Excel файле: {excel_file.sheet_names}")
-
-            # Используем только первый лист для гибкости
-            if not excel_file.sheet_names:
-                raise Exception("Excel файл не содержит листов")
-
-            sheet_name = excel_file.sheet_names[0]
-            print(f"\n--- Обрабатываем первый лист: '{sheet_name}' ---")
-
-            try:
-                # Читаем данные из листа через ExcelFile
-                df = pd.read_excel(excel_file, sheet_name=sheet_name)
-
-                # Обрабатываем данные и создаем JSON структуру
-                schedule_data = process_sheet_data(df, sheet_name)
-
-                if schedule_data:
-                    print(f"Успешно созданы данные для листа '{sheet_name}'")
-
-                    # Используем название листа как название колледжа
-                    college_name = sheet_name
-                    print(f"Используем название листа как название колледжа: '{college_name}'")
-
-                    # Проверяем, есть ли такой колледж в БД
-                    college_id = None
-                    if available_colleges and college_name in available_colleges:
-                        college_id = colleges_by_name.get(college_name)
-                    else:
-                        print(f"ВНИМАНИЕ: Колледж '{college_name}' не найден в базе данных!")
-                        print(f"Доступные колледжи: {available_colleges}")
-                        # Используем первый доступный колледж
-                        if available_colleges:
-                            college_name = list(available_colleges)[0]
-                            college_id = colleges_by_name.get(college_name)
-                            print(f"Используем первый доступный колледж: '{college_name}' (id={college_id})")
-                        else:
-                            print(f"ВНИМАНИЕ: Нет колледжей в базе данных!")
-                            # Создаем временное название
-                            college_name = f"Колледж_{sheet_name}"
-                            college_id = None
-                            print(f"Создаем временное название: '{college_name}' (id=None)")
-
-                    results.append({
-                        "college_id": college_id,
-                        "college_name": college_name,
-                        "schedule_data": schedule_data
-                    })
-                else:
-                    print(f"Не удалось создать данные для листа '{sheet_name}' - пустой результат")
-
-            except Exception as e:
-                print(f"Ошибка при обработке листа '{sheet_name}': {str(e)}")
-                raise
-
-            print(f"=== ИТОГОВЫЙ РЕЗУЛЬТАТ ===")
-            print(f"Обработано колледжей: {len(results)}")
-            for result in results:
-                print(f"  - {result['college_name']} (id={result['college_id']}): {len(result['schedule_data']['schedule'])} записей")
-
-            return results
-    except Exception as e:
-        print(f"Ошибка при обработке Excel файла: {str(e)}")
-        raise
+    college_index = CollegeIndex(
+        await college_crud.get_college_names(db_session) if db_session else []
+    )
+
+    executor_options = dict(
+        kind=settings.SCHEDULE_PARSE_EXECUTOR,
+        max_workers=settings.SCHEDULE_PARSE_WORKERS,
+    )
+
+    async def parse_all() -> List[tuple[str, Dict[str, Any] | None]]:
+        sheet_names = await run_in_executor(
+            "schedule", list_excel_sheets, str(file_path), **executor_options
+        )
+        if not sheet_names:
+            raise ValueError("Excel файл не содержит листов")
+        return await asyncio.gather(*(
+            run_in_executor(
+                "schedule", parse_excel_sheet, str(file_path), sheet_name, **executor_options
+            )
+            for sheet_name in sheet_names
+        ))
+
+    # Таймаут действует на весь файл, а не на каждый лист
+    parsed_sheets = await asyncio.wait_for(parse_all(), timeout=settings.SCHEDULE_PARSE_TIMEOUT)
+
+    results = []
+    for sheet_name, schedule_data in parsed_sheets:
+        if not schedule_data:
+            logger.warning(f"Не удалось создать данные для листа '{sheet_name}' - пустой результат")
+            continue
+
+        college = college_index.match(sheet_name)
+        if college is None:
+            logger.warning(f"Лист '{sheet_name}' не сопоставлен ни с одним колледжем")
+        college_id, college_name = college or (None, sheet_name)
+
+        results.append({
+            "sheet_name": sheet_name,
+            "college_id": college_id,
+            "college_name": college_name,
+            "schedule_data": schedule_data
+        })
+        logger.info(
+            f"Лист '{sheet_name}' -> '{college_name}' (id={college_id}): "
+            f"{len(schedule_data['schedule'])} записей"
+        )
+
+    return results
 
 
 def process_sheet_data(df: pd.DataFrame, sheet_name: str) -> Dict[str, Any]:
     """
     Обрабатывает данные из листа Excel и создает структурированный JSON
     """
-    print(f"  Обрабатываем данные для листа '{sheet_name}'")
-    print(f"  Исходный DataFrame: {df.shape[0]} строк, {df.shape[1]} колонок")
-    print(f"  Заголовки: {df.columns.tolist()}")
-    
+    logger.debug(
+        f"Лист '{sheet_name}': {df.shape[0]} строк, {df.shape[1]} колонок, "
+        f"заголовки: {df.columns.tolist()}"
+    )
+
     # Очищаем DataFrame
     df = df.dropna(how='all').dropna(axis=1, how='all')
-    print(f"  После очистки: {df.shape[0]} строк, {df.shape[1]} колонок")
-    
+
     # Если DataFrame пустой, возвращаем None
     if df.empty:
-        print(f"  DataFrame пустой после очистки")
+        logger.debug(f"Лист '{sheet_name}' пустой после очистки")
         return None
-    
+
     # Определяем структуру расписания
     schedule_structure = {
         "college_name": sheet_name,
         "last_updated": pd.Timestamp.now().isoformat(),
         "schedule": []
     }
-    
+
     # Обрабатываем данные в зависимости от структуры
     if len(df.columns) >= 2:
         # Предполагаем, что первая колонка - группа, остальные - данные расписания
@@ -299,128 +329,115 @@ def process_sheet_data(df: pd.DataFrame, sheet_name: str) -> Dict[str, Any]:
     else:
         # Простая структура - все данные в одной колонке
         schedule_structure["schedule"] = process_simple_schedule(df)
-    
-    print(f"  Создана структура с {len(schedule_structure['schedule'])} записями")
+
+    logger.debug(
+        f"Лист '{sheet_name}': создано {len(schedule_structure['schedule'])} записей"
+    )
     return schedule_structure
 
 
+SCHEDULE_FIELDS = ("discipline", "room", "shift", "auditory", "dates")
+
+# Правила сопоставления заголовков полям: (подстроки заголовка, поле).
+# Проверяются по порядку, срабатывает первое совпадение.
+STANDARD_HEADER_RULES = (
+    (("дисциплина",), "discipline"),
+    (("название аудитории",), "auditory"),
+    (("номер кабинета",), "room"),
+    (("смена",), "shift"),
+    (("даты",), "dates"),
+)
+
+SIMPLE_HEADER_RULES = (
+    (("аудитория", "зал"), "auditory"),
+    (("кабинет", "комната", "номер"), "room"),
+    (("смена",), "shift"),
+    (("даты", "дата", "период"), "dates"),
+    (("дисциплина", "предмет"), "discipline"),
+)
+
+
+def _match_header(header: Any, rules) -> str | None:
+    """Определить поле записи по заголовку колонки"""
+    header_lower = str(header).lower()
+    for keywords, field in rules:
+        if any(word in header_lower for word in keywords):
+            return field
+    return None
+
+
+def _cell_strings(column: pd.Series, strip: bool = True) -> tuple[pd.Series, pd.Series]:
+    """Маска непустых ячеек и их строковые значения (str + strip)"""
+    mask = column.notna()
+    present = column[mask]
+    if present.dtype.kind in "Oiufb":
+        # astype(str) дает тот же результат, что и str() для этих типов
+        strings = present.astype(str)
+    else:
+        # datetime и прочие типы форматируем через str(), как при построчном обходе
+        strings = present.map(str)
+    values = pd.Series("", index=column.index, dtype=object)
+    values[mask] = strings.str.strip() if strip else strings
+    return mask, values
+
+
+def _build_entries(groups: pd.Series, fields: Dict[str, pd.Series]) -> List[Dict[str, Any]]:
+    """Собрать список записей расписания из колонок"""
+    keys = ("group", "discipline", "room", "shift", "auditory", "dates")
+    columns = [groups.tolist()] + [fields[name].tolist() for name in keys[1:]]
+    return [dict(zip(keys, row)) for row in zip(*columns)]
+
+
+def _default_groups(index: pd.Index) -> pd.Series:
+    return pd.Series([f"Группа_{i + 1}" for i in index], index=index, dtype=object)
+
+
 def process_standard_schedule(df: pd.DataFrame) -> List[Dict[str, Any]]:
     """
     Обрабатывает стандартную структуру расписания и создает список записей
-    с конкретными полями для отображения
+    с конкретными полями для отображения.
+
+    Сопоставление заголовков полям выполняется один раз на лист,
+    значения собираются по колонкам. Если нескольким колонкам соответствует
+    одно поле, приоритет у последней непустой.
     """
-    schedule_entries = []
-    
-    # Получаем заголовки
-    headers = df.columns.tolist()
-    
-    # Отладочная информация
-    print(f"    === DEBUG: process_standard_schedule ===")
-    print(f"    Заголовки колонок: {headers}")
-    print(f"    Количество строк: {len(df)}")
-    print(f"    Первые 3 строки:")
-    print(df.head(3))
-    
-    # Обрабатываем каждую строку
-    for index, row in df.iterrows():
-        # Первая колонка - название группы
-        group_name = str(row.iloc[0]) if not pd.isna(row.iloc[0]) else f"Группа_{index+1}"
-        
-        # Ищем данные в остальных колонках строго по заголовкам
-        discipline = None
-        room = None
-        shift = None
-        auditory = None
-        dates = None
-        
-        # Проходим по всем колонкам и ищем нужные данные строго по заголовкам
-        for i, header in enumerate(headers[1:], 1):
-            cell_value = row.iloc[i]
-            if not pd.isna(cell_value):
-                cell_str = str(cell_value).strip()
-                
-                # Определяем тип данных строго по заголовку колонки
-                header_lower = str(header).lower()
-                
-                print(f"Строка {index}, колонка '{header}' (индекс {i}): '{cell_str}'")
-                
-                # Строгое соответствие заголовкам
-                if 'дисциплина' in header_lower:
-                    discipline = cell_str
-                    print(f"  -> Найдена дисциплина: {discipline}")
-                elif 'название аудитории' in header_lower:
-                    auditory = cell_str
-                    print(f"  -> Найдена аудитория: {auditory}")
-                elif 'номер кабинета' in header_lower:
-                    room = cell_str
-                    print(f"  -> Найден кабинет: {room}")
-                elif 'смена' in header_lower:
-                    shift = cell_str
-                    print(f"  -> Найдена смена: {shift}")
-                elif 'даты' in header_lower:
-                    dates = cell_str
-                    print(f"  -> Найдены даты: {dates}")
-        
-        # Создаем запись расписания
-        if group_name:
-            entry = {
-                "group": group_name,
-                "discipline": discipline or "",
-                "room": room or "",
-                "shift": shift or "",
-                "auditory": auditory or "",
-                "dates": dates or ""
-            }
-            schedule_entries.append(entry)
-            print(f"Создана запись: {entry}")
-    
-    print(f"    Всего создано записей: {len(schedule_entries)}")
-    return schedule_entries
+    # Первая колонка - название группы
+    group_mask, group_names = _cell_strings(df.iloc[:, 0], strip=False)
+    groups = _default_groups(df.index).where(~group_mask, group_names)
+
+    fields = {name: pd.Series("", index=df.index, dtype=object) for name in SCHEDULE_FIELDS}
+    for position, header in enumerate(df.columns[1:], 1):
+        field = _match_header(header, STANDARD_HEADER_RULES)
+        if field is None:
+            continue
+        mask, values = _cell_strings(df.iloc[:, position])
+        fields[field] = values.where(mask, fields[field])
+
+    entries = _build_entries(groups, fields)
+    entries = [entry for entry in entries if entry["group"]]
+    logger.debug(f"Заголовки: {df.columns.tolist()}, создано записей: {len(entries)}")
+    return entries
 
 
 def process_simple_schedule(df: pd.DataFrame) -> List[Dict[str, Any]]:
     """
-    Обрабатывает простую структуру расписания
+    Обрабатывает простую структуру расписания.
+    Колонка с нераспознанным заголовком заполняет дисциплину, если она еще пуста.
     """
-    schedule_entries = []
-    
-    # Просто преобразуем DataFrame в список записей
-    for index, row in df.iterrows():
-        entry = {
-            "group": f"Группа_{index+1}",
-            "discipline": "",
-            "room": "",
-            "shift": "",
-            "auditory": "",
-            "dates": ""
-        }
-        
-        # Заполняем данные из колонок
-        for col in df.columns:
-            if not pd.isna(row[col]):
-                cell_str = str(row[col]).strip()
-                col_lower = str(col).lower()
-                
-                # Сначала проверяем более специфичные условия
-                if any(word in col_lower for word in ['аудитория', 'зал']):
-                    entry["auditory"] = cell_str
-                elif any(word in col_lower for word in ['кабинет', 'комната', 'номер']):
-                    entry["room"] = cell_str
-                elif 'смена' in col_lower:
-                    entry["shift"] = cell_str
-                elif any(word in col_lower for word in ['даты', 'дата', 'период']):
-                    entry["dates"] = cell_str
-                elif any(word in col_lower for word in ['дисциплина', 'предмет']):
-                    entry["discipline"] = cell_str
-                else:
-                    # Если не определили тип, считаем это дисциплиной
-                    if not entry["discipline"]:
-                        entry["discipline"] = cell_str
-        
-        if entry["discipline"] or entry["room"] or entry["shift"] or entry["auditory"] or entry["dates"]:
-            schedule_entries.append(entry)
-    
-    return schedule_entries
+    fields = {name: pd.Series("", index=df.index, dtype=object) for name in SCHEDULE_FIELDS}
+    for position, header in enumerate(df.columns):
+        field = _match_header(header, SIMPLE_HEADER_RULES)
+        mask, values = _cell_strings(df.iloc[:, position])
+        if field is None:
+            field = "discipline"
+            mask = mask & (fields[field] == "")
+        fields[field] = values.where(mask, fields[field])
+
+    entries = _build_entries(_default_groups(df.index), fields)
+    return [
+        entry for entry in entries
+        if any(entry[name] for name in SCHEDULE_FIELDS)
+    ]
 
 
 def validate_schedule_data(schedule_data: Dict[str, Any]) -> bool:
@@ -457,4 +474,98 @@ def format_schedule_for_display(schedule_data: Dict[str, Any]) -> Dict[str, Any]
         "schedule": schedule_list
     }
     
-    return formatted 
\ No newline at end of file
+    return formatted
+
+
+SCHEDULE_TABLE_HEADER = """
+<style>
+.schedule-table { max-width: 90%; margin: 20px auto; border-collapse: collapse; }
+.schedule-table th, .schedule-table td { min-height: 80px; height: 80px; padding: 8px; border: 1px solid #ddd; }
+.group-badge { display: inline-block; background:#b6e388; color:#222; font-weight:600; font-size:18px; border-radius:16px; padding:2px 8px; margin:4px 0; text-align:center; }
+.discipline-text { font-size:16px; color:#222; font-weight:500; margin:4px 0; }
+.room-square { display:inline-block; background:#222; color:#fff; font-weight:700; font-size:18px; border-radius:12px; padding:6px 16px; margin:4px 0; }
+.auditory-text { font-size:16px; color:#222; font-weight:500; margin:4px 0; }
+.dates-text { font-size:16px; color:#e74c3c; font-weight:500; margin:4px 0; }
+</style>
+<table class="schedule-table">
+    <tr>
+        <th>Название</th>
+        <th>1 смена <span style="font-size:14px;font-weight:400;">08:15 – 09:50 • 10:30 – 12:05 • 12:15 – 13:50</span></th>
+        <th>2 смена <span style="font-size:14px;font-weight:400;">14:15 – 15:50 • 16:30 – 18:05 • 18:15 – 19:50</span></th>
+    </tr>
+"""
+
+
+def _render_shift_cell(entry: Dict[str, Any], shift: str) -> str:
+    """Ячейка смены: кабинет, аудитория и даты, если запись относится к смене"""
+    if str(entry.get("shift")) != shift:
+        return "<td></td>"
+
+    parts = ["<td>"]
+    if entry.get("room"):
+        parts.append(f'<div class="room-square">{html.escape(str(entry["room"]))} каб.</div>')
+    if entry.get("auditory"):
+        parts.append(f'<div class="auditory-text">{html.escape(str(entry["auditory"]))}</div>')
+    if entry.get("dates"):
+        parts.append(f'<div class="dates-text">{html.escape(str(entry["dates"]))}</div>')
+    parts.append("</td>")
+    return "".join(parts)
+
+
+def render_schedule_html(schedule_data: Dict[str, Any]) -> str:
+    """
+    Рендерит HTML таблицу расписания.
+    Вызывается один раз при загрузке шаблона, результат хранится в БД.
+    """
+    parts = [SCHEDULE_TABLE_HEADER]
+
+    for entry in schedule_data.get("schedule", []):
+        if not isinstance(entry, dict):
+            continue
+
+        # Первая колонка: группа (зелёный фон), под ней дисциплина (без фона)
+        parts.append("<tr><td>")
+        if entry.get("group"):
+            parts.append(f'<div class="group-badge">{html.escape(str(entry["group"]))}</div>')
+        if entry.get("discipline"):
+            parts.append(f'<div class="discipline-text">{html.escape(str(entry["discipline"]))}</div>')
+        parts.append("</td>")
+
+        parts.append(_render_shift_cell(entry, "1"))
+        parts.append(_render_shift_cell(entry, "2"))
+        parts.append("</tr>")
+
+    parts.append("</table>")
+    return "".join(parts)
+
+
+def schedule_content_hash(schedule_data: Dict[str, Any]) -> str:
+    """
+    SHA-256 от записей расписания в каноническом JSON.
+    Поле last_updated не учитывается, поэтому повторная загрузка того же
+    файла дает тот же хэш.
+    """
+    payload = json.dumps(
+        schedule_data.get("schedule", []),
+        ensure_ascii=False,
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def schedule_rows_diff(old_data: Dict[str, Any] | None, new_data: Dict[str, Any]) -> Dict[str, int]:
+    """Построчное сравнение двух версий расписания: число добавленных и удаленных записей"""
+
+    def rows(data: Dict[str, Any] | None) -> Counter:
+        return Counter(
+            json.dumps(row, ensure_ascii=False, sort_keys=True, default=str)
+            for row in (data or {}).get("schedule", [])
+        )
+
+    old_rows, new_rows = rows(old_data), rows(new_data)
+    return {
+        "added": sum((new_rows - old_rows).values()),
+        "removed": sum((old_rows - new_rows).values()),
+    }
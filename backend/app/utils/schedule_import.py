@@ -0,0 +1,166 @@
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud import schedule as schedule_crud
+from app.db.session import async_session_maker
+from app.models.schedule import ImportJobStatus
+from app.schemas.schedule import ScheduleTemplateCreate
+from app.utils.schedule_generator import (
+    process_excel_schedule,
+    validate_schedule_data,
+    render_schedule_html,
+    schedule_content_hash,
+    schedule_rows_diff,
+)
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+TEMP_UPLOAD_DIR = Path("temp_uploads")
+
+ProgressCallback = Callable[[int], Awaitable[None]]
+
+
+async def save_temp_upload(file: UploadFile) -> Path:
+    """Сохранить загруженный Excel файл во временную папку под уникальным именем"""
+    TEMP_UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    ext = os.path.splitext(file.filename)[1]
+    file_path = TEMP_UPLOAD_DIR / f"{uuid.uuid4()}{ext}"
+
+    def copy() -> None:
+        file.file.seek(0)
+        with open(file_path, "wb") as f:
+            shutil.copyfileobj(file.file, f, 1024 * 1024)
+
+    await run_in_threadpool(copy)
+    return file_path
+
+
+async def import_schedule_file(
+    db: AsyncSession, file_path: str | Path, on_progress: ProgressCallback | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Разобрать Excel файл и сохранить шаблоны расписаний.
+    Возвращает результаты по колледжам.
+    """
+
+    async def progress(value: int) -> None:
+        if on_progress:
+            await on_progress(value)
+
+    await progress(10)
+    # Обрабатываем файл (листы разбираются параллельно) и получаем JSON данные
+    processed_data = await process_excel_schedule(str(file_path), db)
+    await progress(60)
+
+    matched_by_college: Dict[int, Dict[str, Any]] = {}
+    skipped = []
+    for item in processed_data:
+        if not item["college_id"]:
+            skipped.append({"sheet": item["sheet_name"], "reason": "колледж не найден"})
+        elif not validate_schedule_data(item["schedule_data"]):
+            skipped.append({"sheet": item["sheet_name"], "reason": "некорректные данные"})
+        else:
+            # Несколько листов одного колледжа: берем последний, иначе в одной
+            # транзакции появятся два активных шаблона и дубли записей расписания
+            previous = matched_by_college.pop(item["college_id"], None)
+            if previous is not None:
+                skipped.append({
+                    "sheet": previous["sheet_name"],
+                    "reason": f"колледж повторяется на листе {item['sheet_name']}",
+                })
+            matched_by_college[item["college_id"]] = item
+    matched = list(matched_by_college.values())
+
+    if not matched:
+        raise ValueError(
+            "Ни один лист не сопоставлен с колледжем: названия листов "
+            "должны совпадать с названиями колледжей"
+        )
+
+    # Сравниваем с активными версиями: неизменившиеся расписания не пишем
+    active_templates = await schedule_crud.get_active_schedule_templates_by_college_ids(
+        db, [item["college_id"] for item in matched]
+    )
+    unchanged = []
+    templates_to_create = []
+    diffs = {}
+    for item in matched:
+        content_hash = schedule_content_hash(item["schedule_data"])
+        active = active_templates.get(item["college_id"])
+        # У шаблонов, созданных до появления content_hash, считаем хэш на лету
+        if active is not None and (
+            active.content_hash or schedule_content_hash(active.schedule_data)
+        ) == content_hash:
+            unchanged.append(active)
+            continue
+
+        diffs[item["college_id"]] = schedule_rows_diff(
+            active.schedule_data if active is not None else None, item["schedule_data"]
+        )
+        templates_to_create.append(
+            ScheduleTemplateCreate(
+                college_id=item["college_id"],
+                college_name=item["college_name"],
+                schedule_data=item["schedule_data"],
+                html_content=render_schedule_html(item["schedule_data"]),
+                content_hash=content_hash,
+                is_active=True,
+            )
+        )
+    await progress(80)
+
+    # Деактивируем старые шаблоны и создаем/активируем новые в одной транзакции
+    saved_templates = await schedule_crud.replace_schedule_templates(
+        db, templates=templates_to_create
+    )
+    await progress(100)
+
+    def result(template, changes: Dict[str, int] | None) -> Dict[str, Any]:
+        return {
+            "college": template.college_name,
+            "college_id": template.college_id,
+            "id": template.id,
+            "is_active": template.is_active,
+            "entries": len(template.schedule_data.get("schedule", [])),
+            "changed": changes is not None,
+            **(changes or {"added": 0, "removed": 0}),
+        }
+
+    results = [result(template, diffs[template.college_id]) for template in saved_templates]
+    results.extend(result(template, None) for template in unchanged)
+    results.extend({"skipped": True, **item} for item in skipped)
+    return results
+
+
+async def run_import_job(job_id: int, file_path: str | Path) -> None:
+    """Выполнить задачу импорта в фоне (собственная сессия БД)"""
+    async with async_session_maker() as db:
+        async def on_progress(value: int) -> None:
+            await schedule_crud.update_import_job(db, job_id, progress=value)
+
+        try:
+            await schedule_crud.update_import_job(
+                db, job_id, status=ImportJobStatus.RUNNING, progress=0
+            )
+            results = await import_schedule_file(db, file_path, on_progress=on_progress)
+            await schedule_crud.update_import_job(
+                db, job_id, status=ImportJobStatus.DONE, progress=100, results=results
+            )
+        except Exception as e:
+            logger.exception(f"Ошибка задачи импорта расписаний {job_id}")
+            await db.rollback()
+            await schedule_crud.update_import_job(
+                db, job_id, status=ImportJobStatus.FAILED, error=str(e) or repr(e)
+            )
+        finally:
+            if os.path.exists(file_path):
+                os.remove(file_path)
@@ -0,0 +1,369 @@
+"""
+Хранилище медиафайлов.
+
+Все операции с медиафайлами (запись, чтение, удаление, перечисление) идут
+через backend хранилища: LocalStorage — каталог MEDIA_ROOT на диске,
+S3Storage — бакет S3-совместимого хранилища (AWS S3, MinIO). С S3 несколько
+реплик backend работают без общего тома, а MEDIA_ROOT используется только
+для временных файлов загрузок. Ключ файла — путь относительно корня
+хранилища, он же часть URL /media/<ключ>.
+Пакет boto3 нужен только для S3 и импортируется при выборе этого backend.
+"""
+import mimetypes
+import os
+import posixpath
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator
+from urllib.parse import quote
+
+from starlette.concurrency import iterate_in_threadpool
+
+from app.core.config import settings
+from app.utils.executors import run_in_executor
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+async def run_file_io(func, *args):
+    """Выполнить блокирующую операцию с файлами вне event loop"""
+    return await run_in_executor(
+        "file-io", func, *args, max_workers=settings.FILE_IO_WORKERS
+    )
+
+
+def normalize_key(key: str) -> str | None:
+    """Ключ без ведущего /; None, если ключ выходит за корень хранилища"""
+    key = posixpath.normpath(key.lstrip("/"))
+    if key in (".", "") or key == ".." or key.startswith("../"):
+        return None
+    return key
+
+
+def guess_media_type(key: str) -> str:
+    return mimetypes.guess_type(key)[0] or "application/octet-stream"
+
+
+@dataclass
+class StoredObject:
+    """Файл в хранилище"""
+
+    key: str
+    size: int
+    modified_at: float  # unix time
+    etag: str
+
+
+class MediaStorage:
+    """Интерфейс backend хранилища медиафайлов"""
+
+    def local_path(self, key: str) -> Path | None:
+        """Путь к файлу на диске, если хранилище локальное"""
+        return None
+
+    async def store_file(self, key: str, source: Path) -> None:
+        """
+        Переместить локальный файл source в хранилище под ключом key.
+        Содержимое по ключу не меняется: если файл уже есть, он не перезаписывается,
+        а только обновляется время изменения (см. touch)
+        """
+        raise NotImplementedError
+
+    async def touch(self, key: str) -> bool:
+        """Обновить время изменения файла; False, если файла нет"""
+        raise NotImplementedError
+
+    async def stat(self, key: str) -> StoredObject | None:
+        raise NotImplementedError
+
+    async def delete(self, key: str) -> bool:
+        raise NotImplementedError
+
+    async def list_objects(self, prefix: str) -> list[StoredObject]:
+        """Файлы, ключ которых начинается с prefix"""
+        raise NotImplementedError
+
+    def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Прочитать байты start..end (включительно) частями"""
+        raise NotImplementedError
+
+    async def presigned_url(
+        self, key: str, expires_in: int, filename: str | None = None
+    ) -> str | None:
+        """Временная ссылка на скачивание в обход приложения; None — не поддерживается"""
+        return None
+
+
+class LocalStorage(MediaStorage):
+    """Файлы в каталоге на диске"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+
+    def local_path(self, key: str) -> Path | None:
+        root = self.root.resolve()
+        path = (root / key.lstrip("/")).resolve()
+        if not path.is_relative_to(root):
+            return None
+        return path
+
+    def _path(self, key: str) -> Path:
+        path = self.local_path(key)
+        if path is None:
+            raise ValueError(f"Недопустимый ключ файла: {key}")
+        return path
+
+    def _store_file(self, key: str, source: Path) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            os.utime(path)
+            source.unlink(missing_ok=True)
+        else:
+            os.replace(source, path)
+
+    async def store_file(self, key: str, source: Path) -> None:
+        await run_file_io(self._store_file, key, source)
+
+    def _touch(self, key: str) -> bool:
+        try:
+            os.utime(self._path(key))
+        except FileNotFoundError:
+            return False
+        return True
+
+    async def touch(self, key: str) -> bool:
+        return await run_file_io(self._touch, key)
+
+    def _object(self, key: str, stat_result: os.stat_result) -> StoredObject:
+        return StoredObject(
+            key=key,
+            size=stat_result.st_size,
+            modified_at=stat_result.st_mtime,
+            etag=f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"',
+        )
+
+    def _stat(self, key: str) -> StoredObject | None:
+        path = self.local_path(key)
+        try:
+            stat_result = os.stat(path) if path else None
+        except OSError:
+            return None
+        if stat_result is None or not os.path.isfile(path):
+            return None
+        return self._object(key, stat_result)
+
+    async def stat(self, key: str) -> StoredObject | None:
+        return await run_file_io(self._stat, key)
+
+    def _delete(self, key: str) -> bool:
+        path = self.local_path(key)
+        if path is None or not path.is_file():
+            return False
+        path.unlink(missing_ok=True)
+        return True
+
+    async def delete(self, key: str) -> bool:
+        return await run_file_io(self._delete, key)
+
+    def _list_objects(self, prefix: str) -> list[StoredObject]:
+        # Обходим только папку префикса, а не весь MEDIA_ROOT
+        directory = self._path(posixpath.dirname(prefix) or ".")
+        if not directory.is_dir():
+            return []
+        root = self.root.resolve()
+        objects = []
+        for dirpath, _, filenames in os.walk(directory):
+            for filename in filenames:
+                path = Path(dirpath) / filename
+                key = path.relative_to(root).as_posix()
+                if not key.startswith(prefix):
+                    continue
+                try:
+                    objects.append(self._object(key, path.stat()))
+                except OSError:
+                    # Файл удален во время обхода
+                    continue
+        return objects
+
+    async def list_objects(self, prefix: str) -> list[StoredObject]:
+        return await run_file_io(self._list_objects, prefix)
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        f = await run_file_io(open, self._path(key), "rb")
+        try:
+            await run_file_io(f.seek, start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = await run_file_io(f.read, min(settings.UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+        finally:
+            await run_file_io(f.close)
+
+
+class S3Storage(MediaStorage):
+    """Файлы в бакете S3-совместимого хранилища (boto3 вызывается вне event loop)"""
+
+    def __init__(self, client: Any, bucket: str):
+        self.client = client
+        self.bucket = bucket
+
+    @staticmethod
+    def _not_found(error: Exception) -> bool:
+        code = getattr(error, "response", {}).get("Error", {}).get("Code")
+        return code in ("404", "NoSuchKey", "NotFound")
+
+    def _head(self, key: str) -> dict | None:
+        try:
+            return self.client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if self._not_found(e):
+                return None
+            raise
+
+    def _touch(self, key: str) -> bool:
+        head = self._head(key)
+        if head is None:
+            return False
+        # У объектов S3 нельзя поменять время изменения: копируем объект сам в себя
+        self.client.copy_object(
+            Bucket=self.bucket,
+            Key=key,
+            CopySource={"Bucket": self.bucket, "Key": key},
+            MetadataDirective="REPLACE",
+            ContentType=head.get("ContentType") or guess_media_type(key),
+        )
+        return True
+
+    async def touch(self, key: str) -> bool:
+        return await run_file_io(self._touch, key)
+
+    def _store_file(self, key: str, source: Path) -> None:
+        try:
+            if not self._touch(key):
+                # upload_file читает файл частями и загружает большие файлы multipart
+                self.client.upload_file(
+                    str(source),
+                    self.bucket,
+                    key,
+                    ExtraArgs={"ContentType": guess_media_type(key)},
+                )
+        finally:
+            source.unlink(missing_ok=True)
+
+    async def store_file(self, key: str, source: Path) -> None:
+        await run_file_io(self._store_file, key, source)
+
+    async def stat(self, key: str) -> StoredObject | None:
+        head = await run_file_io(self._head, key)
+        if head is None:
+            return None
+        return StoredObject(
+            key=key,
+            size=head["ContentLength"],
+            modified_at=head["LastModified"].timestamp(),
+            etag=head["ETag"],
+        )
+
+    def _delete(self, key: str) -> bool:
+        if self._head(key) is None:
+            return False
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+        return True
+
+    async def delete(self, key: str) -> bool:
+        return await run_file_io(self._delete, key)
+
+    def _list_objects(self, prefix: str) -> list[StoredObject]:
+        objects = []
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for item in page.get("Contents", []):
+                objects.append(
+                    StoredObject(
+                        key=item["Key"],
+                        size=item["Size"],
+                        modified_at=item["LastModified"].timestamp(),
+                        etag=item["ETag"],
+                    )
+                )
+        return objects
+
+    async def list_objects(self, prefix: str) -> list[StoredObject]:
+        return await run_file_io(self._list_objects, prefix)
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        response = await run_file_io(
+            lambda: self.client.get_object(
+                Bucket=self.bucket, Key=key, Range=f"bytes={start}-{end}"
+            )
+        )
+        body = response["Body"]
+        try:
+            async for chunk in iterate_in_threadpool(
+                body.iter_chunks(settings.UPLOAD_CHUNK_SIZE)
+            ):
+                yield chunk
+        finally:
+            body.close()
+
+    async def presigned_url(
+        self, key: str, expires_in: int, filename: str | None = None
+    ) -> str | None:
+        params = {"Bucket": self.bucket, "Key": key}
+        if filename:
+            params["ResponseContentDisposition"] = (
+                f"attachment; filename*=utf-8''{quote(filename)}"
+            )
+        # Подпись считается локально, но botocore может запросить или обновить
+        # учетные данные (IMDS, assume-role), поэтому вызов тоже вне event loop
+        return await run_file_io(
+            lambda: self.client.generate_presigned_url(
+                "get_object", Params=params, ExpiresIn=expires_in
+            )
+        )
+
+
+def _create_s3_storage() -> S3Storage:
+    try:
+        import boto3
+        from botocore.config import Config
+    except ImportError:
+        raise RuntimeError(
+            "MEDIA_STORAGE=s3, но пакет boto3 не установлен (poetry install -E s3)"
+        )
+    if not settings.MEDIA_S3_BUCKET:
+        raise RuntimeError("Для MEDIA_STORAGE=s3 нужно задать MEDIA_S3_BUCKET")
+
+    client = boto3.client(
+        "s3",
+        endpoint_url=settings.MEDIA_S3_ENDPOINT_URL,
+        region_name=settings.MEDIA_S3_REGION,
+        aws_access_key_id=settings.MEDIA_S3_ACCESS_KEY_ID,
+        aws_secret_access_key=settings.MEDIA_S3_SECRET_ACCESS_KEY,
+        config=Config(
+            signature_version="s3v4",
+            s3={"addressing_style": settings.MEDIA_S3_ADDRESSING_STYLE},
+            max_pool_connections=settings.FILE_IO_WORKERS,
+        ),
+    )
+    return S3Storage(client, settings.MEDIA_S3_BUCKET)
+
+
+def _create_storage() -> MediaStorage:
+    if settings.MEDIA_STORAGE == "s3":
+        return _create_s3_storage()
+    return LocalStorage(settings.MEDIA_ROOT)
+
+
+_storage = _create_storage()
+
+
+def get_storage() -> MediaStorage:
+    """Текущий backend хранилища медиафайлов"""
+    return _storage